@@ -1,10 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_apscheduler import APScheduler
-from database import db
+from database import db, build_engine_options, warm_up_pool, get_pool_stats
 import crawler
-import data_processor
 import predictor
-from datetime import datetime
+import pipeline
+import resilience
+import serialization
+import scenario
+import model_selection
+import model_registry
+import refresh_lock
 from models import WinProbability, RankingPredict
 import os
 
@@ -24,6 +29,9 @@ def create_app():
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # 커넥션 풀 설정 (pre-ping, recycle, timeout)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
     # 확장 기능 초기화
     db.init_app(app)
     scheduler.init_app(app)
@@ -31,42 +39,85 @@ def create_app():
     # 스케줄러 작업 등록 및 시작
     scheduler.start()
 
+    # 워커 부팅 시 커넥션 풀 예열
+    with app.app_context():
+        try:
+            warmed = warm_up_pool()
+            print(f"🔌 DB 커넥션 예열 완료: {warmed}개")
+        except Exception as e:
+            print(f"⚠️ DB 커넥션 예열 실패: {str(e)}")
+
     # 캐시 데이터 초기화
     app.cached_data = {
         'hitter_data': None,
         'pitcher_data': None,
         'win_probability_df': None,
+        'player_index': None,
+        'team_aggregates': None,
         'last_update': None
     }
 
+    # 재시작 시 DB에 저장된 승률로 캐시 복원
+    with app.app_context():
+        try:
+            if predictor.warm_start_cache(app.cached_data):
+                print("♻️ 저장된 승률 데이터로 캐시 복원 완료")
+        except Exception as e:
+            print(f"⚠️ 캐시 복원 실패: {str(e)}")
+
+    def run_daily_update(override=False):
+        """자정/강제 갱신 (차단 중이어도 실행, 이미 갱신된 창은 override=True일 때만 다시 실행, 앱 컨텍스트 필요).
+        반환: 갱신 성공 여부"""
+        print("🔁 자정 강제 데이터 갱신 시작...")
+        # 수집/처리/DB 및 캐시 갱신 (타자/투수 분기 병렬 실행, 실패한 쪽은 마지막 정상 데이터 사용)
+        updated = predictor.run_refresh(app.cached_data, force=True, override=override)
+        if updated:
+            print("✅ 자동 갱신 완료!")
+        # 두 번째 예측 모델: 경기 결과 기반 Elo 레이팅 (새 경기만 반영)
+        predictor.refresh_elo(app.cached_data)
+        return updated
+
     # 매일 00:00 KST에 실행되는 작업
     @scheduler.task('cron', id='daily_update', hour=0, minute=0, timezone='Asia/Seoul')
     def daily_data_update():
         with app.app_context():  # 앱 컨텍스트 보장
-            print("🔁 자정 강제 데이터 갱신 시작...")
-            try:
-                # 데이터 수집
-                hitter_data = crawler.crawl_hitter_data()
-                pitcher_data = crawler.crawl_pitcher_data()
-                hist_hitter, hist_pitcher = crawler.load_historical_data()
-
-                # 데이터 처리
-                processed_hitter = data_processor.process_hitter_data(hitter_data, hist_hitter)
-                processed_pitcher = data_processor.process_pitcher_data(pitcher_data, hist_pitcher)
-
-                # DB 갱신
-                predictor.generate_win_probability_df(processed_hitter, processed_pitcher)
-
-                # 캐시 초기화
-                app.cached_data.update({
-                    'hitter_data': processed_hitter,
-                    'pitcher_data': processed_pitcher,
-                    'last_update': datetime.now(),
-                    'win_probability_df': predictor.get_win_probability_df(app.cached_data)
-                })
-                print("✅ 자동 갱신 완료!")
-            except Exception as e:
-                print(f"⚠️ 자동 갱신 실패: {str(e)}")
+            run_daily_update()
+
+    # 실패했거나 일부 소스가 마지막 정상 데이터인 갱신은 백그라운드에서 재시도 (백오프는 서킷 브레이커가 관리)
+    @scheduler.task('interval', id='refresh_retry', minutes=int(os.getenv('KBO_REFRESH_RETRY_MINUTES', 5)))
+    def refresh_retry():
+        if not predictor.needs_retry():
+            return
+        with app.app_context():
+            print("🔁 데이터 갱신 재시도...")
+            if predictor.run_refresh(app.cached_data):
+                print("✅ 갱신 재시도 완료!")
+
+    # 주 1회 후보 모델 탐색 후 최종 예측 모델 승격 (일일 갱신은 승격된 모델만 학습)
+    if os.getenv('KBO_MODEL_SELECTION', 'false').lower() in ('1', 'true', 'yes'):
+        @scheduler.task('cron', id='model_selection', day_of_week='mon', hour=3, timezone='Asia/Seoul')
+        def weekly_model_selection():
+            for kind in ('hitter', 'pitcher'):
+                try:
+                    model_selection.run_model_selection(kind)
+                except Exception as e:
+                    print(f"⚠️ {kind} 모델 탐색 실패: {str(e)}")
+
+    # 다른 워커나 CLI에서 승격/롤백한 활성 모델도 재시작 없이 반영
+    @app.before_request
+    def sync_serving_models():
+        predictor.sync_active_models(app.cached_data)
+
+    def parse_season(value):
+        """요청의 시즌 값 (없으면 None). 연도 정수가 아니면 ValueError"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            value = None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError("시즌은 연도 정수여야 합니다. 예: {\"season\": 2024}")
 
     # --- 여기서부터 라우트 정의 ---
 
@@ -82,9 +133,26 @@ def create_app():
 
         team1 = data['team1']
         team2 = data['team2']
+        try:
+            season = parse_season(request.args.get('season', data.get('season')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # score: 선수 기록 기반 팀 점수 모델 (기본), elo: 경기 결과 기반 Elo 레이팅
+        model = str(request.args.get('model') or data.get('model') or 'score').lower()
+        if model not in ('score', 'elo'):
+            return jsonify({'error': f"지원하지 않는 모델입니다: {model} (score, elo)"}), 400
+        if model == 'elo' and season:
+            return jsonify({'error': "Elo 모델은 현재 시즌만 지원합니다."}), 400
 
         try:
-            win_probability_df = predictor.get_win_probability_df(app.cached_data)
+            if model == 'elo':
+                win_probability_df = predictor.get_elo_win_probability_df(app.cached_data)
+            elif season:
+                win_probability_df = predictor.get_season_win_probability_df(app.cached_data, season)
+                if win_probability_df is None:
+                    return jsonify({'error': f"{season} 시즌 승률 데이터가 없습니다."}), 404
+            else:
+                win_probability_df = predictor.get_win_probability_df(app.cached_data)
             valid_teams = win_probability_df.index.tolist()
 
             if team1 not in valid_teams:
@@ -98,16 +166,139 @@ def create_app():
             if win_prob == '-':
                 return jsonify({'error': "승률을 계산할 수 없습니다."}), 400
 
-            return jsonify({
+            response = {
                 'team1': team1,
                 'team2': team2,
+                'season': season or crawler.current_season(),
+                'model': model,
                 'win_probability': float(win_prob),
+                'staleness': resilience.staleness_report(),
                 'message': f"{team1}이(가) {team2}을(를) 상대로 승리할 예측 승률은 {win_prob}% 입니다."
-            })
+            }
+
+            # 불확실성 모드에서 계산된 신뢰구간이 있으면 함께 반환
+            ci = None if season or model == 'elo' else predictor.get_win_probability_ci(app.cached_data, team1, team2)
+            if ci is not None:
+                response['ci_low'], response['ci_high'] = ci
 
+            return jsonify(response)
+
+        except resilience.CircuitOpenError as e:
+            return jsonify({'error': str(e), 'staleness': resilience.staleness_report()}), 503
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/matrix', methods=['GET'])
+    def get_matrix():
+        try:
+            season = parse_season(request.args.get('season'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            if season:
+                win_probability_df = predictor.get_season_win_probability_df(app.cached_data, season)
+                if win_probability_df is None:
+                    return jsonify({'error': f"{season} 시즌 승률 데이터가 없습니다."}), 404
+                payloads = serialization.get_matrix_payloads(app.cached_data, win_probability_df, season,
+                                                             current=False)
+            else:
+                win_probability_df = predictor.get_win_probability_df(app.cached_data)
+                payloads = serialization.get_matrix_payloads(app.cached_data, win_probability_df,
+                                                             crawler.current_season())
+        except resilience.CircuitOpenError as e:
+            return jsonify({'error': str(e)}), 503
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+        # Accept 헤더 또는 ?format= 으로 형식 선택 (기본 JSON)
+        fmt = request.args.get('format')
+        if fmt is None:
+            mimetype = request.accept_mimetypes.best_match(
+                [serialization.MATRIX_FORMATS[f] for f in serialization.available_formats()],
+                default=serialization.MATRIX_FORMATS['json'])
+            fmt = next(f for f, m in serialization.MATRIX_FORMATS.items() if m == mimetype)
+        if fmt not in payloads['bodies']:
+            return jsonify({'error': f"지원하지 않는 형식입니다. 지원 형식: {', '.join(payloads['bodies'])}"}), 406
+
+        encoding = request.accept_encodings.best_match(serialization.available_encodings(), default='identity')
+        headers = {'ETag': f'"{payloads["etag"]}-{fmt}"', 'Vary': 'Accept, Accept-Encoding',
+                   'Cache-Control': 'no-cache'}
+        if request.headers.get('If-None-Match') == headers['ETag']:
+            return Response(status=304, headers=headers)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        return Response(payloads['bodies'][fmt][encoding], mimetype=serialization.MATRIX_FORMATS[fmt],
+                        headers=headers)
+
+    @app.route('/scenario', methods=['POST'])
+    def run_scenario():
+        data = request.get_json() or {}
+        engine = scenario.get_scenario_engine(app.cached_data)
+        if engine is None:
+            return jsonify({'error': "선수 예측 데이터가 아직 준비되지 않았습니다."}), 503
+
+        try:
+            edits, result = engine.run(data.get('edits'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        win_probability_df = result['win_probability_df']
+        teams, values = serialization.matrix_arrays(win_probability_df)
+        base_scores = dict(zip(engine.base_victory_df['팀명'], engine.base_victory_df['Adjusted_Score']))
+        response = {
+            'season': engine.season,
+            'edits': edits,
+            'teams': teams,
+            'probabilities': [None if v != v else float(v) for v in values.ravel()],
+            'scores': {team: {'base': round(float(base_scores[team]), 4) if team in base_scores else None,
+                              'scenario': round(float(score), 4)}
+                       for team, score in zip(result['victory_df']['팀명'], result['victory_df']['Adjusted_Score'])}
+        }
+
+        # 두 팀을 지정하면 기준 승률과 비교
+        team1, team2 = data.get('team1'), data.get('team2')
+        if team1 and team2:
+            if team1 not in teams or team2 not in teams or team1 == team2:
+                return jsonify({'error': f"유효한 서로 다른 두 팀을 지정해야 합니다. 유효한 팀 목록: {', '.join(teams)}"}), 400
+            base_df = app.cached_data.get('win_probability_df')
+            response.update({
+                'team1': team1,
+                'team2': team2,
+                'win_probability': float(win_probability_df.loc[team1, team2]),
+                'base_win_probability': (float(base_df.loc[team1, team2])
+                                         if base_df is not None and team1 in base_df.index and team2 in base_df.index
+                                         else None)
+            })
+
+        return jsonify(response)
+
+    @app.route('/predict_lineup', methods=['POST'])
+    def predict_lineup():
+        data = request.get_json()
+        if not data or not isinstance(data.get('team1'), dict) or not isinstance(data.get('team2'), dict):
+            return jsonify({'error': '두 팀의 라인업을 제공해야 합니다. 예: {"team1": {"team": "LG", "hitters": [...], "pitcher": "..."}, "team2": {...}}'}), 400
+
+        player_index = app.cached_data.get('player_index')
+        if player_index is None:
+            return jsonify({'error': "선수 예측 데이터가 아직 준비되지 않았습니다."}), 503
+
+        try:
+            score1, score2, win_prob = player_index.predict_matchup(data['team1'], data['team2'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        team1 = data['team1'].get('team', 'team1')
+        team2 = data['team2'].get('team', 'team2')
+        return jsonify({
+            'team1': team1,
+            'team2': team2,
+            'team1_score': round(score1, 4),
+            'team2_score': round(score2, 4),
+            'win_probability': win_prob,
+            'message': f"{team1}이(가) {team2}을(를) 상대로 승리할 예측 승률은 {win_prob}% 입니다."
+        })
+
     @app.route('/historical_data', methods=['GET'])
     def get_historical_data():
         try:
@@ -139,12 +330,127 @@ def create_app():
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/pool_stats', methods=['GET'])
+    def pool_stats():
+        try:
+            return jsonify(get_pool_stats())
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/refresh_stats', methods=['GET'])
+    def refresh_stats():
+        # 갱신 합치기(single-flight) 지표와 서킷 브레이커 상태
+        return jsonify({
+            'single_flight': resilience.get_single_flight(predictor.REFRESH_BREAKER).status(),
+            'breaker': resilience.get_breaker(predictor.REFRESH_BREAKER).status(),
+            'staleness': resilience.staleness_report()
+        })
+
+    @app.route('/players/<name>', methods=['GET'])
+    def get_player(name):
+        player_index = app.cached_data.get('player_index')
+        if player_index is None:
+            return jsonify({'error': "선수 예측 데이터가 아직 준비되지 않았습니다."}), 503
+
+        records = player_index.lookup(name, request.args.get('team'))
+        if not records:
+            return jsonify({'error': f"'{name}' 선수를 찾을 수 없습니다."}), 404
+        return jsonify(records)
+
+    @app.route('/leaders', methods=['GET'])
+    def get_leaders():
+        player_index = app.cached_data.get('player_index')
+        if player_index is None:
+            return jsonify({'error': "선수 예측 데이터가 아직 준비되지 않았습니다."}), 503
+
+        metric = request.args.get('metric', 'OPS_predict')
+        team = request.args.get('team')
+        limit = request.args.get('limit', 10, type=int)
+        try:
+            leaders = player_index.leaders(metric, team, limit)
+        except KeyError:
+            return jsonify({'error': f"'{metric}'은(는) 지원하지 않는 지표입니다. 지원 지표: {', '.join(player_index.metrics)}"}), 400
+
+        return jsonify({'metric': metric, 'team': team, 'leaders': leaders})
+
+    @app.route('/models', methods=['GET'])
+    def get_models():
+        return jsonify({kind: {'active': model_registry.get_active_version(kind),
+                               'versions': model_registry.list_versions(kind)}
+                        for kind in model_registry.KIND_SPECS})
+
+    def model_change_response(kind, version):
+        """활성 모델 변경 후 캐시된 처리 결과로 다시 예측하여 서빙 데이터 교체"""
+        applied = predictor.apply_active_models(app.cached_data)
+        if applied is None:
+            message = "갱신이 진행 중입니다. 진행 중인 갱신이 끝날 때 새 모델이 반영됩니다."
+        elif model_registry.REGISTRY_MODE != 'serve':
+            message = "serve 모드가 아니므로 다음 학습 결과로 서빙됩니다."
+        elif not applied and app.cached_data.get('hitter_data') is None:
+            message = "캐시된 처리 결과가 없어 다음 갱신부터 반영됩니다."
+        else:
+            message = "서빙 데이터에 반영되었습니다."
+        return jsonify({'kind': kind, 'active': version, 'applied': bool(applied), 'message': message})
+
+    @app.route('/models/<kind>/promote', methods=['POST'])
+    def promote_model(kind):
+        data = request.get_json() or {}
+        if not data.get('version'):
+            return jsonify({'error': '활성화할 버전을 제공해야 합니다. 예: {"version": "20250101-000000-abcd1234"}'}), 400
+        try:
+            version = model_registry.promote(kind, data['version'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return model_change_response(kind, version)
+
+    @app.route('/models/<kind>/rollback', methods=['POST'])
+    def rollback_model(kind):
+        try:
+            version = model_registry.rollback(kind)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return model_change_response(kind, version)
+
+    # 여러 시즌 백필 (백그라운드 작업으로 실행)
+    def run_season_pipeline(seasons):
+        with app.app_context():
+            print(f"🔁 시즌 파이프라인 시작: {seasons}")
+            try:
+                results = pipeline.run_pipeline(seasons)
+                pipeline.store_pipeline_results(results, app.cached_data)
+                print("✅ 시즌 파이프라인 완료!")
+            except Exception as e:
+                print(f"⚠️ 시즌 파이프라인 실패: {str(e)}")
+
+    @app.route('/backfill', methods=['POST'])
+    def backfill():
+        data = request.get_json() or {}
+        try:
+            seasons = [int(s) for s in data.get('seasons', [])]
+        except (TypeError, ValueError):
+            return jsonify({'error': '시즌 목록은 연도 정수 배열이어야 합니다. 예: {"seasons": [2024, 2025]}'}), 400
+        if not seasons:
+            return jsonify({'error': '시즌 목록을 제공해야 합니다. 예: {"seasons": [2024, 2025]}'}), 400
+
+        scheduler.add_job(id=f"backfill_{'_'.join(map(str, seasons))}", func=run_season_pipeline,
+                          args=[seasons], trigger='date', replace_existing=True)
+        return jsonify({"status": "Backfill scheduled", "seasons": seasons}), 202
+
     # --- force-update 엔드포인트 추가 ---
+    # GitHub Action 호출은 자정 갱신이 이미 끝낸 창이면 건너뜀. 운영자가 다시 돌릴 때만 ?override=true
     @app.route('/force-update', methods=['POST'])
     def force_update():
+        override = request.args.get('override', 'false').lower() in ('1', 'true', 'yes')
         try:
-            scheduler.run_job('daily_update')
-            return jsonify({"status": "Job triggered successfully"}), 200
+            if run_daily_update(override=override):
+                return jsonify({"status": "Update completed"}), 200
+            # 같은 시각에 자정 갱신(다른 워커)이나 GitHub Action 호출이 이미 실행 중이면 중복 실행하지 않음
+            if refresh_lock.is_refresh_running():
+                return jsonify({"status": "Refresh already running"}), 409
+            if refresh_lock.is_window_done(refresh_lock.refresh_window()):
+                return jsonify({"status": "Already updated", "window": refresh_lock.refresh_window()}), 200
+            breaker = resilience.get_breaker(predictor.REFRESH_BREAKER)
+            return jsonify({"error": f"데이터 갱신 실패: {breaker.last_error}", "breaker": breaker.status()}), 500
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
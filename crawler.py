@@ -2,24 +2,85 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import io
 import datetime
+import os
 import requests
+from features import add_hitter_features, add_pitcher_features
 
+# 컬럼 이름 정의
+hitter_columns = ['선수명', '팀명', 'AVG', 'G', 'PA', 'AB', 'R', 'H', '2B', '3B', 'HR', 'TB', 'RBI', 'SAC', 'SF', '연도']
+pitcher_columns = ['선수명', '팀명', 'ERA', 'G', 'W', 'L', 'SV', 'HLD', 'WPCT', 'IP', 'H', 'HR', 'BB', 'HBP', 'SO', 'R',
+                   'ER', 'WHIP', '연도']
 
-def crawl_hitter_data():
-    """타자 데이터 크롤링 (requests 사용)"""
+# 파싱 및 파생 지표 계산이 끝난 역대 데이터 (프로세스당 1회)
+_historical_cache = {}
+
+
+# 시즌 전환일 (MM-DD, KST). 이 날짜 전의 비시즌(1~3월)에는 지난 시즌을 현재 시즌으로 봄
+SEASON_START = os.getenv('KBO_SEASON_START', '03-20')
+KST = datetime.timezone(datetime.timedelta(hours=9), 'Asia/Seoul')
+
+
+def current_season(today=None):
+    """현재 시즌 연도 (KBO_SEASON 환경 변수로 고정 가능). 시즌 전환일 전이면 지난 시즌"""
+    if os.getenv('KBO_SEASON'):
+        return int(os.getenv('KBO_SEASON'))
+    today = today or datetime.datetime.now(KST).date()
+    month, day = map(int, SEASON_START.split('-'))
+    return today.year if (today.month, today.day) >= (month, day) else today.year - 1
+
+
+def _selected_season(select):
+    """시즌 드롭다운에서 선택된 시즌 (없으면 None)"""
+    option = select.find('option', selected=True)
+    value = option.get('value') if option is not None else None
+    return int(value) if value and value.isdigit() else None
+
+
+def _fetch_record_html(url, headers, season):
+    """기록 페이지 HTML 요청. 기본 페이지의 선택 시즌이 요청한 시즌과 다르면 시즌 선택 postback으로 조회"""
+    response = requests.get(url, headers=headers)
+    response.raise_for_status()  # HTTP 에러 확인
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    select = soup.find('select', attrs={'name': lambda name: name and name.endswith('ddlSeason$ddlSeason')})
+    if select is None:
+        # 드롭다운이 없으면 기본 페이지를 현재 시즌으로 간주
+        if season == current_season():
+            return response.text
+        raise ValueError("시즌 선택 목록을 찾을 수 없습니다.")
+
+    # 기본 페이지가 보여주는 시즌을 페이지에서 확인 (시즌 전환일 전후로 기본 페이지가 지난 시즌일 수 있음)
+    if _selected_season(select) == season:
+        return response.text
+
+    # ASP.NET 폼의 hidden 값과 시즌 드롭다운으로 postback 요청
+    form = {inp['name']: inp.get('value', '') for inp in soup.select('input[type=hidden]') if inp.get('name')}
+    form['__EVENTTARGET'] = select['name']
+    form[select['name']] = str(season)
+
+    response = requests.post(url, headers=headers, data=form)
+    response.raise_for_status()
+
+    # 요청한 시즌 기록이 아직 없으면 다른 시즌 기록에 잘못된 연도를 붙이지 않도록 실패 처리
+    select = BeautifulSoup(response.text, 'html.parser').find(
+        'select', attrs={'name': lambda name: name and name.endswith('ddlSeason$ddlSeason')})
+    if select is not None and _selected_season(select) not in (None, season):
+        raise ValueError(f"{season} 시즌 기록 페이지를 찾을 수 없습니다.")
+    return response.text
+
+
+def crawl_hitter_data(season=None):
+    """타자 데이터 크롤링 (requests 사용, season 미지정 시 현재 시즌)"""
     url = 'https://www.koreabaseball.com/Record/Player/HitterBasic/Basic1.aspx'
+    season = season or current_season()
 
     # 헤더 추가 (403 에러 방지)
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
     }
 
-    # 페이지 요청
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()  # HTTP 에러 확인
-
-    # HTML 파싱
-    soup = BeautifulSoup(response.text, 'html.parser')
+    # 페이지 요청 및 HTML 파싱
+    soup = BeautifulSoup(_fetch_record_html(url, headers, season), 'html.parser')
 
     # 테이블 추출
     table = soup.select_one('div.record_result > table')
@@ -36,23 +97,21 @@ def crawl_hitter_data():
     # DataFrame 생성
     df = pd.DataFrame(rows, columns=headers)
     df = df.set_index('순위')
-    df['연도'] = 2025
+    df['연도'] = season
 
     return df
 
 
-def crawl_pitcher_data():
-    """투수 데이터 크롤링 (requests 사용)"""
+def crawl_pitcher_data(season=None):
+    """투수 데이터 크롤링 (requests 사용, season 미지정 시 현재 시즌)"""
     url = 'https://www.koreabaseball.com/Record/Player/PitcherBasic/Basic1.aspx'
+    season = season or current_season()
 
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
     }
 
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(_fetch_record_html(url, headers, season), 'html.parser')
     table = soup.select_one('div.record_result > table')
 
     headers = [th.get_text(strip=True) for th in table.select('thead th')]
@@ -64,13 +123,57 @@ def crawl_pitcher_data():
 
     df = pd.DataFrame(rows, columns=headers)
     df = df.set_index('순위')
-    df['연도'] = 2025
+    df['연도'] = season
 
     return df
 
 
-def load_historical_data():
-    """역대 데이터 로드"""
+def crawl_game_results(season=None, month=None):
+    """경기 결과 크롤링 (KBO 일정 페이지 API, month 미지정 시 정규시즌 전체). 취소/미진행 경기는 제외"""
+    url = 'https://www.koreabaseball.com/ws/Schedule.asmx/GetScheduleList'
+    season = season or current_season()
+    months = [month] if month else range(3, 12)
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
+    }
+
+    games = []
+    for game_month in months:
+        form = {'leId': '1', 'srIdList': '0,9,6', 'seasonId': str(season), 'gameMonth': f"{game_month:02d}",
+                'teamId': ''}
+        response = requests.post(url, headers=headers, data=form)
+        response.raise_for_status()
+
+        day = None
+        for row in response.json().get('rows', []):
+            cells = {cell.get('Class'): cell.get('Text', '') for cell in row.get('row', [])}
+            # 날짜 칸은 그 날의 첫 경기 행에만 있음 (예: '03.22(토)')
+            if cells.get('day'):
+                day = cells['day'][:5]
+            if day is None or not cells.get('play'):
+                continue
+
+            # 원정팀 <em>원정 점수 vs 홈 점수</em> 홈팀
+            play = BeautifulSoup(cells['play'], 'html.parser')
+            teams = [span.get_text(strip=True) for span in play.find_all('span', recursive=False)]
+            scores = [span.get_text(strip=True) for span in play.select('em > span') if span.get('class')]
+            if len(teams) != 2 or len(scores) != 2 or not all(s.isdigit() for s in scores):
+                continue
+
+            games.append({
+                'date': datetime.datetime.strptime(f"{season}.{day}", '%Y.%m.%d'),
+                'away': teams[0],
+                'home': teams[1],
+                'away_score': int(scores[0]),
+                'home_score': int(scores[1])
+            })
+
+    return pd.DataFrame(games, columns=['date', 'away', 'home', 'away_score', 'home_score'])
+
+
+def _parse_embedded_history():
+    """코드에 내장된 역대 데이터 파싱 (파생 지표 포함, 프로세스당 1회)"""
     # 타자 역대 데이터
     hitter_historical_data = """
 전민재	롯데	0.4	18	58	50	7	20	5	0	0	25	4	4	0	2025
@@ -886,14 +989,47 @@ def load_historical_data():
 
     """
 
-    # 컬럼 이름 정의
-    hitter_columns = ['선수명', '팀명', 'AVG', 'G', 'PA', 'AB', 'R', 'H', '2B', '3B', 'HR', 'TB', 'RBI', 'SAC', 'SF', '연도']
-    pitcher_columns = ['선수명', '팀명', 'ERA', 'G', 'W', 'L', 'SV', 'HLD', 'WPCT', 'IP', 'H', 'HR', 'BB', 'HBP', 'SO', 'R',
-                       'ER', 'WHIP', '연도']
-
     # 데이터 로드
     hitter_data_his = pd.read_csv(io.StringIO(hitter_historical_data), sep=r'\s+', header=None, names=hitter_columns,
                                   engine='python')
     pitcher_data_his = pd.read_csv(io.StringIO(pitcher_historical_data), sep='\t', header=None, names=pitcher_columns)
 
-    return hitter_data_his, pitcher_data_his
\ No newline at end of file
+    # 파생 지표는 적재 시점에 한 번만 계산하여 원본 옆에 저장
+    hitter_data_his = add_hitter_features(hitter_data_his)
+    pitcher_data_his = add_pitcher_features(pitcher_data_his)
+    _historical_cache['embedded_hitter'] = hitter_data_his
+    _historical_cache['embedded_pitcher'] = pitcher_data_his
+
+
+def invalidate_history_store_cache():
+    """기록 저장소가 바뀌면 저장소를 포함한 역대 데이터 캐시 삭제 (내장 기록 파싱 결과는 유지)"""
+    _historical_cache.pop('hitter', None)
+    _historical_cache.pop('pitcher', None)
+
+
+def load_historical_data(include_store=True):
+    """역대 데이터 로드 (파생 지표 포함, 최초 1회만 파싱)
+
+    include_store=False면 내장 기록만 반환 (기록 저장소를 메모리에 올리지 않음)
+    """
+    if 'embedded_hitter' not in _historical_cache:
+        _parse_embedded_history()
+    if not include_store:
+        return _historical_cache['embedded_hitter'].copy(), _historical_cache['embedded_pitcher'].copy()
+
+    if 'hitter' not in _historical_cache:
+        # 기록 저장소(history_store.HISTORY_DIR)에 적재된 기록이 있으면 함께 로드 (배치 모드와 같은 기준)
+        from history_store import load_history_store
+        hitter_data_his = _historical_cache['embedded_hitter']
+        pitcher_data_his = _historical_cache['embedded_pitcher']
+        hitter_store = load_history_store('hitter')
+        pitcher_store = load_history_store('pitcher')
+        if not hitter_store.empty:
+            hitter_data_his = pd.concat([hitter_data_his, hitter_store], ignore_index=True)
+        if not pitcher_store.empty:
+            pitcher_data_his = pd.concat([pitcher_data_his, pitcher_store], ignore_index=True)
+
+        _historical_cache['hitter'] = hitter_data_his
+        _historical_cache['pitcher'] = pitcher_data_his
+
+    return _historical_cache['hitter'].copy(), _historical_cache['pitcher'].copy()
\ No newline at end of file
@@ -1,18 +1,31 @@
+import os
+import sys
+import time
+import json
+import pickle
+import hashlib
+import sklearn
+import xgboost
+import lightgbm
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.cluster import KMeans
+from sklearn.utils.extmath import randomized_svd
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression, Ridge, Lasso, ElasticNet
 from sklearn.tree import DecisionTreeRegressor
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn.svm import SVR
 from xgboost import XGBRegressor
+from lightgbm import LGBMRegressor
 from sklearn.model_selection import GridSearchCV
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 from models import HitterRecord, PitcherRecord
+from features import (add_hitter_features, add_pitcher_features, drop_undefined_rates, HITTER_DERIVED_COLUMNS,
+                      PITCHER_DERIVED_COLUMNS)
 from database import db
 
 
@@ -80,10 +93,304 @@ def save_pitcher_records(df):
     db.session.bulk_save_objects(records)
     db.session.commit()
 
-def process_hitter_data(hitter_data_2025, hitter_data_his):
-    """타자 데이터 처리"""
-    # 현재 데이터와 역대 데이터 합치기
-    all_hitter_data = pd.concat([hitter_data_his, hitter_data_2025], ignore_index=True)
+# 학습 백엔드 설정 (변수 중요도 산출용 / 최종 예측용)
+RANK_BACKENDS = ('rf', 'rf_early', 'lgbm')
+FINAL_BACKENDS = ('rf', 'rf_early', 'hgb', 'lgbm', 'ridge', 'lasso', 'elasticnet', 'svr', 'gbr', 'xgb')
+RANK_BACKEND = os.getenv('KBO_RANK_BACKEND', 'rf')
+# 지정하지 않으면 모델 선택 작업이 승격한 모델, 그것도 없으면 'rf'
+FINAL_BACKEND = os.getenv('KBO_FINAL_BACKEND')
+RF_TREES = int(os.getenv('KBO_RF_TREES', 100))
+N_JOBS = int(os.getenv('KBO_N_JOBS', -1))
+
+
+class EarlyStoppedForestRegressor(RegressorMixin, BaseEstimator):
+    """OOB 점수가 더 이상 좋아지지 않으면 트리 추가를 멈추는 랜덤 포레스트"""
+
+    def __init__(self, step=20, max_estimators=200, tol=1e-3, random_state=42, n_jobs=-1):
+        self.step = step
+        self.max_estimators = max_estimators
+        self.tol = tol
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        forest = RandomForestRegressor(n_estimators=self.step, warm_start=True, oob_score=True,
+                                       random_state=self.random_state, n_jobs=self.n_jobs)
+        forest.fit(X, y)
+        best_score = forest.oob_score_
+        while forest.n_estimators < self.max_estimators:
+            forest.n_estimators += self.step
+            forest.fit(X, y)
+            if forest.oob_score_ - best_score < self.tol:
+                break
+            best_score = forest.oob_score_
+
+        self.forest_ = forest
+        self.n_estimators_ = forest.n_estimators
+        self.feature_importances_ = forest.feature_importances_
+        return self
+
+    def predict(self, X):
+        return self.forest_.predict(X)
+
+
+def make_regressor(backend='rf', random_state=42, params=None):
+    """설정된 백엔드에 맞는 회귀 모델 생성 (params는 기본 하이퍼파라미터를 덮어씀)"""
+    params = params or {}
+    if backend == 'rf':
+        return RandomForestRegressor(**{'n_estimators': RF_TREES, 'n_jobs': N_JOBS, **params},
+                                     random_state=random_state)
+    if backend == 'rf_early':
+        return EarlyStoppedForestRegressor(**{'max_estimators': RF_TREES * 2, 'n_jobs': N_JOBS, **params},
+                                           random_state=random_state)
+    if backend == 'hgb':
+        return HistGradientBoostingRegressor(**params, random_state=random_state)
+    if backend == 'lgbm':
+        return LGBMRegressor(**{'n_estimators': 200, 'learning_rate': 0.05, 'importance_type': 'gain',
+                                'n_jobs': N_JOBS, 'verbose': -1, **params}, random_state=random_state)
+    if backend == 'ridge':
+        return Ridge(**params)
+    if backend == 'lasso':
+        return Lasso(**params, random_state=random_state)
+    if backend == 'elasticnet':
+        return ElasticNet(**params, random_state=random_state)
+    if backend == 'svr':
+        return SVR(**params)
+    if backend == 'gbr':
+        return GradientBoostingRegressor(**params, random_state=random_state)
+    if backend == 'xgb':
+        return XGBRegressor(**{'n_jobs': N_JOBS, **params}, random_state=random_state)
+    raise ValueError(f"지원하지 않는 학습 백엔드입니다: {backend}")
+
+
+# 모델 선택 작업이 승격한 최종 예측 모델 설정 위치
+MODEL_SELECTION_DIR = os.getenv('KBO_MODEL_SELECTION_DIR', os.path.join('data', 'model_selection'))
+
+
+def _selected_model_path(kind):
+    return os.path.join(MODEL_SELECTION_DIR, f"selected_{kind}.json")
+
+
+def load_selected_model(kind):
+    """승격된 최종 예측 모델 설정 (없으면 None)"""
+    path = _selected_model_path(kind)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_selected_model(kind, selection):
+    """최종 예측 모델 승격 (임시 파일 후 교체하여 갱신 중에도 온전한 설정만 읽히도록 함)"""
+    os.makedirs(MODEL_SELECTION_DIR, exist_ok=True)
+    path = _selected_model_path(kind)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(selection, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def resolve_final_model(kind, final_backend=None):
+    """최종 예측 모델 결정: 인자 > KBO_FINAL_BACKEND > 승격된 모델 > 'rf'. 반환: (백엔드, 하이퍼파라미터)"""
+    if final_backend:
+        return final_backend, {}
+    if FINAL_BACKEND:
+        return FINAL_BACKEND, {}
+    selected = load_selected_model(kind)
+    if selected is not None:
+        return selected['backend'], selected.get('params', {})
+    return 'rf', {}
+
+
+def _check_backends(rank_backend, final_backend):
+    if rank_backend not in RANK_BACKENDS:
+        raise ValueError(f"변수 중요도 백엔드는 {', '.join(RANK_BACKENDS)} 중 하나여야 합니다: {rank_backend}")
+    if final_backend not in FINAL_BACKENDS:
+        raise ValueError(f"최종 예측 백엔드는 {', '.join(FINAL_BACKENDS)} 중 하나여야 합니다: {final_backend}")
+
+
+def _holdout_metrics(model, X_test, y_test):
+    """테스트 세트 기준 예측 성능 (R², MAE, RMSE)"""
+    y_pred = model.predict(X_test)
+    return {
+        'r2': float(r2_score(y_test, y_pred)),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred)))
+    }
+
+
+# 단계별 난수 시드 (결과 재현 및 지문 계산에 사용)
+SEEDS = {
+    'split': 42,
+    'rank_model': 42,
+    'k_sweep': 42,
+    'kmeans_final': 0,
+    'final_model': 42,
+}
+PCA_THRESHOLD = 0.90
+TEST_SIZE = 0.2
+
+# 지문이 같은 처리 결과를 저장하는 디스크 캐시 (프로세스/재시작 간 공유)
+RESULT_CACHE_DIR = os.getenv('KBO_CACHE_DIR', os.path.join('data', 'cache'))
+RESULT_CACHE_ENABLED = os.getenv('KBO_RESULT_CACHE', 'true').lower() in ('1', 'true', 'yes')
+# 종류별로 보관하는 최근 캐시 파일 수 (모델 산출물이 포함되어 파일당 수 MB, 오래된 것부터 삭제)
+RESULT_CACHE_KEEP = int(os.getenv('KBO_CACHE_KEEP', 3))
+
+
+def library_versions():
+    """결과에 영향을 주는 라이브러리 버전"""
+    return {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'xgboost': xgboost.__version__,
+        'lightgbm': lightgbm.__version__,
+    }
+
+
+def compute_fingerprint(kind, frames, params):
+    """입력 데이터 해시, 하이퍼파라미터, 시드, 라이브러리 버전으로 처리 결과 지문 계산"""
+    digest = hashlib.sha256(kind.encode('utf-8'))
+    for frame in frames:
+        digest.update(','.join(map(str, frame.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+
+    digest.update(json.dumps({
+        'params': params,
+        'seeds': SEEDS,
+        'versions': library_versions(),
+    }, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _fingerprint_params(n_features, rank_backend, final_backend, final_params=None):
+    return {
+        'n_features': n_features,
+        'rank_backend': rank_backend,
+        'final_backend': final_backend,
+        'final_params': final_params or {},
+        'rf_trees': RF_TREES,
+        'pca_threshold': PCA_THRESHOLD,
+        'test_size': TEST_SIZE,
+    }
+
+
+def _cache_path(kind, fingerprint):
+    return os.path.join(RESULT_CACHE_DIR, f"{kind}-{fingerprint}.pkl")
+
+
+def load_cached_result(kind, fingerprint, artifacts=None, use_cache=True):
+    """같은 지문의 처리 결과가 있으면 반환하고 산출물을 artifacts(기본: model_artifacts[kind])에 복원 (없으면 None)"""
+    if not (use_cache and RESULT_CACHE_ENABLED):
+        return None
+    path = _cache_path(kind, fingerprint)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ 캐시 로드 실패: {str(e)}")
+        return None
+
+    # 최근 사용 시각 갱신 (정리 시 최근에 쓴 캐시를 남김)
+    os.utime(path)
+    (model_artifacts[kind] if artifacts is None else artifacts).update(cached['artifacts'])
+    print(f"♻️ {kind} 처리 결과 캐시 사용 ({fingerprint[:12]})")
+    return cached['data']
+
+
+def save_cached_result(kind, fingerprint, data, artifacts=None, use_cache=True):
+    """처리 결과와 지문, 산출물 요약을 함께 저장 (임시 파일 후 교체)"""
+    artifacts = model_artifacts[kind] if artifacts is None else artifacts
+    artifacts['fingerprint'] = fingerprint
+    data.attrs['fingerprint'] = fingerprint
+    if not (use_cache and RESULT_CACHE_ENABLED):
+        return
+
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    path = _cache_path(kind, fingerprint)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'data': data, 'artifacts': dict(artifacts)}, f)
+    os.replace(tmp_path, path)
+    prune_result_cache(kind)
+
+
+def prune_result_cache(kind, keep=None):
+    """최근에 저장/사용한 keep개만 남기고 오래된 캐시 파일 삭제. 반환: 삭제한 파일 수"""
+    keep = RESULT_CACHE_KEEP if keep is None else keep
+    prefix = f"{kind}-"
+    paths = [os.path.join(RESULT_CACHE_DIR, name) for name in os.listdir(RESULT_CACHE_DIR)
+             if name.startswith(prefix) and name.endswith('.pkl')]
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    removed = 0
+    for path in paths[max(keep, 1):]:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            # 다른 프로세스가 먼저 삭제
+            pass
+    return removed
+
+
+# 학습 단계에서 계산된 모델 산출물 (예측 전용 실행 시 재사용)
+# 'design'은 최종 예측 모델 입력 (X, y)로, 모델 선택 작업이 같은 입력으로 후보를 평가
+model_artifacts = {'hitter': {}, 'pitcher': {}}
+
+
+def select_n_components(X_scaled, threshold=PCA_THRESHOLD, random_state=42):
+    """표준화 데이터의 특이값으로 누적 분산 비율이 threshold 이상이 되는 주성분 개수 계산"""
+    X_centered = X_scaled - X_scaled.mean(axis=0)
+    n_samples, n_features = X_centered.shape
+
+    # 전체 분산 = 모든 특이값 제곱의 합
+    total_variance = np.einsum('ij,ij->', X_centered, X_centered)
+    if total_variance == 0:
+        return 1
+
+    if n_features <= 64:
+        # 컬럼 수가 적으면 (p x p) 그람 행렬의 고유값이 곧 특이값 제곱 (정확하고 저렴함)
+        singular_sq = np.clip(np.linalg.eigvalsh(X_centered.T @ X_centered)[::-1], 0, None)
+        cumulative_variance = np.cumsum(singular_sq) / total_variance
+        return int(np.argmax(cumulative_variance >= threshold - 1e-12)) + 1
+
+    # 컬럼 수가 많으면 상위 성분만 randomized SVD로 구하고 부족하면 k를 늘림
+    k = min(16, n_features)
+    while True:
+        _, s, _ = randomized_svd(X_centered, n_components=k, n_iter=7, random_state=random_state)
+        cumulative_variance = np.cumsum(s ** 2) / total_variance
+        if cumulative_variance[-1] >= threshold or k >= min(n_samples, n_features):
+            return int(np.argmax(cumulative_variance >= threshold - 1e-12)) + 1
+        k = min(k * 2, min(n_samples, n_features))
+
+
+def process_hitter_data(hitter_data_2025, hitter_data_his, n_features=None, rank_backend=None, final_backend=None,
+                        use_cache=True, artifacts=None):
+    """타자 데이터 처리
+
+    use_cache: 결과 캐시 사용 여부, artifacts: 학습 산출물을 담을 dict (기본: 공유하는 model_artifacts['hitter'])
+    """
+    artifacts = model_artifacts['hitter'] if artifacts is None else artifacts
+    rank_backend = rank_backend or RANK_BACKEND
+    final_backend, final_params = resolve_final_model('hitter', final_backend)
+    _check_backends(rank_backend, final_backend)
+
+    # 입력/설정이 같은 이전 결과가 있으면 재계산 생략
+    fingerprint = compute_fingerprint('hitter', [hitter_data_2025, hitter_data_his],
+                                      _fingerprint_params(n_features, rank_backend, final_backend, final_params))
+    cached = load_cached_result('hitter', fingerprint, artifacts, use_cache)
+    if cached is not None:
+        return cached
+
+    # 현재 데이터와 역대 데이터 합치기 (파생 지표는 아직 계산되지 않은 프레임만 계산)
+    all_hitter_data = pd.concat([add_hitter_features(hitter_data_his), add_hitter_features(hitter_data_2025)],
+                                ignore_index=True)
+    # 타수 등 분모가 0이라 OBP/SLG/OPS가 정의되지 않은 행 제외
+    all_hitter_data = drop_undefined_rates(all_hitter_data, HITTER_DERIVED_COLUMNS)
 
     # '순위', '선수명', '팀명' 컬럼을 제외한 나머지 컬럼을 실수형으로 변환
     columns_to_convert = all_hitter_data.columns.difference(['선수명', '팀명', '연도'])
@@ -91,39 +398,26 @@ def process_hitter_data(hitter_data_2025, hitter_data_his):
     # 실수형으로 변환
     all_hitter_data[columns_to_convert] = all_hitter_data[columns_to_convert].astype(float)
 
-    # OPS 계산
-    all_hitter_data['OBP'] = (all_hitter_data['H'] + all_hitter_data['RBI'] + all_hitter_data['SAC']) / (
-                all_hitter_data['AB'] + all_hitter_data['RBI'] + all_hitter_data['SAC'] + all_hitter_data['SF'])
-    all_hitter_data['SLG'] = all_hitter_data['TB'] / all_hitter_data['AB']
-    all_hitter_data['OPS'] = all_hitter_data['OBP'] + all_hitter_data['SLG']
-
     # 선수명, 순위, 팀명 열 제거
     X = all_hitter_data.drop(columns=['선수명', '팀명', '연도'])
 
-    # 데이터 표준화
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # PCA 수행
-    pca = PCA()
-    pca.fit(X_scaled)
-
-    # 주성분의 분산 비율
-    explained_variance = pca.explained_variance_ratio_
-    cumulative_variance = explained_variance.cumsum()
-
-    # 최적의 주성분 개수 판단 (90% 누적 분산 비율)
-    n = next(i for i, total in enumerate(cumulative_variance) if total >= 0.90) + 1
+    # 최적의 주성분 개수 판단 (90% 누적 분산 비율, 예측 전용 실행 시 저장된 값 재사용)
+    if n_features is None:
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        n_features = select_n_components(X_scaled)
+    n = n_features
+    artifacts['n_features'] = n
 
     # 데이터 프레임에서 종속 변수와 독립 변수 분리
     y = X['OPS']
     X = X.drop(columns=['OPS', 'SLG', 'OBP'])
 
     # 데이터 분할 (훈련 세트와 테스트 세트)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=SEEDS['split'])
 
-    # 랜덤 포레스트 모델 생성 및 훈련
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    # 변수 중요도 산출용 모델 생성 및 훈련
+    model = make_regressor(rank_backend, SEEDS['rank_model'])
     model.fit(X_train, y_train)
 
     # 변수 중요도 추출
@@ -148,7 +442,7 @@ def process_hitter_data(hitter_data_2025, hitter_data_his):
 
     # KMeans 클러스터링 수행
     for n_clusters in range_n_clusters:
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=SEEDS['k_sweep'])
         kmeans.fit(df_c)
 
         # inertia (Elbow method)
@@ -172,7 +466,7 @@ def process_hitter_data(hitter_data_2025, hitter_data_his):
     # 최적의 군집 개수를 변수 k에 저장
     k = optimal_k_combined
 
-    kmeans = KMeans(n_clusters=k, random_state=0, init='k-means++')
+    kmeans = KMeans(n_clusters=k, random_state=SEEDS['kmeans_final'], init='k-means++')
     clusters = kmeans.fit(df_c)
 
     # 클러스터링 결과 저장
@@ -185,17 +479,29 @@ def process_hitter_data(hitter_data_2025, hitter_data_his):
 
     X = df_r.drop(['OPS'], axis=1)
     y = df_r['OPS']
+    artifacts['design'] = (X, y)
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=SEEDS['split'])
 
     # 모델 정의
     models = {
-        'Random Forest Regression': RandomForestRegressor(n_estimators=100, random_state=42)
+        final_backend: make_regressor(final_backend, SEEDS['final_model'], final_params)
     }
 
     # 최적의 모델 학습
-    best_model = models['Random Forest Regression']
+    best_model = models[final_backend]
     best_model.fit(X_train, y_train)
+    artifacts['metrics'] = _holdout_metrics(best_model, X_test, y_test)
+
+    # 예측 전용 실행(모델 레지스트리)에 필요한 학습 결과 보관
+    artifacts.update({
+        'top_n_features': list(top_n_features),
+        'scaler': sc,
+        'kmeans': kmeans,
+        'model': best_model,
+        'final_backend': final_backend,
+        'final_params': final_params
+    })
 
     # 전체 데이터에 대한 예측
     X_full = df_r.drop(['OPS'], axis=1)
@@ -209,32 +515,34 @@ def process_hitter_data(hitter_data_2025, hitter_data_his):
 
     all_hitter_data['OPS_predict'] = predictions_df['Predicted OPS']
 
+    save_cached_result('hitter', fingerprint, all_hitter_data, artifacts, use_cache)
+
     return all_hitter_data
 
 
-def process_pitcher_data(pitcher_data_2025, pitcher_data_his):
-    """투수 데이터 처리"""
-    # 현재 데이터와 역대 데이터 합치기
-    all_pitcher_data = pd.concat([pitcher_data_his, pitcher_data_2025], ignore_index=True)
-
-    # 'IP' 컬럼을 실수형으로 변환하는 함수 정의
-    def convert_ip_to_float(ip_str):
-        if isinstance(ip_str, (int, float)):
-            return float(ip_str)
-        ip_str = str(ip_str).strip()
-        if ' ' in ip_str:
-            parts = ip_str.split(' ')
-            whole = float(parts[0])
-            numerator, denominator = map(float, parts[1].split('/'))
-            return whole + numerator / denominator
-        elif '/' in ip_str:
-            numerator, denominator = map(float, ip_str.split('/'))
-            return numerator / denominator
-        else:
-            return float(ip_str)
+def process_pitcher_data(pitcher_data_2025, pitcher_data_his, n_features=None, rank_backend=None, final_backend=None,
+                        use_cache=True, artifacts=None):
+    """투수 데이터 처리
+
+    use_cache: 결과 캐시 사용 여부, artifacts: 학습 산출물을 담을 dict (기본: 공유하는 model_artifacts['pitcher'])
+    """
+    artifacts = model_artifacts['pitcher'] if artifacts is None else artifacts
+    rank_backend = rank_backend or RANK_BACKEND
+    final_backend, final_params = resolve_final_model('pitcher', final_backend)
+    _check_backends(rank_backend, final_backend)
 
-    # 'IP' 컬럼 변환
-    all_pitcher_data['IP'] = all_pitcher_data['IP'].apply(convert_ip_to_float)
+    # 입력/설정이 같은 이전 결과가 있으면 재계산 생략
+    fingerprint = compute_fingerprint('pitcher', [pitcher_data_2025, pitcher_data_his],
+                                      _fingerprint_params(n_features, rank_backend, final_backend, final_params))
+    cached = load_cached_result('pitcher', fingerprint, artifacts, use_cache)
+    if cached is not None:
+        return cached
+
+    # 현재 데이터와 역대 데이터 합치기 (IP 변환 및 파생 지표는 아직 계산되지 않은 프레임만 처리)
+    all_pitcher_data = pd.concat([add_pitcher_features(pitcher_data_his), add_pitcher_features(pitcher_data_2025)],
+                                 ignore_index=True)
+    # 이닝이 0이라 WHIP가 정의되지 않은 행 제외
+    all_pitcher_data = drop_undefined_rates(all_pitcher_data, PITCHER_DERIVED_COLUMNS)
 
     # '순위', '선수명', '팀명' 컬럼을 제외한 나머지 컬럼을 실수형으로 변환
     columns_to_convert = all_pitcher_data.columns.difference(['선수명', '팀명', '연도'])
@@ -245,30 +553,23 @@ def process_pitcher_data(pitcher_data_2025, pitcher_data_his):
     # 선수명, 순위, 팀명 열 제거
     X = all_pitcher_data.drop(columns=['선수명', '팀명', '연도'])
 
-    # 데이터 표준화
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # PCA 수행
-    pca = PCA()
-    pca.fit(X_scaled)
-
-    # 주성분의 분산 비율
-    explained_variance = pca.explained_variance_ratio_
-    cumulative_variance = explained_variance.cumsum()
-
-    # 최적의 주성분 개수 판단 (90% 누적 분산 비율)
-    n = next(i for i, total in enumerate(cumulative_variance) if total >= 0.90) + 1
+    # 최적의 주성분 개수 판단 (90% 누적 분산 비율, 예측 전용 실행 시 저장된 값 재사용)
+    if n_features is None:
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        n_features = select_n_components(X_scaled)
+    n = n_features
+    artifacts['n_features'] = n
 
     # 데이터 프레임에서 종속 변수와 독립 변수 분리
     y = X['WHIP']
     X = X.drop(columns=['WHIP', 'H', 'BB', 'IP'])
 
     # 데이터 분할 (훈련 세트와 테스트 세트)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=SEEDS['split'])
 
-    # 랜덤 포레스트 모델 생성 및 훈련
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    # 변수 중요도 산출용 모델 생성 및 훈련
+    model = make_regressor(rank_backend, SEEDS['rank_model'])
     model.fit(X_train, y_train)
 
     # 변수 중요도 추출
@@ -293,7 +594,7 @@ def process_pitcher_data(pitcher_data_2025, pitcher_data_his):
 
     # KMeans 클러스터링 수행
     for n_clusters in range_n_clusters:
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=SEEDS['k_sweep'])
         kmeans.fit(df_c)
 
         # inertia (Elbow method)
@@ -317,7 +618,7 @@ def process_pitcher_data(pitcher_data_2025, pitcher_data_his):
     # 최적의 군집 개수를 변수 k에 저장
     k = optimal_k_combined
 
-    kmeans = KMeans(n_clusters=k, random_state=0, init='k-means++')
+    kmeans = KMeans(n_clusters=k, random_state=SEEDS['kmeans_final'], init='k-means++')
     clusters = kmeans.fit(df_c)
 
     # 클러스터링 결과 저장
@@ -330,17 +631,29 @@ def process_pitcher_data(pitcher_data_2025, pitcher_data_his):
 
     X = df_r.drop(['WHIP'], axis=1)
     y = df_r['WHIP']
+    artifacts['design'] = (X, y)
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=SEEDS['split'])
 
     # 모델 정의
     models = {
-        'Random Forest Regression': RandomForestRegressor(n_estimators=100, random_state=42)
+        final_backend: make_regressor(final_backend, SEEDS['final_model'], final_params)
     }
 
     # 최적의 모델 학습
-    best_model = models['Random Forest Regression']
+    best_model = models[final_backend]
     best_model.fit(X_train, y_train)
+    artifacts['metrics'] = _holdout_metrics(best_model, X_test, y_test)
+
+    # 예측 전용 실행(모델 레지스트리)에 필요한 학습 결과 보관
+    artifacts.update({
+        'top_n_features': list(top_n_features),
+        'scaler': sc,
+        'kmeans': kmeans,
+        'model': best_model,
+        'final_backend': final_backend,
+        'final_params': final_params
+    })
 
     # 전체 데이터에 대한 예측
     X_full = df_r.drop(['WHIP'], axis=1)
@@ -354,4 +667,207 @@ def process_pitcher_data(pitcher_data_2025, pitcher_data_his):
 
     all_pitcher_data['WHIP_predict'] = predictions_df['Predicted WHIP']
 
+    save_cached_result('pitcher', fingerprint, all_pitcher_data, artifacts, use_cache)
+
     return all_pitcher_data
+
+
+def benchmark_backends(kind='hitter', configs=None, repeat=1):
+    """학습 백엔드 조합별 처리 시간과 예측 성능(R², MAE) 비교 (결과 캐시를 쓰지 않고 매번 학습)
+
+    캐시 설정과 공유 산출물(model_artifacts)은 바꾸지 않으므로 갱신과 동시에 실행해도 안전
+    """
+    from crawler import load_historical_data
+
+    if configs is None:
+        configs = [
+            ('rf', 'rf'),
+            ('rf_early', 'rf_early'),
+            ('lgbm', 'hgb'),
+            ('lgbm', 'lgbm'),
+        ]
+
+    hitter_his, pitcher_his = load_historical_data()
+    history = hitter_his if kind == 'hitter' else pitcher_his
+    latest = history['연도'].max()
+    current, past = history[history['연도'] == latest], history[history['연도'] != latest]
+    process = process_hitter_data if kind == 'hitter' else process_pitcher_data
+
+    # 캐시를 쓰면 두 번째 반복부터 캐시 로드 시간을 재게 됨
+    results = []
+    for rank_backend, final_backend in configs:
+        elapsed = []
+        artifacts = {}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process(current, past, rank_backend=rank_backend, final_backend=final_backend, use_cache=False,
+                    artifacts=artifacts)
+            elapsed.append(time.perf_counter() - start)
+        results.append({
+            'rank_backend': rank_backend,
+            'final_backend': final_backend,
+            'seconds': min(elapsed),
+            **artifacts['metrics']
+        })
+
+    return pd.DataFrame(results)
+
+
+# 대용량 모드 설정: 배치 순회 시 유지하는 표본 크기
+OUT_OF_CORE_SAMPLE_SIZE = int(os.getenv('KBO_OOC_SAMPLE_SIZE', 20000))
+
+# 종류별 목표 변수, 파생 지표(정의되지 않은 행 제외), 모델 입력에서 뺄 컬럼
+OUT_OF_CORE_SPECS = {
+    'hitter': {
+        'target': 'OPS',
+        'derived': HITTER_DERIVED_COLUMNS,
+        'model_exclude': HITTER_DERIVED_COLUMNS,
+    },
+    'pitcher': {
+        'target': 'WHIP',
+        'derived': PITCHER_DERIVED_COLUMNS,
+        'model_exclude': ['WHIP', 'H', 'BB', 'IP'],
+    },
+}
+
+
+def select_n_clusters(df_c):
+    """Elbow와 실루엣 계수를 함께 사용한 군집 개수 선택 (process_*_data와 같은 기준)"""
+    inertia = []
+    silhouette_scores = []
+    for n_clusters in range(2, 11):
+        kmeans = KMeans(n_clusters=n_clusters, random_state=SEEDS['k_sweep'])
+        kmeans.fit(df_c)
+        inertia.append(kmeans.inertia_)
+        silhouette_scores.append(silhouette_score(df_c, kmeans.labels_))
+
+    average_scores = [(inertia[i] + silhouette_scores[i - 1]) / 2 for i in range(1, len(inertia))]
+    return average_scores.index(min(average_scores)) + 2
+
+
+def _numeric_frame(batch, exclude):
+    return batch.drop(columns=['선수명', '팀명', '연도'] + [c for c in exclude if c in batch.columns]).astype(float)
+
+
+def _update_sample(sample, keys, batch, rng, sample_size):
+    """무작위 키 상위 sample_size개를 유지하는 균등 표본 (배치 크기와 표본 크기로 메모리 제한)"""
+    batch_keys = rng.random(len(batch))
+    if sample is None:
+        sample, keys = batch, batch_keys
+    else:
+        sample = pd.concat([sample, batch], ignore_index=True)
+        keys = np.concatenate([keys, batch_keys])
+
+    if len(sample) > sample_size:
+        keep = np.argpartition(keys, sample_size)[:sample_size]
+        sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+    return sample, keys
+
+
+def process_out_of_core(kind, batch_factory, keep_seasons=None, sample_size=None, rank_backend=None,
+                        final_backend=None, random_state=42):
+    """배치 제너레이터 기반 대용량 처리 (partial_fit 표준화, MiniBatchKMeans, 표본 학습 회귀 모델)
+
+    batch_factory: 호출할 때마다 처리 전 기록 배치(파생 지표 포함)를 처음부터 순회하는 제너레이터를 반환
+    keep_seasons: 예측 결과를 반환할 시즌 목록 (None이면 전체, 메모리는 반환 행 수에 비례)
+    random_state: 표본 추출 난수 시드 (모델/분할 시드는 process_*_data와 같은 SEEDS 사용)
+
+    전체 행이 sample_size 이하이면 process_*_data와 같은 방법(전체 표준화, KMeans, 같은 행 순서의 분할)으로
+    학습하므로 배치 순서가 process_*_data의 입력 순서(역대 -> 해당 시즌)와 같으면 결과도 같음
+    """
+    spec = OUT_OF_CORE_SPECS[kind]
+    target = spec['target']
+    sample_size = sample_size or OUT_OF_CORE_SAMPLE_SIZE
+    rank_backend = rank_backend or RANK_BACKEND
+    final_backend, final_params = resolve_final_model(kind, final_backend)
+    _check_backends(rank_backend, final_backend)
+    rng = np.random.default_rng(random_state)
+
+    def defined_batches():
+        # 분모가 0이라 파생 지표가 정의되지 않은 행은 모든 순회에서 제외
+        for raw_batch in batch_factory():
+            raw_batch = drop_undefined_rates(raw_batch, spec['derived'])
+            if len(raw_batch):
+                yield raw_batch
+
+    # 1차 순회: 주성분 판단용 공분산 누적 + 균등 표본 추출 (표본 크기 이하면 배치 순서 그대로 전체 보관)
+    count, total, cross = 0, None, None
+    sample, keys = None, None
+    for batch in defined_batches():
+        X = _numeric_frame(batch, []).to_numpy()
+        count += len(X)
+        total = X.sum(axis=0) if total is None else total + X.sum(axis=0)
+        cross = X.T @ X if cross is None else cross + X.T @ X
+        sample, keys = _update_sample(sample, keys, batch, rng, sample_size)
+
+    if not count:
+        raise ValueError("입력 데이터가 비어있습니다.")
+    in_memory = count <= sample_size
+
+    if in_memory:
+        n = select_n_components(StandardScaler().fit_transform(_numeric_frame(sample, [])))
+    else:
+        # 표준화 데이터의 그람 행렬 = 상관 행렬 (분산 0인 컬럼은 0으로 처리)
+        mean = total / count
+        covariance = cross / count - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        scale = np.divide(1.0, std, out=np.zeros_like(std), where=std > 0)
+        correlation = covariance * np.outer(scale, scale)
+        singular_sq = np.clip(np.linalg.eigvalsh(correlation)[::-1], 0, None)
+        cumulative_variance = np.cumsum(singular_sq) / singular_sq.sum()
+        n = int(np.argmax(cumulative_variance >= PCA_THRESHOLD - 1e-12)) + 1
+
+    # 표본의 훈련 세트로 변수 중요도 산출 후 상위 n개 선택
+    X_sample = _numeric_frame(sample, spec['model_exclude'])
+    y_sample = sample[target].astype(float)
+    X_train, _, y_train, _ = train_test_split(X_sample, y_sample, test_size=TEST_SIZE, random_state=SEEDS['split'])
+    model = make_regressor(rank_backend, SEEDS['rank_model'])
+    model.fit(X_train, y_train)
+    top_n_features = X_sample.columns[np.argsort(model.feature_importances_)[::-1]][:n]
+
+    # 2차 순회: 선택된 변수 표준화 (전체가 표본에 있으면 한 번에 학습)
+    sc = StandardScaler()
+    if in_memory:
+        sc.fit(X_sample[top_n_features])
+    else:
+        for batch in defined_batches():
+            sc.partial_fit(batch[top_n_features].astype(float))
+
+    # 군집 개수는 표본으로 결정하고, 전체가 표본에 있으면 KMeans, 아니면 3차 순회에서 MiniBatchKMeans로 학습
+    sample_scaled = pd.DataFrame(sc.transform(X_sample[top_n_features]), columns=top_n_features)
+    k = select_n_clusters(sample_scaled)
+    if in_memory:
+        kmeans = KMeans(n_clusters=k, random_state=SEEDS['kmeans_final'], init='k-means++').fit(sample_scaled)
+    else:
+        kmeans = MiniBatchKMeans(n_clusters=k, random_state=SEEDS['kmeans_final'], n_init=3)
+        for batch in defined_batches():
+            scaled = pd.DataFrame(sc.transform(batch[top_n_features].astype(float)), columns=top_n_features)
+            if len(scaled) >= k:
+                kmeans.partial_fit(scaled)
+
+    # 최종 회귀 모델은 표본(표준화 변수 + 군집)으로 학습
+    sample_scaled['cluster'] = kmeans.predict(sample_scaled[top_n_features])
+    X_train, X_test, y_train, y_test = train_test_split(sample_scaled, y_sample, test_size=TEST_SIZE,
+                                                        random_state=SEEDS['split'])
+    best_model = make_regressor(final_backend, SEEDS['final_model'], final_params)
+    best_model.fit(X_train, y_train)
+    model_artifacts[kind].update({
+        'n_features': n,
+        'metrics': _holdout_metrics(best_model, X_test, y_test),
+        'out_of_core_rows': count
+    })
+
+    # 4차 순회: 배치별 예측, 필요한 시즌 행만 보관
+    results = []
+    for batch in defined_batches():
+        if keep_seasons is not None:
+            batch = batch[batch['연도'].isin(keep_seasons)]
+            if batch.empty:
+                continue
+        scaled = pd.DataFrame(sc.transform(batch[top_n_features].astype(float)), columns=top_n_features)
+        scaled['cluster'] = kmeans.predict(scaled[top_n_features])
+        batch = batch.copy()
+        batch[f'{target}_predict'] = best_model.predict(scaled)
+        results.append(batch)
+
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
@@ -1,2 +1,69 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
 db = SQLAlchemy()
+
+
+def build_engine_options(database_uri):
+    """DB URI에 맞는 SQLAlchemy 엔진 옵션 생성 (환경 변수로 조정 가능)"""
+    # 끊긴 커넥션을 사용 전에 확인 (RDS 유휴 연결 대비)
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+    # SQLite 메모리 DB는 SingletonThreadPool을 사용하므로 풀 크기 옵션을 지원하지 않음
+    if database_uri.startswith('sqlite'):
+        return options
+
+    options.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        # MySQL wait_timeout(기본 28800초)보다 짧게 재활용
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    })
+
+    if database_uri.startswith('mysql'):
+        options['connect_args'] = {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 10)),
+        }
+
+    return options
+
+
+def warm_up_pool(size=None):
+    """워커 부팅 시 커넥션을 미리 열어 첫 요청의 재연결 비용 제거 (앱 컨텍스트 필요)"""
+    engine = db.engine
+    if size is None:
+        size = int(os.getenv('DB_POOL_WARMUP', 1))
+
+    connections = []
+    try:
+        for _ in range(max(size, 0)):
+            conn = engine.connect()
+            conn.execute(text('SELECT 1'))
+            connections.append(conn)
+    finally:
+        # 풀에 반환하여 재사용
+        for conn in connections:
+            conn.close()
+
+    return len(connections)
+
+
+def get_pool_stats():
+    """커넥션 풀 상태 조회 (모니터링용, 앱 컨텍스트 필요)"""
+    pool = db.engine.pool
+    stats = {
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+    }
+
+    # QueuePool 계열만 제공하는 지표
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+
+    return stats
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import data_processor
+import model_registry
+from model_registry import KIND_SPECS, get_serving_model, process_with_registry
+
+# 직전 크롤링 결과 저장 위치 (다음 갱신 때 행 단위 비교)
+DELTA_DIR = os.getenv('KBO_DELTA_DIR', os.path.join('data', 'delta'))
+KEY_COLUMNS = ['선수명', '팀명']
+
+
+class CrawlDelta:
+    """직전 크롤링 대비 추가/변경/삭제된 선수 행 (키: 선수명 + 팀명)"""
+
+    def __init__(self, inserted, updated, deleted):
+        # inserted/updated: 새 크롤링 행 위치, deleted/updated의 이전 행: 직전 크롤링 행 위치
+        self.inserted = inserted
+        self.updated = updated
+        self.deleted = deleted
+
+    @property
+    def is_empty(self):
+        return not (self.inserted or self.updated or self.deleted)
+
+    def summary(self):
+        return {'inserted': len(self.inserted), 'updated': len(self.updated), 'deleted': len(self.deleted)}
+
+
+def row_hashes(df):
+    """선수 행별 기록 해시 (키 컬럼 제외). 반환: {(선수명, 팀명): (행 위치, 해시)}"""
+    stat_columns = [c for c in df.columns if c not in KEY_COLUMNS]
+    hashes = pd.util.hash_pandas_object(df[stat_columns].astype(str), index=False).to_numpy()
+    return {key: (pos, int(h)) for pos, (key, h) in enumerate(zip(zip(df['선수명'], df['팀명']), hashes))}
+
+
+def diff_crawl(previous, current):
+    """두 크롤링 결과 비교. 키가 중복되거나 컬럼이 다르면 None (전체 재처리)"""
+    if list(previous.columns) != list(current.columns):
+        return None
+    if previous.duplicated(KEY_COLUMNS).any() or current.duplicated(KEY_COLUMNS).any():
+        return None
+
+    old, new = row_hashes(previous), row_hashes(current)
+    inserted = [pos for key, (pos, _) in new.items() if key not in old]
+    updated = [(old[key][0], pos) for key, (pos, h) in new.items() if key in old and old[key][1] != h]
+    deleted = [pos for key, (pos, _) in old.items() if key not in new]
+    return CrawlDelta(inserted, updated, deleted)
+
+
+def frame_hash(df):
+    digest = hashlib.sha1(','.join(map(str, df.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _snapshot_paths(kind):
+    return os.path.join(DELTA_DIR, f"{kind}.parquet"), os.path.join(DELTA_DIR, f"{kind}.json")
+
+
+def save_crawl_snapshot(kind, crawl, snapshot_id):
+    """이번 크롤링 결과와 그 결과로 만든 처리 결과 식별자 저장 (임시 파일 후 교체)"""
+    os.makedirs(DELTA_DIR, exist_ok=True)
+    data_path, meta_path = _snapshot_paths(kind)
+    crawl.reset_index(drop=True).to_parquet(f"{data_path}.tmp", index=False)
+    os.replace(f"{data_path}.tmp", data_path)
+    with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'snapshot_id': snapshot_id, 'rows': len(crawl)}, f)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def load_crawl_snapshot(kind):
+    """직전 크롤링 결과와 처리 결과 식별자. 없으면 (None, None)"""
+    data_path, meta_path = _snapshot_paths(kind)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    return pd.read_parquet(data_path), meta['snapshot_id']
+
+
+def _prepare(kind, df):
+    """ServingModel.process와 같은 파생 지표/형 변환"""
+    data = KIND_SPECS[kind]['add_features'](df).reset_index(drop=True)
+    columns_to_convert = data.columns.difference(['선수명', '팀명', '연도'])
+    data[columns_to_convert] = data[columns_to_convert].astype(float)
+    return data
+
+
+def rows_aligned(previous, previous_crawl, history):
+    """직전 처리 결과가 역대 행 + 직전 크롤링 행을 순서대로 빠짐없이 담고 있는지 (행 위치로 예측값을 재사용하기 위한 조건)"""
+    if len(previous) != len(history) + len(previous_crawl):
+        return False
+    tail = previous.iloc[len(history):]
+    return (tail['선수명'].tolist() == previous_crawl['선수명'].tolist() and
+            tail['팀명'].tolist() == previous_crawl['팀명'].tolist())
+
+
+def apply_prediction_delta(kind, previous, previous_crawl, current, delta, serving):
+    """바뀐 행만 예측하여 새 처리 결과 생성 (역대 부분과 변경 없는 선수의 예측값은 재사용)"""
+    output = KIND_SPECS[kind]['output']
+    n_history = len(previous) - len(previous_crawl)
+    previous_tail = previous.iloc[n_history:].reset_index(drop=True)
+
+    new_part = _prepare(kind, current)
+    # 변경 없는 선수는 직전 예측값 사용
+    old_positions = {key: pos for pos, key in enumerate(zip(previous_crawl['선수명'], previous_crawl['팀명']))}
+    predictions = np.array([previous_tail[output].iat[old_positions[key]] if key in old_positions else np.nan
+                            for key in zip(new_part['선수명'], new_part['팀명'])], dtype=float)
+
+    changed = sorted(delta.inserted + [new_pos for _, new_pos in delta.updated])
+    if changed:
+        predictions[changed] = serving.predict(new_part.iloc[changed])
+    new_part[output] = predictions
+
+    result = pd.concat([previous.iloc[:n_history], new_part], ignore_index=True)
+    result.attrs = {}
+    removed = sorted(delta.deleted + [old_pos for old_pos, _ in delta.updated])
+    result.attrs['delta'] = {
+        'base': previous.attrs.get('snapshot_id'),
+        'removed': [n_history + pos for pos in removed],
+        'added': [n_history + pos for pos in changed],
+        **delta.summary()
+    }
+    return result
+
+
+def process_incremental(kind, current, history, previous=None):
+    """직전 크롤링 대비 바뀐 선수만 예측 (모델 레지스트리 serve 모드에서 같은 모델 버전일 때만, 아니면 전체 처리)"""
+    history_hash = frame_hash(history)
+    serving = get_serving_model(kind) if model_registry.REGISTRY_MODE == 'serve' else None
+
+    result = None
+    if serving is not None and previous is not None:
+        previous_crawl, snapshot_id = load_crawl_snapshot(kind)
+        usable = (previous_crawl is not None and
+                  snapshot_id == previous.attrs.get('snapshot_id') and
+                  previous.attrs.get('model_version') == serving.version and
+                  previous.attrs.get('history_hash') == history_hash and
+                  rows_aligned(previous, previous_crawl, history))
+        delta = diff_crawl(previous_crawl, current) if usable else None
+        if delta is not None:
+            result = apply_prediction_delta(kind, previous, previous_crawl, current, delta, serving)
+            result.attrs['model_version'] = serving.version
+            print(f"🧮 {kind} 변경 행만 처리: {delta.summary()}")
+
+    if result is None:
+        result = process_with_registry(kind, current, history)
+
+    result.attrs.update({'snapshot_id': uuid.uuid4().hex, 'history_hash': history_hash})
+    save_crawl_snapshot(kind, current, result.attrs['snapshot_id'])
+    return result
+
+
+def process_incremental_task(kind, current, history, previous=None):
+    """process_incremental을 전용 자식 프로세스(cpu 스테이지)에서 실행. 반환: (처리 결과, 학습 산출물)
+
+    자식 프로세스의 전역 상태는 부모에 남지 않으므로 학습 산출물은 반환값으로 넘기고,
+    부모는 갱신이 성공했을 때만 반영함 (시간 초과로 종료된 처리는 부모 상태를 바꾸지 않음)
+    """
+    result = process_incremental(kind, current, history, previous=previous)
+    return result, dict(data_processor.model_artifacts[kind])
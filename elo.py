@@ -0,0 +1,218 @@
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Elo 레이팅 설정
+ELO_K = float(os.getenv('KBO_ELO_K', 20))
+ELO_HOME_ADVANTAGE = float(os.getenv('KBO_ELO_HOME', 24))
+ELO_INITIAL = 1500.0
+# 시즌이 바뀌면 평균 쪽으로 되돌리는 비율 (이전 시즌 레이팅 반영 비율)
+ELO_CARRYOVER = float(os.getenv('KBO_ELO_CARRYOVER', 0.75))
+ELO_CHECKPOINT = os.getenv('KBO_ELO_CHECKPOINT', os.path.join('data', 'elo', 'checkpoint.json'))
+# 경기 결과 파일 (date, away, home, away_score, home_score). 없으면 KBO 일정 페이지 크롤링
+GAMES_FILE = os.getenv('KBO_GAMES_FILE')
+
+GAME_COLUMNS = ['date', 'away', 'home', 'away_score', 'home_score']
+
+
+def game_key(game):
+    return f"{game['date']:%Y-%m-%d}|{game['away']}|{game['home']}|{game['away_score']}|{game['home_score']}"
+
+
+class EloRatings:
+    """경기 결과로 팀 레이팅을 갱신하는 Elo 엔진 (경기당 O(1) 갱신)"""
+
+    def __init__(self, ratings=None, season=None, last_date=None, last_date_games=None, games_processed=0):
+        self.ratings = dict(ratings or {})
+        self.season = season
+        self.last_date = last_date
+        # 마지막 날짜에 이미 반영한 경기 (같은 날 경기를 다시 받아도 중복 반영하지 않음)
+        self.last_date_games = set(last_date_games or [])
+        self.games_processed = games_processed
+
+    def rating(self, team):
+        return self.ratings.get(team, ELO_INITIAL)
+
+    @staticmethod
+    def expected(rating_a, rating_b):
+        """a가 b를 이길 기대 확률"""
+        return 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / 400.0))
+
+    def start_season(self, season):
+        """새 시즌 시작 시 레이팅을 평균 쪽으로 되돌림"""
+        if self.season is not None and season != self.season and self.ratings:
+            mean = np.mean(list(self.ratings.values()))
+            self.ratings = {team: mean + ELO_CARRYOVER * (r - mean) for team, r in self.ratings.items()}
+        self.season = season
+
+    def _is_new(self, game):
+        if self.last_date is None or game['date'] > self.last_date:
+            return True
+        return game['date'] == self.last_date and game_key(game) not in self.last_date_games
+
+    def _mark(self, game):
+        if self.last_date is None or game['date'] > self.last_date:
+            self.last_date = game['date']
+            self.last_date_games = set()
+        self.last_date_games.add(game_key(game))
+        self.games_processed += 1
+
+    def update(self, game):
+        """경기 1개 반영 (무승부는 0.5)"""
+        if not self._is_new(game):
+            return False
+        self.start_season(game['date'].year)
+
+        home, away = game['home'], game['away']
+        expected_home = self.expected(self.rating(home) + ELO_HOME_ADVANTAGE, self.rating(away))
+        result = 0.5 if game['home_score'] == game['away_score'] else float(game['home_score'] > game['away_score'])
+        delta = ELO_K * (result - expected_home)
+        self.ratings[home] = self.rating(home) + delta
+        self.ratings[away] = self.rating(away) - delta
+        self._mark(game)
+        return True
+
+    def replay(self, games):
+        """여러 경기를 날짜순으로 일괄 반영. 팀이 겹치지 않는 경기 묶음은 한 번의 벡터 연산으로 갱신
+
+        한 팀은 묶음 안에서 한 번만 나오므로 경기를 하나씩 반영한 결과와 같음
+        """
+        games = normalize_games(games)
+        if self.last_date is not None:
+            games = games[[self._is_new(g) for g in games.to_dict('records')]] \
+                if (games['date'] == self.last_date).any() else games[games['date'] > self.last_date]
+        if games.empty:
+            return 0
+
+        for season, season_games in games.groupby(games['date'].dt.year, sort=True):
+            self.start_season(int(season))
+            teams = sorted(set(self.ratings) | set(season_games['home']) | set(season_games['away']))
+            index = {team: i for i, team in enumerate(teams)}
+            ratings = np.array([self.rating(team) for team in teams])
+
+            home = season_games['home'].map(index).to_numpy()
+            away = season_games['away'].map(index).to_numpy()
+            home_score = season_games['home_score'].to_numpy(dtype=float)
+            away_score = season_games['away_score'].to_numpy(dtype=float)
+            result = np.where(home_score == away_score, 0.5, (home_score > away_score).astype(float))
+
+            for start, stop in _conflict_free_batches(home, away):
+                h, a = home[start:stop], away[start:stop]
+                expected_home = self.expected(ratings[h] + ELO_HOME_ADVANTAGE, ratings[a])
+                delta = ELO_K * (result[start:stop] - expected_home)
+                ratings[h] += delta
+                ratings[a] -= delta
+
+            self.ratings = {team: float(r) for team, r in zip(teams, ratings)}
+
+        # 마지막 날짜의 경기 키만 보관 (그 이전 날짜는 날짜 비교로 걸러짐)
+        last_date = games['date'].iloc[-1]
+        last_games = {game_key(g) for g in games[games['date'] == last_date].to_dict('records')}
+        self.last_date_games = (self.last_date_games | last_games) if last_date == self.last_date else last_games
+        self.last_date = last_date
+        self.games_processed += len(games)
+        return len(games)
+
+    def win_probability_matrix(self, teams=None):
+        """중립 구장 기준 팀 간 승률(%) 매트릭스 (팀 점수 모델과 같은 형식, 대각선은 '-')"""
+        teams = sorted(teams or self.ratings)
+        ratings = np.array([self.rating(team) for team in teams])
+        probabilities = np.round(self.expected(ratings[:, None], ratings[None, :]) * 100, 2)
+
+        values = probabilities.astype(object)
+        np.fill_diagonal(values, '-')
+        return pd.DataFrame(values, index=teams, columns=teams)
+
+    def to_dict(self):
+        return {
+            'ratings': self.ratings,
+            'season': self.season,
+            'last_date': self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            'last_date_games': sorted(self.last_date_games),
+            'games_processed': self.games_processed
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        last_date = payload.get('last_date')
+        return cls(payload['ratings'], payload.get('season'),
+                   pd.Timestamp(last_date) if last_date else None,
+                   payload.get('last_date_games'), payload.get('games_processed', 0))
+
+
+def _conflict_free_batches(home, away):
+    """날짜순 경기를 (시작, 끝) 구간으로 나누되, 한 구간 안에 같은 팀이 두 번 나오지 않도록 함 (더블헤더 등)"""
+    start, teams = 0, set()
+    for pos, (h, a) in enumerate(zip(home.tolist(), away.tolist())):
+        if h in teams or a in teams:
+            yield start, pos
+            start, teams = pos, set()
+        teams.update((h, a))
+    if start < len(home):
+        yield start, len(home)
+
+
+def normalize_games(games):
+    """경기 결과 정리 (점수 없는 경기 제외, 날짜순 정렬)"""
+    games = pd.DataFrame(games)
+    missing = set(GAME_COLUMNS) - set(games.columns)
+    if missing:
+        raise ValueError(f"경기 결과 컬럼이 없습니다: {', '.join(sorted(missing))}")
+
+    games = games[GAME_COLUMNS].copy()
+    games['date'] = pd.to_datetime(games['date']).dt.normalize()
+    games[['away_score', 'home_score']] = games[['away_score', 'home_score']].apply(pd.to_numeric, errors='coerce')
+    games = games.dropna(subset=['away_score', 'home_score'])
+    return games.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def load_checkpoint(path=None):
+    """저장된 레이팅 (없으면 빈 엔진). 재시작 시 과거 경기를 다시 반영하지 않음"""
+    path = path or ELO_CHECKPOINT
+    if not os.path.exists(path):
+        return EloRatings()
+    with open(path, encoding='utf-8') as f:
+        return EloRatings.from_dict(json.load(f))
+
+
+def save_checkpoint(ratings, path=None):
+    path = path or ELO_CHECKPOINT
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(ratings.to_dict(), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_games(since=None):
+    """경기 결과 로드: KBO_GAMES_FILE이 있으면 파일, 없으면 마지막 반영 월부터 이번 달까지 크롤링"""
+    if GAMES_FILE:
+        return normalize_games(pd.read_csv(GAMES_FILE))
+
+    from crawler import crawl_game_results, current_season
+
+    season = current_season()
+    today = datetime.date.today()
+    first_month = since.month if since is not None and since.year == season else 3
+    last_month = today.month if today.year == season else 11
+    frames = [crawl_game_results(season, month) for month in range(first_month, last_month + 1)]
+    frames = [f for f in frames if not f.empty]
+    return normalize_games(pd.concat(frames, ignore_index=True)) if frames else normalize_games(
+        pd.DataFrame(columns=GAME_COLUMNS))
+
+
+def refresh_elo(cached_data=None, games=None):
+    """체크포인트 이후 경기만 반영하고 승률 매트릭스 갱신. 반환: 반영한 경기 수"""
+    ratings = load_checkpoint()
+    games = load_games(ratings.last_date) if games is None else games
+    applied = ratings.replay(games)
+    if applied:
+        save_checkpoint(ratings)
+
+    if cached_data is not None and ratings.ratings:
+        cached_data['elo_win_probability_df'] = ratings.win_probability_matrix()
+        cached_data['elo_last_date'] = ratings.last_date
+    return applied
@@ -0,0 +1,77 @@
+import numpy as np
+
+# 원본 기록에서 파생되는 비율 지표 컬럼 (분모가 0인 행은 NaN)
+HITTER_DERIVED_COLUMNS = ['OBP', 'SLG', 'OPS']
+PITCHER_DERIVED_COLUMNS = ['WHIP']
+
+
+def convert_ip_to_float(ip_str):
+    """'IP' 값을 실수형으로 변환 (예: '20 1/3' -> 20.333)"""
+    if isinstance(ip_str, (int, float)):
+        return float(ip_str)
+    ip_str = str(ip_str).strip()
+    if ' ' in ip_str:
+        parts = ip_str.split(' ')
+        whole = float(parts[0])
+        numerator, denominator = map(float, parts[1].split('/'))
+        return whole + numerator / denominator
+    elif '/' in ip_str:
+        numerator, denominator = map(float, ip_str.split('/'))
+        return numerator / denominator
+    else:
+        return float(ip_str)
+
+
+def _safe_ratio(numerator, denominator):
+    """분모가 0인 행은 NaN으로 마스킹한 비율 계산 (inf 방지, 학습 전에 해당 행 제외)"""
+    out = np.full_like(numerator, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def drop_undefined_rates(df, columns):
+    """분모가 0이라 비율 지표가 정의되지 않은 행 제외 (StandardScaler/KMeans 입력 보호)"""
+    defined = df[columns].notna().all(axis=1)
+    return df if defined.all() else df[defined].reset_index(drop=True)
+
+
+def add_hitter_features(df):
+    """타자 파생 지표(OBP, SLG, OPS) 계산. 이미 계산된 프레임은 그대로 반환"""
+    if df.empty or all(c in df.columns for c in HITTER_DERIVED_COLUMNS):
+        return df
+
+    df = df.copy()
+    h, rbi, sac, ab, sf, tb = df[['H', 'RBI', 'SAC', 'AB', 'SF', 'TB']].to_numpy(dtype=float).T
+
+    # OBP = (H + RBI + SAC) / (AB + RBI + SAC + SF)
+    on_base = h + rbi
+    on_base += sac
+    plate = ab + rbi
+    plate += sac
+    plate += sf
+    obp = _safe_ratio(on_base, plate)
+
+    # SLG = TB / AB
+    slg = _safe_ratio(tb, ab)
+
+    df['OBP'] = obp
+    df['SLG'] = slg
+    df['OPS'] = obp + slg
+
+    return df
+
+
+def add_pitcher_features(df):
+    """투수 IP 실수 변환 및 파생 지표(WHIP) 계산. 이미 변환된 프레임(IP가 실수형)은 그대로 반환"""
+    if df.empty or (df['IP'].dtype.kind == 'f' and 'WHIP' in df.columns):
+        return df
+
+    df = df.copy()
+    df['IP'] = df['IP'].apply(convert_ip_to_float)
+    ip, h, bb = df[['IP', 'H', 'BB']].to_numpy(dtype=float).T
+
+    # WHIP = (H + BB) / IP, KBO 공식 기록과 같은 소수 둘째 자리 (예측 목표 변수)
+    walks_hits = h + bb
+    df['WHIP'] = np.round(_safe_ratio(walks_hits, ip), 2)
+
+    return df
@@ -0,0 +1,175 @@
+import copy
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+
+# 병렬(n_jobs != 1) sklearn 예측과 비교할 때의 허용 오차 (트리 합산 순서 차이로 마지막 자리만 다름)
+PARALLEL_RTOL = 1e-12
+
+
+class FlatForest:
+    """RandomForestRegressor의 트리를 노드 배열로 펼친 예측기 (sklearn 호출 오버헤드 없이 NumPy로 순회)
+
+    모든 트리의 노드를 하나의 배열에 이어 붙이고, 리프는 자기 자신을 가리키게 하여
+    최대 깊이만큼 (행 x 트리) 노드 배열을 한 번에 전진시킴
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.feature_names = feature_names
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """학습된 랜덤 포레스트(또는 forest_ 속성이 있는 래퍼)를 노드 배열로 변환"""
+        forest = getattr(forest, 'forest_', forest)
+        if not isinstance(forest, RandomForestRegressor) or forest.n_outputs_ != 1:
+            raise ValueError("단일 출력 RandomForestRegressor만 변환할 수 있습니다.")
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int64) + offset
+            is_leaf = tree.children_left == -1
+
+            # 리프는 자기 자신을 자식으로 두어 순회 횟수를 트리마다 맞출 필요가 없게 함
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            missing.append(np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(n_nodes)), dtype=bool))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(missing), np.concatenate(values),
+                   np.array(roots, dtype=np.int64), max_depth,
+                   list(getattr(forest, 'feature_names_in_', [])) or None)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _as_array(self, X):
+        if hasattr(X, 'columns') and self.feature_names is not None:
+            X = X[self.feature_names]
+        # sklearn 트리와 같이 float32로 비교
+        return np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+
+    def predict(self, X):
+        """트리별 리프 값을 트리 순서대로 더한 뒤 트리 수로 나눔
+
+        n_jobs=1인 sklearn과 연산 순서가 같아 비트 단위로 일치. 병렬 예측은 스레드 완료 순서대로 더하므로
+        PARALLEL_RTOL 이내로만 일치
+        """
+        X = self._as_array(X)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        leaf_values = self.value[node]
+        out = np.zeros(len(X))
+        for t in range(self.n_trees):
+            out += leaf_values[:, t]
+        out /= self.n_trees
+        return out
+
+    def predict_batch(self, requests):
+        """작은 요청 여러 개를 한 번의 순회로 예측. 반환: 요청별 예측 배열 목록"""
+        arrays = [np.atleast_2d(self._as_array(X)) for X in requests]
+        if not arrays:
+            return []
+        predictions = self.predict(np.concatenate(arrays, axis=0))
+        return np.split(predictions, np.cumsum([len(a) for a in arrays])[:-1])
+
+    ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots')
+
+    def save(self, directory):
+        """노드 배열을 디렉터리에 배열별 .npy로 저장 (npz는 메모리 매핑되지 않으므로 사용하지 않음)"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'max_depth': int(self.max_depth), 'feature_names': self.feature_names}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """저장된 노드 배열 로드 (기본은 읽기 전용 메모리 매핑: 워커들이 페이지 캐시를 공유하고 복사하지 않음)"""
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in cls.ARRAY_NAMES}
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(**arrays, max_depth=meta['max_depth'], feature_names=meta['feature_names'])
+
+
+def compile_forest(model):
+    """변환 가능한 모델이면 FlatForest, 아니면 None"""
+    try:
+        return FlatForest.from_sklearn(model)
+    except ValueError:
+        return None
+
+
+def _latency(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'median_ms': float(np.median(timings) * 1000), 'p95_ms': float(np.percentile(timings, 95) * 1000)}
+
+
+def benchmark_forest_inference(model, X, batch_size=64, repeat=50):
+    """sklearn predict와 노드 배열 예측의 1행/배치 지연 시간 비교
+
+    identical: n_jobs=1 sklearn 예측과 비트 단위 일치 여부,
+    max_rel_diff/within_tolerance: 설정된 n_jobs 그대로의 sklearn 예측과의 최대 상대 오차와 PARALLEL_RTOL 이내 여부
+    """
+    flat = FlatForest.from_sklearn(model)
+    single = X.iloc[:1] if hasattr(X, 'iloc') else X[:1]
+    batch = X.iloc[:batch_size] if hasattr(X, 'iloc') else X[:batch_size]
+
+    # 순차 합산 기준 모델 (학습된 트리는 공유하고 n_jobs만 1로, 원래 모델은 변경하지 않음)
+    sequential = copy.copy(getattr(model, 'forest_', model))
+    sequential.n_jobs = 1
+    flat_predictions, model_predictions = flat.predict(X), model.predict(X)
+    scale = np.maximum(np.abs(model_predictions), np.finfo(float).tiny)
+    max_rel_diff = float(np.max(np.abs(flat_predictions - model_predictions) / scale)) if len(X) else 0.0
+
+    results = {
+        'identical': bool(np.array_equal(flat_predictions, sequential.predict(X))),
+        'max_rel_diff': max_rel_diff,
+        'within_tolerance': max_rel_diff <= PARALLEL_RTOL,
+        'sklearn_single': _latency(lambda: model.predict(single), repeat),
+        'flat_single': _latency(lambda: flat.predict(single), repeat),
+        'sklearn_batch': _latency(lambda: model.predict(batch), repeat),
+        'flat_batch': _latency(lambda: flat.predict(batch), repeat),
+    }
+    for name, result in results.items():
+        if isinstance(result, dict):
+            print(f"⏱️ {name}: {result['median_ms']:.3f}ms (p95 {result['p95_ms']:.3f}ms)")
+    print(f"{'✅' if results['identical'] else '⚠️'} n_jobs=1 sklearn 결과와 비트 단위 일치: {results['identical']}")
+    print(f"{'✅' if results['within_tolerance'] else '⚠️'} 설정된 n_jobs 결과와 최대 상대 오차: "
+          f"{max_rel_diff:.2e} (허용 {PARALLEL_RTOL:.0e})")
+    return results
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from crawler import hitter_columns, pitcher_columns, load_historical_data, invalidate_history_store_cache
+from features import add_hitter_features, add_pitcher_features, convert_ip_to_float, PITCHER_DERIVED_COLUMNS
+
+# 역대 기록 컬럼형 저장소 위치
+HISTORY_DIR = os.getenv('KBO_HISTORY_DIR', os.path.join('data', 'history'))
+BATCH_SIZE = int(os.getenv('KBO_HISTORY_BATCH_SIZE', 50000))
+
+HISTORY_COLUMNS = {'hitter': hitter_columns, 'pitcher': pitcher_columns}
+TEXT_COLUMNS = ['선수명', '팀명']
+
+
+def _kind_dir(kind, store_dir):
+    if kind not in HISTORY_COLUMNS:
+        raise ValueError(f"지원하지 않는 데이터 종류입니다: {kind}")
+    return os.path.join(store_dir or HISTORY_DIR, kind)
+
+
+def _source_key(path):
+    """파일 경로/크기/수정 시각으로 원본 식별 (같은 파일 재적재 시 이어받기)"""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _read_manifest(kind_dir):
+    path = os.path.join(kind_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(kind_dir, manifest):
+    """임시 파일에 쓴 뒤 교체하여 중단 시에도 manifest가 깨지지 않도록 함"""
+    path = os.path.join(kind_dir, 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _remove_stale_sources(kind_dir, manifest, path, source_key):
+    """같은 경로의 이전 버전(크기/수정 시각이 다른 원본)으로 적재한 배치와 manifest 항목 삭제"""
+    path = os.path.abspath(path)
+    stale = [key for key, entry in manifest.items() if entry['path'] == path and key != source_key]
+    if not stale:
+        return
+    for name in os.listdir(kind_dir):
+        if any(name.startswith(f"part-{key}-") for key in stale):
+            os.remove(os.path.join(kind_dir, name))
+    for key in stale:
+        del manifest[key]
+    _write_manifest(kind_dir, manifest)
+    print(f"🧹 변경된 원본의 이전 적재분 삭제: {path}")
+
+
+def _iter_source_batches(path, columns, batch_size, has_header):
+    """CSV/Parquet 원본을 배치 단위로 읽음 (전체를 메모리에 올리지 않음)"""
+    if path.endswith('.parquet'):
+        parquet_file = pq.ParquetFile(path)
+        missing = set(columns) - set(parquet_file.schema_arrow.names)
+        if missing:
+            raise ValueError(f"필수 컬럼이 없습니다: {', '.join(sorted(missing))}")
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    sep = '\t' if path.endswith(('.tsv', '.txt')) else ','
+    reader = pd.read_csv(path, sep=sep, chunksize=batch_size, dtype=str,
+                         header=0 if has_header else None, names=None if has_header else columns)
+    for chunk in reader:
+        missing = set(columns) - set(chunk.columns)
+        if missing:
+            raise ValueError(f"필수 컬럼이 없습니다: {', '.join(sorted(missing))}")
+        yield chunk[columns]
+
+
+def validate_history_batch(batch, kind):
+    """컬럼 목록 기준으로 배치 검증 및 형 변환 후 파생 지표 추가. 반환: (정제된 배치, 제외된 행 수)"""
+    columns = HISTORY_COLUMNS[kind]
+    batch = batch[columns].copy()
+
+    for column in TEXT_COLUMNS:
+        batch[column] = batch[column].where(batch[column].notna(), '').astype(str).str.strip()
+
+    if kind == 'pitcher':
+        batch['IP'] = pd.to_numeric(batch['IP'].map(_safe_ip), errors='coerce')
+
+    numeric_columns = [c for c in columns if c not in TEXT_COLUMNS and c != 'IP']
+    batch[numeric_columns] = batch[numeric_columns].apply(pd.to_numeric, errors='coerce')
+
+    # 이름/팀/연도가 없거나 숫자로 변환되지 않은 행은 제외 (WHIP는 원본 값 대신 IP/H/BB로 다시 계산)
+    if kind == 'pitcher':
+        batch = batch.drop(columns=PITCHER_DERIVED_COLUMNS)
+    valid = batch.notna().all(axis=1) & (batch['선수명'] != '') & (batch['팀명'] != '')
+    dropped = int((~valid).sum())
+    batch = batch[valid].astype({'연도': np.int64})
+
+    batch = add_hitter_features(batch) if kind == 'hitter' else add_pitcher_features(batch)
+    batch = batch[columns + [c for c in batch.columns if c not in columns]]
+    return batch.reset_index(drop=True), dropped
+
+
+def _safe_ip(value):
+    try:
+        return convert_ip_to_float(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return np.nan
+
+
+def ingest_history_file(path, kind, store_dir=None, batch_size=None, has_header=True):
+    """대용량 CSV/Parquet 기록을 배치 단위로 검증하여 저장소에 추가 (중단 시 이어서 적재)"""
+    kind_dir = _kind_dir(kind, store_dir)
+    os.makedirs(kind_dir, exist_ok=True)
+    batch_size = batch_size or BATCH_SIZE
+    source_key = _source_key(path)
+
+    manifest = _read_manifest(kind_dir)
+    # 원본 파일이 바뀌었으면 이전 적재분을 지우고 새로 적재 (남겨 두면 같은 행이 중복됨)
+    _remove_stale_sources(kind_dir, manifest, path, source_key)
+    entry = manifest.setdefault(source_key, {'path': os.path.abspath(path), 'batches': 0, 'rows': 0,
+                                             'dropped': 0, 'complete': False})
+    if entry['complete']:
+        print(f"⏭️ 이미 적재된 파일입니다: {path}")
+        return entry
+
+    for batch_no, raw in enumerate(_iter_source_batches(path, HISTORY_COLUMNS[kind], batch_size, has_header)):
+        # 이전 실행에서 저장 완료된 배치는 건너뜀
+        if batch_no < entry['batches']:
+            continue
+
+        batch, dropped = validate_history_batch(raw, kind)
+        part_path = os.path.join(kind_dir, f"part-{source_key}-{batch_no:05d}.parquet")
+        tmp_path = part_path + '.tmp'
+        pq.write_table(pa.Table.from_pandas(batch, preserve_index=False), tmp_path)
+        os.replace(tmp_path, part_path)
+
+        entry.update({
+            'batches': batch_no + 1,
+            'rows': entry['rows'] + len(batch),
+            'dropped': entry['dropped'] + dropped
+        })
+        _write_manifest(kind_dir, manifest)
+
+    entry['complete'] = True
+    _write_manifest(kind_dir, manifest)
+    # 이 프로세스의 load_historical_data()가 새 저장소 내용을 읽도록 캐시 삭제
+    invalidate_history_store_cache()
+    print(f"✅ {kind} 기록 적재 완료: {entry['rows']}행 (제외 {entry['dropped']}행)")
+    return entry
+
+
+def _part_paths(kind, store_dir):
+    kind_dir = _kind_dir(kind, store_dir)
+    if not os.path.isdir(kind_dir):
+        return []
+    return sorted(os.path.join(kind_dir, name) for name in os.listdir(kind_dir)
+                  if name.startswith('part-') and name.endswith('.parquet'))
+
+
+def iter_history_batches(kind, store_dir=None, columns=None, batch_size=None):
+    """저장소의 기록을 배치 단위로 순회 (메모리 사용량은 배치 크기로 제한)"""
+    batch_size = batch_size or BATCH_SIZE
+    for part_path in _part_paths(kind, store_dir):
+        for batch in pq.ParquetFile(part_path).iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+
+def load_history_store(kind, store_dir=None, columns=None):
+    """저장소 전체 기록 로드 (없으면 빈 DataFrame)"""
+    parts = _part_paths(kind, store_dir)
+    if not parts:
+        return pd.DataFrame()
+    return pq.ParquetDataset(parts).read(columns=columns).to_pandas()
+
+
+def history_seasons(kind, store_dir=None):
+    """내장 기록 + 저장소에 있는 시즌 목록 (연도 컬럼만 읽음)"""
+    embedded = load_historical_data(include_store=False)[0 if kind == 'hitter' else 1]
+    seasons = set(embedded['연도'].astype(int))
+    for batch in iter_history_batches(kind, store_dir, columns=['연도']):
+        seasons.update(batch['연도'].astype(int))
+    return seasons
+
+
+def history_batch_factory(kind, extra_frames=(), store_dir=None, batch_size=None, season_last=None):
+    """내장 역대 데이터 + 저장소 + 추가 프레임(예: 크롤링한 현재 시즌)을 순회하는 배치 제너레이터 생성기
+
+    season_last: 역대 기록 중 이 시즌 행을 마지막에 순회 (process_*_data의 역대 -> 해당 시즌 입력 순서와 같게)
+    """
+    batch_size = batch_size or BATCH_SIZE
+
+    def history_batches():
+        embedded = load_historical_data(include_store=False)[0 if kind == 'hitter' else 1]
+        for start in range(0, len(embedded), batch_size):
+            yield embedded.iloc[start:start + batch_size]
+        yield from iter_history_batches(kind, store_dir, batch_size=batch_size)
+
+    def factory():
+        if season_last is None:
+            yield from history_batches()
+        else:
+            for batch in history_batches():
+                yield batch[batch['연도'] != season_last]
+            for batch in history_batches():
+                yield batch[batch['연도'] == season_last]
+        for frame in extra_frames:
+            yield validate_history_batch(frame, kind)[0]
+
+    return factory
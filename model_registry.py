@@ -0,0 +1,259 @@
+import argparse
+import datetime
+import json
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import data_processor
+from data_processor import model_artifacts, library_versions
+from features import add_hitter_features, add_pitcher_features
+from forest_inference import FlatForest, compile_forest
+
+# 버전별 모델 산출물 저장 위치: {REGISTRY_DIR}/{kind}/{version}/(metadata.json, artifacts.joblib, forest/)
+REGISTRY_DIR = os.getenv('KBO_MODEL_REGISTRY_DIR', os.path.join('data', 'registry'))
+# off: 사용 안 함, train: 학습할 때마다 버전 등록, serve: 활성 버전으로 예측만 수행 (없으면 학습 후 등록)
+REGISTRY_MODE = os.getenv('KBO_MODEL_REGISTRY', 'off').lower()
+
+# 역할별 예측 대상/출력 컬럼과 파생 지표 함수, 학습 함수
+KIND_SPECS = {
+    'hitter': {'target': 'OPS', 'output': 'OPS_predict', 'add_features': add_hitter_features,
+               'process': 'process_hitter_data'},
+    'pitcher': {'target': 'WHIP', 'output': 'WHIP_predict', 'add_features': add_pitcher_features,
+                'process': 'process_pitcher_data'},
+}
+ARTIFACT_KEYS = ('top_n_features', 'scaler', 'kmeans', 'model')
+
+
+def _kind_dir(kind):
+    if kind not in KIND_SPECS:
+        raise ValueError(f"지원하지 않는 모델 종류입니다: {kind}")
+    return os.path.join(REGISTRY_DIR, kind)
+
+
+def _write_json(path, payload):
+    """임시 파일에 쓴 뒤 교체 (읽는 쪽은 항상 온전한 파일만 봄)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def register_version(kind, artifacts=None, activate=False):
+    """학습 산출물을 새 버전으로 저장. 반환: 버전 이름"""
+    artifacts = artifacts if artifacts is not None else model_artifacts[kind]
+    missing = [key for key in ARTIFACT_KEYS if key not in artifacts]
+    if missing:
+        raise ValueError(f"등록할 학습 산출물이 없습니다: {', '.join(missing)}")
+
+    created_at = datetime.datetime.now()
+    fingerprint = artifacts.get('fingerprint') or ''
+    version = f"{created_at:%Y%m%d-%H%M%S}-{fingerprint[:8] or 'manual'}"
+    version_dir = os.path.join(_kind_dir(kind), version)
+    tmp_dir = f"{version_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir)
+
+    joblib.dump({key: artifacts[key] for key in ARTIFACT_KEYS}, os.path.join(tmp_dir, 'artifacts.joblib'))
+    # 랜덤 포레스트는 예측에 쓰는 노드 배열을 따로 저장 (서빙 시 메모리 매핑으로 로드)
+    compiled = compile_forest(artifacts['model'])
+    if compiled is not None:
+        compiled.save(os.path.join(tmp_dir, 'forest'))
+    _write_json(os.path.join(tmp_dir, 'metadata.json'), {
+        'kind': kind,
+        'version': version,
+        'created_at': created_at.isoformat(),
+        'fingerprint': artifacts.get('fingerprint'),
+        'final_backend': artifacts.get('final_backend'),
+        'final_params': artifacts.get('final_params'),
+        'n_features': artifacts.get('n_features'),
+        'top_n_features': list(artifacts['top_n_features']),
+        'n_clusters': int(artifacts['kmeans'].n_clusters),
+        'metrics': artifacts.get('metrics'),
+        'versions': library_versions()
+    })
+    os.replace(tmp_dir, version_dir)
+    print(f"📦 {kind} 모델 버전 등록: {version}")
+
+    if activate:
+        promote(kind, version)
+    return version
+
+
+def list_versions(kind):
+    """등록된 버전 메타데이터 목록 (오래된 순)"""
+    kind_dir = _kind_dir(kind)
+    if not os.path.isdir(kind_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(kind_dir)):
+        metadata = _read_json(os.path.join(kind_dir, name, 'metadata.json'))
+        if metadata is not None:
+            versions.append(metadata)
+    return versions
+
+
+def _active_path(kind):
+    return os.path.join(_kind_dir(kind), 'active.json')
+
+
+def get_active_version(kind):
+    active = _read_json(_active_path(kind))
+    return active['version'] if active else None
+
+
+def promote(kind, version):
+    """활성 버전 교체 (포인터 파일 원자적 교체, 이전 버전은 롤백용으로 보관)"""
+    if not os.path.exists(os.path.join(_kind_dir(kind), version, 'metadata.json')):
+        raise ValueError(f"'{version}' 버전이 없습니다.")
+
+    active = _read_json(_active_path(kind)) or {'version': None, 'previous': []}
+    previous = active['previous'] + ([active['version']] if active['version'] else [])
+    _write_json(_active_path(kind), {
+        'version': version,
+        'previous': previous,
+        'promoted_at': datetime.datetime.now().isoformat()
+    })
+    print(f"✅ {kind} 활성 모델 변경: {active['version']} -> {version}")
+    return version
+
+
+def rollback(kind):
+    """직전 활성 버전으로 되돌림"""
+    active = _read_json(_active_path(kind))
+    if not active or not active['previous']:
+        raise ValueError(f"{kind} 모델은 되돌릴 이전 버전이 없습니다.")
+
+    version = active['previous'][-1]
+    _write_json(_active_path(kind), {
+        'version': version,
+        'previous': active['previous'][:-1],
+        'promoted_at': datetime.datetime.now().isoformat()
+    })
+    print(f"↩️ {kind} 활성 모델 롤백: {active['version']} -> {version}")
+    return version
+
+
+class ServingModel:
+    """등록된 버전으로 학습 없이 예측 (스케일러 -> KMeans 군집 -> 최종 모델)"""
+
+    def __init__(self, kind, version, artifacts, metadata, compiled=None):
+        self.kind = kind
+        self.version = version
+        self.metadata = metadata
+        self.top_n_features = list(artifacts['top_n_features'])
+        self.scaler = artifacts['scaler']
+        self.kmeans = artifacts['kmeans']
+        self.model = artifacts['model']
+        # 랜덤 포레스트면 노드 배열 예측기 사용 (적은 행 예측 시 sklearn 호출 오버헤드 제거, n_jobs=1 예측과 동일)
+        self.compiled = compiled if compiled is not None else compile_forest(self.model)
+
+    @classmethod
+    def load(cls, kind, version):
+        """저장된 버전 로드. 노드 배열은 메모리 매핑 (sklearn 트리는 역직렬화 시 배열을 복사하므로 매핑하지 않음)"""
+        version_dir = os.path.join(_kind_dir(kind), version)
+        artifacts = joblib.load(os.path.join(version_dir, 'artifacts.joblib'))
+        forest_dir = os.path.join(version_dir, 'forest')
+        compiled = FlatForest.load(forest_dir) if os.path.isdir(forest_dir) else None
+        return cls(kind, version, artifacts, _read_json(os.path.join(version_dir, 'metadata.json')), compiled)
+
+    def predict(self, data):
+        """파생 지표가 있는 데이터로 예측값 계산 (특징이 빠진 행은 NaN)"""
+        X = data[self.top_n_features].astype(float)
+        scaled = pd.DataFrame(self.scaler.transform(X), columns=self.top_n_features, index=data.index)
+        valid = scaled.notna().all(axis=1).to_numpy()
+
+        predictions = np.full(len(data), np.nan)
+        if valid.any():
+            design = scaled[valid].copy()
+            design['cluster'] = self.kmeans.predict(design[self.top_n_features])
+            predictions[valid] = (self.compiled or self.model).predict(design)
+        return predictions
+
+    def process(self, current, history):
+        """process_*_data와 같은 형태의 결과를 학습 없이 생성"""
+        spec = KIND_SPECS[self.kind]
+        data = pd.concat([spec['add_features'](history), spec['add_features'](current)], ignore_index=True)
+        columns_to_convert = data.columns.difference(['선수명', '팀명', '연도'])
+        data[columns_to_convert] = data[columns_to_convert].astype(float)
+        data[spec['output']] = self.predict(data)
+        data.attrs['model_version'] = self.version
+        return data
+
+    def repredict(self, processed):
+        """이미 처리된 결과(파생 지표 포함)의 예측값만 이 버전으로 다시 계산 (수집/학습 없음)"""
+        data = processed.copy()
+        data[KIND_SPECS[self.kind]['output']] = self.predict(data)
+        # 변경분 정보는 직전 스냅샷 기준이므로 버림 (집계는 전체 재계산)
+        data.attrs = {key: value for key, value in processed.attrs.items() if key != 'delta'}
+        data.attrs['model_version'] = self.version
+        return data
+
+
+_serving = {}
+_serving_lock = threading.Lock()
+
+
+def get_serving_model(kind):
+    """활성 버전의 예측 모델 (활성 포인터가 바뀌면 재시작 없이 새 버전 로드, 없으면 None)"""
+    version = get_active_version(kind)
+    if version is None:
+        return None
+
+    with _serving_lock:
+        current = _serving.get(kind)
+        if current is None or current.version != version:
+            current = ServingModel.load(kind, version)
+            _serving[kind] = current
+            print(f"🔄 {kind} 서빙 모델 로드: {version}")
+        return current
+
+
+def process_with_registry(kind, current, history):
+    """레지스트리 모드에 따라 활성 버전으로 예측하거나 학습 후 버전 등록 (갱신 스테이지용)"""
+    if REGISTRY_MODE == 'serve':
+        serving = get_serving_model(kind)
+        if serving is not None:
+            return serving.process(current, history)
+
+    result = getattr(data_processor, KIND_SPECS[kind]['process'])(current, history)
+    if REGISTRY_MODE in ('train', 'serve'):
+        # 결과 캐시에서 복원된 같은 학습 결과는 다시 등록하지 않음
+        fingerprint = result.attrs.get('fingerprint')
+        if not any(v.get('fingerprint') == fingerprint for v in list_versions(kind)):
+            register_version(kind, activate=get_active_version(kind) is None)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='KBO 예측 모델 레지스트리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list').add_argument('kind', choices=list(KIND_SPECS))
+    promote_parser = sub.add_parser('promote')
+    promote_parser.add_argument('kind', choices=list(KIND_SPECS))
+    promote_parser.add_argument('version')
+    sub.add_parser('rollback').add_argument('kind', choices=list(KIND_SPECS))
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        active = get_active_version(args.kind)
+        for metadata in list_versions(args.kind):
+            marker = '*' if metadata['version'] == active else ' '
+            print(f"{marker} {metadata['version']}  {metadata['final_backend']}  {metadata.get('metrics')}")
+    elif args.command == 'promote':
+        promote(args.kind, args.version)
+    else:
+        rollback(args.kind)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_squared_error, mean_absolute_error
+from sklearn.model_selection import KFold, ParameterGrid
+
+import data_processor
+from data_processor import make_regressor, save_selected_model, MODEL_SELECTION_DIR
+from crawler import crawl_hitter_data, crawl_pitcher_data, load_historical_data, current_season
+
+# 후보 모델별 하이퍼파라미터 탐색 공간
+SEARCH_SPACE = {
+    'ridge': {'alpha': [0.1, 1.0, 10.0]},
+    'lasso': {'alpha': [1e-4, 1e-3, 1e-2]},
+    'elasticnet': {'alpha': [1e-3, 1e-2], 'l1_ratio': [0.2, 0.5, 0.8]},
+    'svr': {'C': [0.1, 1.0, 10.0], 'epsilon': [0.01, 0.1]},
+    'gbr': {'n_estimators': [100, 300], 'max_depth': [2, 3], 'learning_rate': [0.05, 0.1]},
+    'xgb': {'n_estimators': [200, 400], 'max_depth': [3, 6], 'learning_rate': [0.05, 0.1]},
+    'rf': {'n_estimators': [100, 200], 'max_features': [1.0, 'sqrt']},
+}
+
+# Successive halving 설정
+HALVING_FACTOR = int(os.getenv('KBO_SEARCH_FACTOR', 3))
+SEARCH_FOLDS = int(os.getenv('KBO_SEARCH_FOLDS', 3))
+MIN_RESOURCES = int(os.getenv('KBO_SEARCH_MIN_RESOURCES', 60))
+SEARCH_SEED = 42
+
+
+def search_candidates(space=None):
+    """탐색 공간을 (백엔드, 하이퍼파라미터) 후보 목록으로 펼침"""
+    space = space or SEARCH_SPACE
+    return [(backend, dict(params)) for backend, grid in space.items() for params in ParameterGrid(grid)]
+
+
+def _results_path(kind):
+    return os.path.join(MODEL_SELECTION_DIR, f"search_{kind}.jsonl")
+
+
+def _load_results(kind):
+    """이전 탐색에서 끝난 fold 결과 (중단된 탐색 이어받기용). 반환: {작업 키: 결과}"""
+    path = _results_path(kind)
+    if not os.path.exists(path):
+        return {}
+    results = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시점에 쓰다 만 줄은 무시
+                continue
+            results[result['key']] = result
+    return results
+
+
+def _data_hash(X, y):
+    digest = hashlib.sha1(','.join(map(str, X.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _job_key(data_hash, backend, params, resources, fold):
+    raw = json.dumps([data_hash, backend, params, resources, fold, SEARCH_FOLDS, SEARCH_SEED], sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _evaluate_fold(key, backend, params, X, y, train_index, test_index, resources, fold):
+    """후보 1개의 fold 1개 학습/평가 (joblib 워커에서 실행, 모델 내부 병렬화는 끔)"""
+    model = make_regressor(backend, SEARCH_SEED, params)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(X.iloc[train_index], y.iloc[train_index])
+    fit_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(X.iloc[test_index])
+    return {
+        'key': key,
+        'backend': backend,
+        'params': params,
+        'resources': int(resources),
+        'fold': int(fold),
+        'rmse': float(np.sqrt(mean_squared_error(y.iloc[test_index], y_pred))),
+        'mae': float(mean_absolute_error(y.iloc[test_index], y_pred)),
+        'fit_seconds': fit_seconds
+    }
+
+
+def _resource_schedule(n_candidates, n_samples):
+    """라운드별 학습 행 수 (마지막 라운드는 전체 데이터)"""
+    n_rounds = 1 + int(math.floor(math.log(max(n_candidates, 1), HALVING_FACTOR)))
+    return [max(min(MIN_RESOURCES, n_samples), int(n_samples / HALVING_FACTOR ** (n_rounds - 1 - i)))
+            for i in range(n_rounds)]
+
+
+def successive_halving(kind, X, y, candidates=None, n_jobs=-1):
+    """후보를 적은 데이터로 평가하고 상위 1/factor만 다음 라운드로 올리는 탐색. 반환: (최종 후보 요약, 라운드 기록)"""
+    candidates = candidates or search_candidates()
+    X = X.reset_index(drop=True)
+    y = y.reset_index(drop=True)
+    data_hash = _data_hash(X, y)
+
+    os.makedirs(MODEL_SELECTION_DIR, exist_ok=True)
+    done = _load_results(kind)
+    order = np.random.default_rng(SEARCH_SEED).permutation(len(X))
+    history = []
+
+    with open(_results_path(kind), 'a', encoding='utf-8') as log:
+        for round_no, resources in enumerate(_resource_schedule(len(candidates), len(X))):
+            subset = order[:resources]
+            folds = list(KFold(SEARCH_FOLDS, shuffle=True, random_state=SEARCH_SEED).split(subset))
+
+            jobs, scores = [], {}
+            for c, (backend, params) in enumerate(candidates):
+                for fold, (train, test) in enumerate(folds):
+                    key = _job_key(data_hash, backend, params, resources, fold)
+                    if key in done:
+                        scores.setdefault(c, []).append(done[key])
+                    else:
+                        jobs.append((c, key, backend, params, subset[train], subset[test], fold))
+
+            print(f"🔎 {kind} 탐색 {round_no + 1}라운드: 후보 {len(candidates)}개, {resources}행, "
+                  f"새 fold {len(jobs)}개 (이어받기 {sum(len(v) for v in scores.values())}개)")
+
+            # 끝나는 fold마다 바로 기록하여 중단되어도 다시 계산하지 않음
+            outputs = Parallel(n_jobs=n_jobs, return_as='generator')(
+                delayed(_evaluate_fold)(key, backend, params, X, y, train, test, resources, fold)
+                for _, key, backend, params, train, test, fold in jobs)
+            for (c, *_), result in zip(jobs, outputs):
+                log.write(json.dumps(result, ensure_ascii=False) + '\n')
+                log.flush()
+                done[result['key']] = result
+                scores.setdefault(c, []).append(result)
+
+            summary = sorted(
+                ({'backend': candidates[c][0], 'params': candidates[c][1],
+                  'rmse': float(np.mean([r['rmse'] for r in rs])),
+                  'mae': float(np.mean([r['mae'] for r in rs])),
+                  'fit_seconds': float(np.mean([r['fit_seconds'] for r in rs]))}
+                 for c, rs in scores.items()),
+                key=lambda s: (s['rmse'], s['fit_seconds']))
+            history.append({'round': round_no + 1, 'resources': int(resources), 'scores': summary})
+
+            keep = max(1, math.ceil(len(candidates) / HALVING_FACTOR))
+            candidates = [(s['backend'], s['params']) for s in summary[:keep]]
+
+    return summary[0], history
+
+
+def load_design(kind):
+    """현재 시즌 기준 최종 예측 모델 입력 (X, y) 생성 (결과 캐시/공유 산출물을 쓰지 않고 전처리 재실행)"""
+    hitter_his, pitcher_his = load_historical_data()
+    his = hitter_his if kind == 'hitter' else pitcher_his
+    season = current_season()
+    if (his['연도'] == season).any():
+        current, past = his[his['연도'] == season], his[his['연도'] != season]
+    else:
+        current = crawl_hitter_data(season) if kind == 'hitter' else crawl_pitcher_data(season)
+        past = his
+
+    process = data_processor.process_hitter_data if kind == 'hitter' else data_processor.process_pitcher_data
+    # 진행 중인 갱신의 model_artifacts를 덮어쓰지 않도록 별도 dict에 학습
+    artifacts = {}
+    process(current, past, use_cache=False, artifacts=artifacts)
+    return artifacts['design']
+
+
+def run_model_selection(kind, n_jobs=-1, promote=True):
+    """후보 모델 탐색 후 최적 모델을 process_*_data의 최종 예측 모델로 승격"""
+    X, y = load_design(kind)
+    best, history = successive_halving(kind, X, y, n_jobs=n_jobs)
+
+    selection = dict(best, kind=kind, searched_at=datetime.datetime.now().isoformat(),
+                     n_samples=int(len(X)), rounds=[{k: h[k] for k in ('round', 'resources')} for h in history])
+    print(f"🏆 {kind} 최적 모델: {best['backend']} {best['params']} (RMSE {best['rmse']:.4f})")
+    if promote:
+        save_selected_model(kind, selection)
+        print(f"✅ {kind} 최종 예측 모델 승격 완료")
+    return selection
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='KBO 예측 모델 후보 탐색 (successive halving)')
+    parser.add_argument('kinds', nargs='*', default=['hitter', 'pitcher'], choices=['hitter', 'pitcher'])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--no-promote', action='store_true', help='탐색만 하고 승격하지 않음')
+    args = parser.parse_args(argv)
+
+    for kind in args.kinds:
+        run_model_selection(kind, n_jobs=args.n_jobs, promote=not args.no_promote)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,38 @@ class WinProbability(db.Model):
     )
 
 
+class SeasonWinProbability(db.Model):
+    __tablename__ = 'season_win_probability'
+    id = db.Column(db.Integer, primary_key=True)
+    season = db.Column(db.Integer, nullable=False)
+    team1 = db.Column(db.String(20), nullable=False)
+    team2 = db.Column(db.String(20), nullable=False)
+    probability = db.Column(db.Float, nullable=False)
+    created_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('season', 'team1', 'team2', name='unique_season_team_pair'),
+        {'extend_existing': True}
+    )
+
+
+class WinProbabilityInterval(db.Model):
+    __tablename__ = 'win_probability_interval'
+    id = db.Column(db.Integer, primary_key=True)
+    team1 = db.Column(db.String(20), nullable=False)
+    team2 = db.Column(db.String(20), nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    level = db.Column(db.Float, nullable=False)
+    samples = db.Column(db.Integer, nullable=False)
+    created_date = db.Column(db.DateTime, default=datetime.utcnow)  # 같은 갱신의 승률 스냅샷 이후 시각
+
+    __table_args__ = (
+        db.UniqueConstraint('team1', 'team2', name='unique_interval_team_pair'),
+        {'extend_existing': True}
+    )
+
+
 class RankingPredict(db.Model):
     __tablename__ = 'ranking_predict'
     id = db.Column(db.Integer, primary_key=True)
@@ -28,6 +60,18 @@ class RankingPredict(db.Model):
         {'extend_existing': True}
     )
 
+class RefreshRun(db.Model):
+    __tablename__ = 'refresh_run'
+    id = db.Column(db.Integer, primary_key=True)
+    refresh_window = db.Column(db.String(32), nullable=False)  # 갱신 창 (예: 날짜)
+    host = db.Column(db.String(100))
+    finished_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('refresh_window', name='unique_refresh_window'),
+        {'extend_existing': True}
+    )
+
 class HitterRecord(db.Model):
     __tablename__ = 'hitter_record'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
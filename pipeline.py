@@ -0,0 +1,176 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from crawler import crawl_hitter_data, crawl_pitcher_data, load_historical_data, current_season
+from data_processor import process_hitter_data, process_pitcher_data, process_out_of_core
+import predictor
+from refresh_lock import refresh_guard, refresh_window
+from serialization import matrix_arrays
+
+# 역대 기록이 메모리보다 커질 때 배치 기반 처리 사용
+OUT_OF_CORE = os.getenv('KBO_OUT_OF_CORE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _season_inputs(season, hitter_his, pitcher_his):
+    """시즌별 입력 데이터 준비. 역대 데이터에 있는 지난 시즌은 크롤링 없이 사용"""
+    in_history = (season != current_season() and
+                  (hitter_his['연도'] == season).any() and
+                  (pitcher_his['연도'] == season).any())
+
+    if in_history:
+        return (hitter_his[hitter_his['연도'] == season], hitter_his[hitter_his['연도'] != season],
+                pitcher_his[pitcher_his['연도'] == season], pitcher_his[pitcher_his['연도'] != season])
+
+    return crawl_hitter_data(season), hitter_his, crawl_pitcher_data(season), pitcher_his
+
+
+def _process_season_out_of_core(season):
+    """배치 제너레이터로 시즌 처리 (해당 시즌 행만 메모리에 유지, 역대 기록 전체를 로드하지 않음)"""
+    from history_store import history_batch_factory, history_seasons
+
+    # _season_inputs와 같은 기준: 역대 기록에 있는 지난 시즌은 해당 시즌 행을 마지막에 순회, 아니면 크롤링
+    extra = {'hitter': [], 'pitcher': []}
+    season_last = season
+    in_history = season in history_seasons('hitter') and season in history_seasons('pitcher')
+    if season == current_season() or not in_history:
+        extra = {'hitter': [crawl_hitter_data(season)], 'pitcher': [crawl_pitcher_data(season)]}
+        season_last = None
+
+    hitter = process_out_of_core('hitter', history_batch_factory('hitter', extra['hitter'], season_last=season_last),
+                                 keep_seasons=[season])
+    pitcher = process_out_of_core('pitcher', history_batch_factory('pitcher', extra['pitcher'], season_last=season_last),
+                                  keep_seasons=[season])
+    return hitter, pitcher
+
+
+def process_season(season, hitter_his, pitcher_his, out_of_core=None):
+    """한 시즌 수집/처리/승률 계산 (DB 미사용, 프로세스 풀 작업 단위). 배치 모드면 hitter_his/pitcher_his는 사용하지 않음"""
+    if out_of_core is None:
+        out_of_core = OUT_OF_CORE
+
+    if out_of_core:
+        hitter, pitcher = _process_season_out_of_core(season)
+    else:
+        hitter_cur, hitter_rest, pitcher_cur, pitcher_rest = _season_inputs(season, hitter_his, pitcher_his)
+        hitter = process_hitter_data(hitter_cur, hitter_rest)
+        pitcher = process_pitcher_data(pitcher_cur, pitcher_rest)
+    win_probability_df, ranking_df = predictor.compute_win_probability(hitter, pitcher, season)
+
+    return {
+        'season': season,
+        'hitter_data': hitter,
+        'pitcher_data': pitcher,
+        'win_probability_df': win_probability_df,
+        'ranking_df': ranking_df
+    }
+
+
+def run_pipeline(seasons=None, max_workers=None, out_of_core=None):
+    """여러 시즌을 프로세스 풀에서 병렬 처리. 반환: {시즌: 결과}"""
+    seasons = sorted(set(seasons or [current_season()]))
+    if out_of_core is None:
+        out_of_core = OUT_OF_CORE
+
+    # 역대 데이터는 한 번만 파싱하여 모든 시즌 작업이 공유 (배치 모드는 시즌 작업이 저장소를 직접 순회)
+    hitter_his, pitcher_his = (None, None) if out_of_core else load_historical_data()
+
+    if len(seasons) == 1:
+        return {seasons[0]: process_season(seasons[0], hitter_his, pitcher_his, out_of_core)}
+
+    # spawn: 스케줄러 스레드가 있는 웹 워커(/backfill)를 fork하지 않음
+    max_workers = max_workers or min(len(seasons), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {season: executor.submit(process_season, season, hitter_his, pitcher_his, out_of_core)
+                   for season in seasons}
+        return {season: future.result() for season, future in futures.items()}
+
+
+def store_pipeline_results(results, cached_data=None):
+    """시즌별 결과를 DB와 캐시에 저장 (앱 컨텍스트 필요)"""
+    for season, result in results.items():
+        predictor.save_season_win_probability(season, result['win_probability_df'])
+
+        if cached_data is None:
+            continue
+        cached_data.setdefault('seasons', {})[season] = result['win_probability_df']
+
+        # 현재 시즌은 기존 승률/순위 테이블과 서빙 캐시도 갱신 (일일 갱신과 같은 잠금 아래에서, 진행 중이면 건너뜀)
+        if season == current_season():
+            with refresh_guard(refresh_window(), dedupe=False) as acquired:
+                if acquired:
+                    predictor.update_cached_predictions(cached_data, result['hitter_data'], result['pitcher_data'])
+
+
+def _write_parquet(df, path):
+    # attrs(스냅샷 식별자 등)는 파일에 남기지 않음
+    df = df.copy()
+    df.attrs = {}
+    df.to_parquet(path, index=False)
+
+
+def write_pipeline_results(results, out_dir):
+    """시즌별 결과를 파일로 저장 (DB 미사용): 선수 예측/순위는 Parquet, 승률 매트릭스는 npy + 팀 목록
+
+    {out_dir}/{season}/hitter.parquet, pitcher.parquet, ranking.parquet, win_probability.npy, teams.json
+    """
+    written = {}
+    for season, result in sorted(results.items()):
+        season_dir = os.path.join(out_dir, str(season))
+        os.makedirs(season_dir, exist_ok=True)
+
+        _write_parquet(result['hitter_data'], os.path.join(season_dir, 'hitter.parquet'))
+        _write_parquet(result['pitcher_data'], os.path.join(season_dir, 'pitcher.parquet'))
+        _write_parquet(result['ranking_df'], os.path.join(season_dir, 'ranking.parquet'))
+
+        # 대각선은 NaN인 float 매트릭스 (행/열 순서는 teams.json)
+        teams, matrix = matrix_arrays(result['win_probability_df'])
+        np.save(os.path.join(season_dir, 'win_probability.npy'), matrix)
+        with open(os.path.join(season_dir, 'teams.json'), 'w', encoding='utf-8') as f:
+            json.dump(teams, f, ensure_ascii=False)
+
+        written[season] = season_dir
+    return written
+
+
+def _parse_seasons(value):
+    try:
+        return [int(season) for season in value.split(',') if season.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"시즌 목록 형식이 올바르지 않습니다: {value} (예: 2024,2025)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='KBO 예측 파이프라인 오프라인 실행 (Flask/DB 미사용)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    refresh = sub.add_parser('refresh', help='수집/처리/승률 계산 후 파일로 저장')
+    refresh.add_argument('--seasons', type=_parse_seasons, default=None, help='예: 2024,2025 (기본: 현재 시즌)')
+    refresh.add_argument('--out', required=True, help='결과 저장 디렉터리')
+    refresh.add_argument('--workers', type=int, default=None, help='시즌 병렬 프로세스 수 (기본: CPU 수)')
+    refresh.add_argument('--out-of-core', action='store_true', help='배치 기반 처리 사용')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_pipeline(args.seasons, max_workers=args.workers, out_of_core=args.out_of_core or None)
+    written = write_pipeline_results(results, args.out)
+    elapsed = time.perf_counter() - start
+
+    with open(os.path.join(args.out, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'seasons': sorted(written),
+            'elapsed_seconds': round(elapsed, 2),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }, f, ensure_ascii=False, indent=2)
+
+    for season, season_dir in sorted(written.items()):
+        print(f"💾 {season} 시즌 결과 저장: {season_dir}")
+    print(f"✅ 오프라인 파이프라인 완료: {len(written)}개 시즌, {elapsed:.1f}초")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from crawler import current_season
+from scoring import compute_victory_df
+
+# 역할별로 인덱스에 보관하는 지표
+HITTER_METRICS = ['OPS_predict', 'OPS', 'AVG', 'HR', 'RBI']
+PITCHER_METRICS = ['WHIP_predict', 'WHIP', 'ERA', 'SO']
+
+# 낮을수록 좋은 지표 (리더보드 오름차순 정렬)
+ASCENDING_METRICS = {'WHIP_predict', 'WHIP', 'ERA'}
+
+# 라인업 점수가 0 이하로 떨어져 승률 식이 깨지는 것을 방지
+MIN_LINEUP_SCORE = 1e-6
+
+
+def _metric_or_nan(record, metric):
+    value = record.get(metric)
+    return np.nan if value is None else value
+
+
+class PlayerIndex:
+    """갱신 시점에 만들어 두는 선수별 예측 조회 인덱스 (요청 시 pandas/DB 미사용)"""
+
+    def __init__(self, records, season, adjustment=None):
+        self.season = season
+        self.records = records
+        # 팀 승률 계산과 같은 보정값 (OPS - WHIP + adjustment)
+        self.adjustment = adjustment
+
+        # 선수명 -> 레코드 위치 목록 (동명이인 대비)
+        self.by_name = {}
+        # (선수명, 팀명, 역할) -> 레코드 위치
+        self.by_key = {}
+        for pos, record in enumerate(records):
+            self.by_name.setdefault(record['name'], []).append(pos)
+            self.by_key[(record['name'], record['team'], record['role'])] = pos
+
+        self.teams = sorted({r['team'] for r in records})
+        self.leaderboards = self._build_leaderboards()
+
+        # 라인업 점수 계산용 예측값 배열 (레코드 위치로 인덱싱)
+        self.ops_values = np.array([_metric_or_nan(r, 'OPS_predict') for r in records], dtype=float)
+        self.whip_values = np.array([_metric_or_nan(r, 'WHIP_predict') for r in records], dtype=float)
+        self._score_positions = lru_cache(maxsize=4096)(self._score_positions_uncached)
+
+    @classmethod
+    def build(cls, hitter_data, pitcher_data, season=None, aggregate_store=None):
+        """처리된 타자/투수 데이터에서 해당 시즌 선수 인덱스 생성"""
+        season = season or current_season()
+        records = []
+        for role, df, metrics in (('hitter', hitter_data, HITTER_METRICS),
+                                  ('pitcher', pitcher_data, PITCHER_METRICS)):
+            season_df = df[df['연도'] == season]
+            # 역대 데이터와 크롤링 데이터의 중복 행은 마지막(최신) 행만 사용
+            season_df = season_df.drop_duplicates(subset=['선수명', '팀명'], keep='last')
+            columns = [m for m in metrics if m in season_df.columns]
+            values = season_df[columns].to_numpy(dtype=float)
+            for name, team, row in zip(season_df['선수명'], season_df['팀명'], values):
+                record = {'name': name, 'team': team, 'role': role, 'season': int(season)}
+                record.update({c: (None if np.isnan(v) else round(float(v), 4)) for c, v in zip(columns, row)})
+                records.append(record)
+
+        _, adjustment = compute_victory_df(hitter_data, pitcher_data, season, aggregate_store)
+        return cls(records, season, float(adjustment))
+
+    def _build_leaderboards(self):
+        """지표별 전체/팀별 정렬 위치 배열 미리 계산"""
+        leaderboards = {}
+        for metric in HITTER_METRICS + PITCHER_METRICS:
+            positions = np.array([i for i, r in enumerate(self.records) if r.get(metric) is not None], dtype=np.int64)
+            if positions.size == 0:
+                continue
+            values = np.array([self.records[i][metric] for i in positions])
+            order = np.argsort(values if metric in ASCENDING_METRICS else -values, kind='stable')
+            ranked = positions[order]
+            leaderboards[(metric, None)] = ranked
+
+            teams = np.array([self.records[i]['team'] for i in ranked])
+            for team in np.unique(teams):
+                leaderboards[(metric, team)] = ranked[teams == team]
+
+        return leaderboards
+
+    @property
+    def metrics(self):
+        return sorted({metric for metric, _ in self.leaderboards})
+
+    def lookup(self, name, team=None):
+        """선수명(및 팀명)으로 선수 예측 조회"""
+        records = [self.records[i] for i in self.by_name.get(name, [])]
+        if team is not None:
+            records = [r for r in records if r['team'] == team]
+        return records
+
+    def leaders(self, metric, team=None, limit=10):
+        """지표별 상위 선수 목록 (팀 필터 선택)"""
+        if metric not in self.metrics:
+            raise KeyError(metric)
+        ranked = self.leaderboards.get((metric, team))
+        if ranked is None:
+            return []
+        return [self.records[i] for i in ranked[:limit]]
+
+    def resolve(self, player, role, team=None):
+        """선수명(또는 {'name', 'team'})을 레코드 위치로 변환"""
+        if isinstance(player, dict):
+            name, team = player.get('name'), player.get('team', team)
+        else:
+            name = player
+
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError(f"선수는 선수명 문자열 또는 {{\"name\": ..., \"team\": ...}} 형식이어야 합니다: {player!r}")
+        if team is not None and not isinstance(team, str):
+            raise ValueError(f"팀명은 문자열이어야 합니다: {team!r}")
+
+        if team is not None and (name, team, role) in self.by_key:
+            return self.by_key[(name, team, role)]
+
+        candidates = [i for i in self.by_name.get(name, []) if self.records[i]['role'] == role]
+        if len(candidates) == 1:
+            return candidates[0]
+        if not candidates:
+            raise ValueError(f"'{name}' 선수의 예측 데이터를 찾을 수 없습니다.")
+        raise ValueError(f"'{name}' 선수가 여러 팀에 있습니다. 팀명을 함께 지정하세요.")
+
+    def _score_positions_uncached(self, hitter_positions, pitcher_positions):
+        # 예측값이 없는(NaN) 선수는 팀 집계와 같이 평균에서 제외 (NaN 점수는 JSON 응답을 깨뜨림)
+        ops = self.ops_values[list(hitter_positions)]
+        whip = self.whip_values[list(pitcher_positions)]
+        ops, whip = ops[~np.isnan(ops)], whip[~np.isnan(whip)]
+        if not ops.size or not whip.size:
+            raise ValueError("예측값이 있는 타자와 투수를 최소 1명 이상 지정해야 합니다.")
+        return max(ops.mean() - whip.mean() + self.adjustment, MIN_LINEUP_SCORE)
+
+    def score_lineup(self, hitters, pitchers, team=None):
+        """타순과 선발 투수의 예측값으로 보정 점수(Adjusted_Score) 계산"""
+        if not isinstance(hitters, list) or not isinstance(pitchers, list):
+            raise ValueError("타자(hitters)와 투수(pitchers)는 선수 목록(배열)이어야 합니다.")
+        if not hitters or not pitchers:
+            raise ValueError("타자와 투수를 최소 1명 이상 지정해야 합니다.")
+
+        # 정렬된 위치 튜플을 키로 사용하여 같은 조합은 LRU 캐시에서 반환
+        hitter_positions = tuple(sorted(self.resolve(p, 'hitter', team) for p in hitters))
+        pitcher_positions = tuple(sorted(self.resolve(p, 'pitcher', team) for p in pitchers))
+        return self._score_positions(hitter_positions, pitcher_positions)
+
+    def predict_matchup(self, lineup1, lineup2):
+        """두 라인업의 보정 점수와 lineup1의 예측 승률(%) 계산"""
+        scores = []
+        for lineup in (lineup1, lineup2):
+            pitchers = lineup.get('pitchers') or ([lineup['pitcher']] if lineup.get('pitcher') else [])
+            scores.append(self.score_lineup(lineup.get('hitters', []), pitchers, lineup.get('team')))
+
+        score_a, score_b = scores
+        return score_a, score_b, round(score_a / (score_a + score_b) * 100, 2)
+
+
+def build_player_index(hitter_data, pitcher_data, season=None, aggregate_store=None):
+    """처리된 데이터가 비어 있으면 None 반환"""
+    if hitter_data is None or pitcher_data is None:
+        return None
+    if not isinstance(hitter_data, pd.DataFrame) or hitter_data.empty:
+        return None
+    return PlayerIndex.build(hitter_data, pitcher_data, season, aggregate_store)
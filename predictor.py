@@ -1,52 +1,41 @@
+import os
 import pandas as pd
 import numpy as np
 import datetime
-from crawler import crawl_hitter_data, crawl_pitcher_data, load_historical_data
-from data_processor import process_hitter_data, process_pitcher_data
-from models import WinProbability, RankingPredict
+from functools import partial
+from crawler import crawl_hitter_data, crawl_pitcher_data, load_historical_data, current_season
+import data_processor
+from delta import process_incremental_task
+from player_index import build_player_index
+from scoring import TeamAggregateStore, compute_victory_df, build_win_probability_matrix
+from stages import Stage, run_stages
+from serialization import get_matrix_payloads
+import uncertainty
+import elo
+import model_registry
+from refresh_lock import refresh_guard, refresh_window, mark_window_done
+from resilience import (fetch_with_fallback, get_breaker, get_single_flight, is_using_fallback, CircuitOpenError,
+                        SingleFlightTimeout)
+from models import WinProbability, WinProbabilityInterval, RankingPredict, SeasonWinProbability
 from database import db  # db는 database.py에서 import
 
-from sqlalchemy import and_
 
-def generate_win_probability_df(all_hitter_data, all_pitcher_data):
-    """팀별 승률 및 순위 계산 후 DB 저장 (OPS - WHIP 내림차순 기준)"""
+def compute_win_probability(all_hitter_data, all_pitcher_data, season=None, aggregate_store=None):
+    """팀별 승률 매트릭스 및 순위 계산 (OPS - WHIP 내림차순 기준, DB 미사용)"""
     if all_hitter_data.empty or all_pitcher_data.empty:
         raise ValueError("입력 데이터가 비어있습니다.")
 
-    # 2025년 데이터 필터링
-    df_2025_hitter = all_hitter_data[all_hitter_data['연도'] == 2025]
-    df_2025_pitcher = all_pitcher_data[all_pitcher_data['연도'] == 2025]
-
-    # 팀별 OPS/WHIP 평균
-    team_ops = df_2025_hitter.groupby('팀명')['OPS_predict'].mean().reset_index()
-    team_whip = df_2025_pitcher.groupby('팀명')['WHIP_predict'].mean().reset_index()
-
-    # 데이터 병합 및 점수 계산
-    victory_df = pd.merge(
-        team_whip,
-        team_ops,
-        on='팀명'
-    )
-    victory_df['OPS_minus_WHIP'] = victory_df['OPS_predict'] - victory_df['WHIP_predict']
-    adjustment = abs(victory_df['OPS_minus_WHIP'].min()) + 0.1
-    victory_df['Adjusted_Score'] = victory_df['OPS_minus_WHIP'] + adjustment
+    # 시즌별 팀 OPS/WHIP 평균 및 보정 점수
+    season = season or current_season()
+    victory_df, adjustment = compute_victory_df(all_hitter_data, all_pitcher_data, season, aggregate_store)
+    if victory_df.empty:
+        raise ValueError(f"{season} 시즌 데이터가 없습니다.")
 
     # 승률 매트릭스 생성
     teams = victory_df['팀명'].tolist()
-    win_probability_df = pd.DataFrame(index=teams, columns=teams)
-
-    for team_a in teams:
-        score_a = victory_df[victory_df['팀명'] == team_a]['Adjusted_Score'].values[0]
-        for team_b in teams:
-            if team_a == team_b:
-                win_probability_df.loc[team_a, team_b] = '-'
-                continue
-            score_b = victory_df[victory_df['팀명'] == team_b]['Adjusted_Score'].values[0]
-            win_prob = (score_a / (score_a + score_b)) * 100
-            win_probability_df.loc[team_a, team_b] = round(win_prob, 2)
+    win_probability_df = build_win_probability_matrix(teams, victory_df['Adjusted_Score'].to_numpy())
 
     # 순위 계산 (OPS_minus_WHIP 내림차순)
-    current_time = datetime.datetime.utcnow()
     victory_df_sorted = victory_df.sort_values('OPS_minus_WHIP', ascending=False)
 
     ranking_data = []
@@ -59,6 +48,22 @@ def generate_win_probability_df(all_hitter_data, all_pitcher_data):
     ranking_df = pd.DataFrame(ranking_data)
     ranking_df['rank'] = ranking_df['OPS_minus_WHIP'].rank(method='min', ascending=False).astype(int)
 
+    return win_probability_df, ranking_df
+
+
+def generate_win_probability_df(all_hitter_data, all_pitcher_data, aggregate_store=None, season=None):
+    """팀별 승률 및 순위 계산 후 DB 저장 (OPS - WHIP 내림차순 기준)"""
+    win_probability_df, ranking_df = compute_win_probability(all_hitter_data, all_pitcher_data, season,
+                                                             aggregate_store)
+    save_win_probability(win_probability_df, ranking_df)
+    return win_probability_df
+
+
+def save_win_probability(win_probability_df, ranking_df):
+    """현재 시즌 승률/순위 DB 저장 (DB 값과 다른 쌍만 UPSERT, 신선도 시각은 모든 쌍 갱신)"""
+    current_time = datetime.datetime.utcnow()
+    teams = win_probability_df.index.tolist()
+
     # DB 저장 로직
     try:
         # 기존 순위 데이터 전체 삭제
@@ -73,71 +78,517 @@ def generate_win_probability_df(all_hitter_data, all_pitcher_data):
                 created_date=current_time
             ))
 
-        # 승률 데이터 UPSERT (명시적 확인)
+        # 승률 데이터 UPSERT: 기존 행을 한 번에 조회하여 DB 값과 다른 쌍만 쓰기
+        # (다른 프로세스가 먼저 저장했어도 이 워커의 캐시가 아닌 DB 기준으로 비교)
+        existing = {(row.team1, row.team2): row for row in db.session.query(WinProbability).all()}
         for team1 in teams:
             for team2 in teams:
                 prob = win_probability_df.loc[team1, team2]
-                if prob != '-':
-                    # 기존 데이터 조회
-                    existing = db.session.query(WinProbability).filter(
-                        and_(
-                            WinProbability.team1 == team1,
-                            WinProbability.team2 == team2
-                        )
-                    ).first()
-
-                    if existing:
-                        # 업데이트
-                        existing.probability = float(prob)
-                        existing.created_date = current_time
-                    else:
-                        # 새로 추가
-                        db.session.add(WinProbability(
-                            team1=team1,
-                            team2=team2,
-                            probability=float(prob),
-                            created_date=current_time
-                        ))
+                if prob == '-':
+                    continue
+                row = existing.get((team1, team2))
+                if row is None:
+                    db.session.add(WinProbability(
+                        team1=team1,
+                        team2=team2,
+                        probability=float(prob),
+                        created_date=current_time
+                    ))
+                elif row.probability != float(prob):
+                    row.probability = float(prob)
+        db.session.flush()
+
+        # 값이 같은 쌍도 이번 갱신에서 확인된 것이므로 신선도 시각은 한 번의 UPDATE로 모두 갱신
+        # (재시작 시 복원 여부는 가장 오래된 created_date로 판단)
+        db.session.query(WinProbability).update({WinProbability.created_date: current_time},
+                                                synchronize_session=False)
+
+        db.session.commit()
 
+    except Exception as e:
+        db.session.rollback()
+        raise RuntimeError(f"DB 저장 실패: {str(e)}")
+    finally:
+        db.session.close()
+
+
+def save_season_win_probability(season, win_probability_df):
+    """시즌별 승률 매트릭스 DB 저장 (해당 시즌 행 교체)"""
+    current_time = datetime.datetime.utcnow()
+    try:
+        SeasonWinProbability.__table__.create(db.engine, checkfirst=True)
+        db.session.query(SeasonWinProbability).filter(SeasonWinProbability.season == season).delete()
+
+        rows = win_probability_df.stack()
+        db.session.bulk_save_objects([
+            SeasonWinProbability(season=season, team1=team1, team2=team2, probability=float(prob),
+                                 created_date=current_time)
+            for (team1, team2), prob in rows.items() if prob != '-'
+        ])
         db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise RuntimeError(f"DB 저장 실패: {str(e)}")
+    finally:
+        db.session.close()
+
+
+def save_win_probability_ci(ci):
+    """승률 신뢰구간 DB 저장 (전체 교체, 재시작 시 같은 스냅샷의 구간만 복원)"""
+    current_time = datetime.datetime.utcnow()
+    try:
+        WinProbabilityInterval.__table__.create(db.engine, checkfirst=True)
+        db.session.query(WinProbabilityInterval).delete()
 
+        high = ci['high'].stack()
+        db.session.bulk_save_objects([
+            WinProbabilityInterval(team1=team1, team2=team2, low=float(low), high=float(high[(team1, team2)]),
+                                   level=ci['level'], samples=ci['samples'], created_date=current_time)
+            for (team1, team2), low in ci['low'].stack().items() if low != '-'
+        ])
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
         raise RuntimeError(f"DB 저장 실패: {str(e)}")
     finally:
         db.session.close()
 
+
+def _matrix_from_rows(rows):
+    """(team1, team2, probability) 행으로 승률 매트릭스 생성 (대각선은 '-')"""
+    teams = sorted({r.team1 for r in rows} | {r.team2 for r in rows})
+    win_probability_df = pd.DataFrame(index=teams, columns=teams)
+    for r in rows:
+        win_probability_df.loc[r.team1, r.team2] = round(float(r.probability), 2)
+    for team in teams:
+        win_probability_df.loc[team, team] = '-'
     return win_probability_df
 
-# predictor.py 내 get_win_probability_df 함수 수정
-def get_win_probability_df(cached_data):
+
+def get_season_win_probability_df(cached_data, season):
+    """시즌별 승률 매트릭스 조회 (캐시 -> DB 순, 없으면 None)"""
+    if season == current_season():
+        return get_win_probability_df(cached_data)
+
+    seasons = cached_data.setdefault('seasons', {})
+    if season not in seasons:
+        SeasonWinProbability.__table__.create(db.engine, checkfirst=True)
+        rows = db.session.query(
+            SeasonWinProbability.team1,
+            SeasonWinProbability.team2,
+            SeasonWinProbability.probability
+        ).filter(SeasonWinProbability.season == season).all()
+        if not rows:
+            return None
+        seasons[season] = _matrix_from_rows(rows)
+
+    return seasons[season]
+
+
+def load_win_probability_df_from_db(max_age_hours=None):
+    """DB에 저장된 승률 행으로 승률 매트릭스 복원 (신선도 정책을 벗어나면 None)"""
+    if max_age_hours is None:
+        max_age_hours = float(os.getenv('WIN_PROB_MAX_AGE_HOURS', 24))
+
+    # 필요한 컬럼만 한 번에 조회
+    rows = db.session.query(
+        WinProbability.team1,
+        WinProbability.team2,
+        WinProbability.probability,
+        WinProbability.created_date
+    ).all()
+
+    if not rows:
+        return None, None
+
+    oldest = min(r.created_date for r in rows)
+    if datetime.datetime.utcnow() - oldest > datetime.timedelta(hours=max_age_hours):
+        return None, oldest
+
+    win_probability_df = _matrix_from_rows(rows)
+
+    # 일부 쌍이 비어있으면 완전한 매트릭스가 아니므로 재계산 필요
+    if win_probability_df.isna().any().any():
+        return None, oldest
+
+    return win_probability_df, oldest
+
+
+def load_win_probability_ci_from_db(win_probability_df, snapshot_time):
+    """DB의 신뢰구간 복원 (스냅샷보다 먼저 저장된 구간이거나 팀 구성이 다르면 None)"""
+    WinProbabilityInterval.__table__.create(db.engine, checkfirst=True)
+    rows = db.session.query(WinProbabilityInterval).all()
+    # 구간은 같은 갱신에서 스냅샷 저장 뒤에 저장되므로, 더 이른 구간은 이전 스냅샷의 것
+    if not rows or min(r.created_date for r in rows) < snapshot_time:
+        return None
+
+    def matrix(column):
+        return _matrix_from_rows(db.session.query(
+            WinProbabilityInterval.team1,
+            WinProbabilityInterval.team2,
+            column.label('probability')
+        ).all())
+
+    low, high = matrix(WinProbabilityInterval.low), matrix(WinProbabilityInterval.high)
+    if low.index.tolist() != sorted(win_probability_df.index) or low.isna().any().any():
+        return None
+    return {'low': low, 'high': high, 'samples': rows[0].samples, 'level': rows[0].level,
+            'source': win_probability_df}
+
+
+def _utc_to_local(value):
+    """DB의 naive UTC 시각을 캐시의 갱신 시각과 같은 naive 로컬 시각으로 변환"""
+    return value.replace(tzinfo=datetime.timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def warm_start_cache(cached_data):
+    """재시작된 워커가 DB의 승률 데이터로 캐시를 즉시 채움 (앱 컨텍스트 필요)"""
+    win_prob_df, updated_at = load_win_probability_df_from_db()
+    if win_prob_df is None:
+        return False
+
+    # created_date는 UTC, last_update는 자정 강제 갱신 판단에 로컬 시각으로 비교됨
+    last_update = _utc_to_local(updated_at)
+    cached_data.update({
+        'win_probability_df': win_prob_df,
+        'last_update': last_update,
+        'next_update': last_update + datetime.timedelta(hours=24)
+    })
+    get_matrix_payloads(cached_data, win_prob_df, current_season())
+
+    # 불확실성 모드: 스냅샷과 함께 저장된 신뢰구간도 복원
+    cached_data['win_probability_ci'] = None
+    if uncertainty.BOOTSTRAP_ENABLED:
+        try:
+            cached_data['win_probability_ci'] = load_win_probability_ci_from_db(win_prob_df, updated_at)
+        except Exception as e:
+            print(f"⚠️ 신뢰구간 복원 실패: {str(e)}")
+    return True
+
+def _delta_aggregate_store(cached_data, hitter, pitcher):
+    """두 역할 모두 직전 스냅샷 대비 변경 행만 처리되었으면 직전 집계에 변경분만 반영 (아니면 None)"""
+    base_store = cached_data.get('team_aggregates')
+    if base_store is None:
+        return None
+
+    frames = {'hitter': (cached_data.get('hitter_data'), hitter), 'pitcher': (cached_data.get('pitcher_data'), pitcher)}
+    for previous, current in frames.values():
+        delta = current.attrs.get('delta')
+        if previous is None or delta is None or delta['base'] != previous.attrs.get('snapshot_id'):
+            return None
+
+    store = base_store.copy()
+    for role, (previous, current) in frames.items():
+        delta = current.attrs['delta']
+        store.apply_delta(role, removed=previous.iloc[delta['removed']], added=current.iloc[delta['added']])
+    return store
+
+
+def update_cached_predictions(cached_data, hitter, pitcher):
+    """처리된 데이터로 팀 집계, 선수 인덱스, 승률 매트릭스를 만들고 캐시 갱신"""
+    # 시즌/팀별 집계는 갱신 시 한 번만 만들고 매트릭스와 인덱스가 공유
+    aggregate_store = _delta_aggregate_store(cached_data, hitter, pitcher)
+    if aggregate_store is None:
+        aggregate_store = TeamAggregateStore.from_frames(hitter, pitcher)
+    win_probability_df = generate_win_probability_df(hitter, pitcher, aggregate_store)
+
     current_time = datetime.datetime.now()
+    cached_data.update({
+        'hitter_data': hitter,
+        'pitcher_data': pitcher,
+        'team_aggregates': aggregate_store,
+        'player_index': build_player_index(hitter, pitcher, aggregate_store=aggregate_store),
+        'win_probability_df': win_probability_df,
+        'season': current_season(),
+        'fingerprint': {
+            'hitter': hitter.attrs.get('fingerprint'),
+            'pitcher': pitcher.attrs.get('fingerprint')
+        },
+        'last_update': current_time,
+        'next_update': current_time + datetime.timedelta(hours=24)
+    })
+    # 매트릭스 응답 바이트는 스냅샷마다 한 번만 직렬화
+    get_matrix_payloads(cached_data, win_probability_df, current_season())
 
-    # 강제 업데이트 조건 (00:00~00:04)
-    force_update = current_time.hour == 0 and current_time.minute < 5
+    # 불확실성 모드: 스냅샷 옆에 부트스트랩 신뢰구간 저장
+    cached_data['win_probability_ci'] = None
+    if uncertainty.BOOTSTRAP_ENABLED:
+        try:
+            ci = uncertainty.compute_win_probability_ci(hitter, pitcher, current_season())
+            if ci is not None:
+                save_win_probability_ci(ci)
+                cached_data['win_probability_ci'] = dict(ci, source=win_probability_df)
+        except Exception as e:
+            print(f"⚠️ 신뢰구간 계산 실패: {str(e)}")
+    return win_probability_df
+
+
+def _apply_active_model(kind, processed):
+    """모델 레지스트리 serve 모드에서 처리 결과의 모델 버전이 활성 버전과 다르면 활성 버전으로 다시 예측"""
+    if model_registry.REGISTRY_MODE != 'serve' or processed is None:
+        return processed
+    serving = model_registry.get_serving_model(kind)
+    if serving is None or processed.attrs.get('model_version') == serving.version:
+        return processed
+    print(f"🔄 {kind} 예측값을 활성 모델로 다시 계산: {processed.attrs.get('model_version')} -> {serving.version}")
+    return serving.repredict(processed)
+
+
+def _active_versions_changed(cached_data):
+    """active.json의 활성 버전이 캐시된 처리 결과의 모델 버전과 다른지 (포인터 파일만 읽고 잠금/모델 로드 없음)"""
+    for kind in ('hitter', 'pitcher'):
+        version = model_registry.get_active_version(kind)
+        if version is not None and cached_data[f'{kind}_data'].attrs.get('model_version') != version:
+            return True
+    return False
+
+
+def apply_active_models(cached_data):
+    """승격/롤백된 활성 모델을 재시작 없이 반영: 캐시된 처리 결과로 다시 예측하고 캐시/DB 갱신 (앱 컨텍스트 필요)
+
+    반환: True(반영함), False(바꿀 것 없음 또는 캐시된 처리 결과 없음), None(다른 갱신 진행 중)
+    """
+    if cached_data.get('hitter_data') is None or cached_data.get('pitcher_data') is None:
+        return False
+    # 요청마다 호출되므로 버전이 같으면 갱신 잠금(DB 커넥션)을 잡지 않음
+    if model_registry.REGISTRY_MODE != 'serve' or not _active_versions_changed(cached_data):
+        return False
+
+    with refresh_guard(refresh_window(), dedupe=False) as acquired:
+        # 진행 중인 갱신은 캐시 갱신 직전에 활성 버전을 다시 확인하므로 그쪽에서 반영됨
+        if not acquired:
+            return None
+        hitter = _apply_active_model('hitter', cached_data['hitter_data'])
+        pitcher = _apply_active_model('pitcher', cached_data['pitcher_data'])
+        if hitter is cached_data['hitter_data'] and pitcher is cached_data['pitcher_data']:
+            return False
+        update_cached_predictions(cached_data, hitter, pitcher)
+        return True
+
+
+# 다른 워커/CLI에서 바뀐 활성 모델을 확인하는 최소 간격 (초)
+MODEL_SYNC_INTERVAL = float(os.getenv('KBO_MODEL_SYNC_SECONDS', 10))
+
+
+def sync_active_models(cached_data):
+    """요청 처리 전 활성 모델 변경 확인 (serve 모드, MODEL_SYNC_INTERVAL마다 최대 1회)"""
+    if model_registry.REGISTRY_MODE != 'serve':
+        return
+    now = datetime.datetime.now()
+    checked_at = cached_data.get('model_sync_at')
+    if checked_at is not None and (now - checked_at).total_seconds() < MODEL_SYNC_INTERVAL:
+        return
+    cached_data['model_sync_at'] = now
+    try:
+        apply_active_models(cached_data)
+    except Exception as e:
+        print(f"⚠️ 활성 모델 반영 실패: {str(e)}")
+
+
+def get_win_probability_ci(cached_data, team1, team2):
+    """현재 스냅샷의 두 팀 승률 신뢰구간. 반환: (하한, 상한) 또는 None"""
+    ci = cached_data.get('win_probability_ci')
+    if ci is None or ci['source'] is not cached_data.get('win_probability_df'):
+        return None
+    if team1 not in ci['low'].index or team2 not in ci['low'].index:
+        return None
+    return float(ci['low'].loc[team1, team2]), float(ci['high'].loc[team1, team2])
+
+def refresh_elo(cached_data):
+    """체크포인트 이후 경기 결과만 Elo 레이팅에 반영 (실패해도 점수 모델 갱신에는 영향 없음)"""
+    try:
+        applied = elo.refresh_elo(cached_data)
+        print(f"🏟️ Elo 레이팅 갱신: 새 경기 {applied}개")
+    except Exception as e:
+        print(f"⚠️ Elo 레이팅 갱신 실패: {str(e)}")
+
+
+def get_elo_win_probability_df(cached_data):
+    """Elo 레이팅 기반 승률 매트릭스 (캐시가 없으면 체크포인트에서 복원)"""
+    if cached_data.get('elo_win_probability_df') is None:
+        ratings = elo.load_checkpoint()
+        if not ratings.ratings:
+            raise ValueError("Elo 레이팅이 없습니다. 경기 결과 반영 후 다시 시도하세요.")
+        cached_data['elo_win_probability_df'] = ratings.win_probability_matrix()
+        cached_data['elo_last_date'] = ratings.last_date
+    return cached_data['elo_win_probability_df']
+
+
+# 전체 갱신용 서킷 브레이커 이름
+REFRESH_BREAKER = 'refresh'
+
+
+def _crawl_retries():
+    return int(os.getenv('KBO_CRAWL_RETRIES', 2))
+
+
+def _crawl_hitter():
+    """타자 수집 (실패 시 마지막 정상 데이터 사용)"""
+    return fetch_with_fallback('crawl_hitter', crawl_hitter_data, retries=_crawl_retries())
+
+
+def _crawl_pitcher():
+    """투수 수집 (실패 시 마지막 정상 데이터 사용)"""
+    return fetch_with_fallback('crawl_pitcher', crawl_pitcher_data, retries=_crawl_retries())
+
+
+def _load_hitter_history():
+    return load_historical_data()[0]
+
+
+def _load_pitcher_history():
+    return load_historical_data()[1]
+
+
+def _commit_processed(cached_data, hitter, pitcher):
+    """처리 스테이지 출력 (처리 결과, 학습 산출물) 반영. 웹 프로세스의 학습 산출물은 여기서만 교체"""
+    (hitter_data, hitter_artifacts), (pitcher_data, pitcher_artifacts) = hitter, pitcher
+    data_processor.model_artifacts['hitter'] = hitter_artifacts
+    data_processor.model_artifacts['pitcher'] = pitcher_artifacts
+    return update_cached_predictions(cached_data, _apply_active_model('hitter', hitter_data),
+                                     _apply_active_model('pitcher', pitcher_data))
+
+
+def refresh_predictions(cached_data, run_key=None):
+    """수집 -> 처리 -> 승률 계산을 DAG로 실행 (타자/투수 분기는 병렬, 앱 컨텍스트 필요)
+
+    run_key(예: 갱신 날짜)가 같으면 이전 실행에서 성공한 스테이지 출력을 재사용.
+    수집은 매번 다시 시도하며, 실패한 쪽은 마지막 정상 데이터로 대체
+    """
+    crawl_timeout = float(os.getenv('KBO_CRAWL_TIMEOUT', 120))
+    process_timeout = float(os.getenv('KBO_PROCESS_TIMEOUT', 600))
+
+    stages = [
+        # I/O 스테이지 (스레드). 수집 결과 내용이 같으면 후속 처리 스테이지는 캐시 재사용
+        Stage('crawl_hitter', _crawl_hitter, timeout=crawl_timeout, cache=False),
+        Stage('crawl_pitcher', _crawl_pitcher, timeout=crawl_timeout, cache=False),
+        Stage('hitter_history', _load_hitter_history),
+        Stage('pitcher_history', _load_pitcher_history),
+        # 처리 스테이지 (spawn 자식 프로세스: 시간 초과 시 종료되며, 결과와 학습 산출물을 반환값으로 넘김).
+        # 모델 레지스트리 serve 모드면 활성 버전으로 예측만 수행하고,
+        # 같은 모델로 만든 직전 처리 결과가 있으면 바뀐 선수 행만 다시 예측
+        Stage('process_hitter', partial(process_incremental_task, 'hitter', previous=cached_data.get('hitter_data')),
+              deps=['crawl_hitter', 'hitter_history'], kind='cpu', timeout=process_timeout),
+        Stage('process_pitcher', partial(process_incremental_task, 'pitcher', previous=cached_data.get('pitcher_data')),
+              deps=['crawl_pitcher', 'pitcher_history'], kind='cpu', timeout=process_timeout),
+        # DB 저장 및 캐시 갱신 (앱 컨텍스트가 있는 호출 스레드). 처리 중에 승격된 모델이 있으면 여기서 반영
+        Stage('update_predictions', partial(_commit_processed, cached_data),
+              deps=['process_hitter', 'process_pitcher'], kind='main', cache=False),
+    ]
+
+    results, errors = run_stages(stages, run_key=run_key)
+    if errors:
+        details = ', '.join(f"{name}: {str(e)}" for name, e in errors.items())
+        raise RuntimeError(f"데이터 갱신 실패 ({details})")
+
+    return results['update_predictions']
+
+
+def run_refresh(cached_data, run_key=None, force=False, dedupe=True, override=False):
+    """서킷 브레이커와 프로세스 간 갱신 잠금을 거쳐 갱신 실행 (앱 컨텍스트 필요). 반환: 성공 여부
+
+    run_key는 갱신 창(기본: KST 오늘 날짜). 다른 곳에서 갱신 중이면 기다리지 않고 바로 돌아가며,
+    dedupe=True면 이미 끝난 창은 건너뜀 (자정 갱신 후 같은 창에 들어온 GitHub Action 호출 포함).
+    force=True(자정 갱신, 강제 갱신)면 차단 중이어도 실행하고, 성공하면 창을 완료로 기록.
+    override=True는 운영자가 직접 요청한 재실행에만 사용하며 끝난 창이어도 다시 실행
+    """
+    breaker = get_breaker(REFRESH_BREAKER)
+    if not force and not breaker.allow():
+        print(f"⏸️ 갱신 차단 중 (재시도: {breaker.open_until:%Y-%m-%d %H:%M:%S})")
+        return False
+
+    window = run_key or refresh_window()
+    with refresh_guard(window, dedupe=dedupe and not override) as acquired:
+        if not acquired:
+            return False
+
+        try:
+            refresh_predictions(cached_data, run_key=window)
+        except Exception as e:
+            breaker.record_failure(e)
+            print(f"⚠️ 데이터 갱신 실패 (다음 재시도: {breaker.open_until:%Y-%m-%d %H:%M:%S}): {str(e)}")
+            return False
+
+        breaker.record_success()
+        # 요청 처리 중/재시도 갱신은 완료로 기록하지 않음 (자정 갱신이 건너뛰어지지 않도록).
+        # 일부 소스가 마지막 정상 데이터면 재시도가 필요하므로 역시 기록하지 않음
+        if force and not is_using_fallback():
+            mark_window_done(window)
+        return True
+
+
+def needs_retry():
+    """백그라운드 재시도 필요 여부 (갱신 실패 또는 일부 소스가 마지막 정상 데이터 사용 중)"""
+    breaker = get_breaker(REFRESH_BREAKER)
+    return (breaker.failures > 0 or is_using_fallback()) and breaker.allow()
+
+
+# 캐시가 비었을 때 진행 중인 갱신을 기다리는 최대 시간 (초)
+REFRESH_WAIT_TIMEOUT = float(os.getenv('KBO_REFRESH_WAIT_TIMEOUT', 30))
+
+
+def _refresh_state(cached_data, current_time):
+    """반환: (캐시 없음 여부, 강제 갱신 필요 여부)"""
+    # 강제 업데이트 조건 (00:00~00:04, 오늘 자정 이후 아직 갱신되지 않은 경우)
+    midnight = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    last_update = cached_data.get('last_update')
+    force_update = (current_time.hour == 0 and current_time.minute < 5 and
+                    (last_update is None or last_update < midnight))
 
     # 캐시 유효성 검사 (DataFrame 존재 여부 + empty 체크)
     win_prob_df = cached_data.get('win_probability_df')
-    if (win_prob_df is None or
-            (isinstance(win_prob_df, pd.DataFrame) and win_prob_df.empty) or
-            force_update):
+    missing = win_prob_df is None or (isinstance(win_prob_df, pd.DataFrame) and win_prob_df.empty)
+    return missing, force_update
+
+
+def _refresh_for_request(cached_data, current_time):
+    """요청 처리 중 캐시 복원/갱신 (동시 요청 중 한 요청만 실행)"""
+    # 앞선 갱신이 끝난 직후 들어온 요청이면 다시 갱신하지 않음
+    missing, force_update = _refresh_state(cached_data, current_time)
+    if not missing and not force_update:
+        return
+
+    # 재시작 직후에는 DB에 저장된 승률로 먼저 복원 시도
+    if missing and not force_update:
+        try:
+            if warm_start_cache(cached_data):
+                print("♻️ DB 저장 승률로 캐시 복원")
+                return
+        except Exception as e:
+            print(f"⚠️ DB 캐시 복원 실패: {str(e)}")
+
+    # 실패한 갱신은 요청 처리 중에 재시도하지 않음 (백그라운드 작업이 재시도)
+    if get_breaker(REFRESH_BREAKER).failures == 0:
         print("🔁 데이터 새로고침 시작...")
+        # 이 워커에 데이터가 없으면 이미 끝난 창이어도 직접 계산
+        run_refresh(cached_data, dedupe=not missing)
 
-        # 데이터 수집
-        hitter = process_hitter_data(
-            crawl_hitter_data(),
-            load_historical_data()[0]
-        )
-        pitcher = process_pitcher_data(
-            crawl_pitcher_data(),
-            load_historical_data()[1]
-        )
-
-        # 계산 및 캐시 업데이트
-        cached_data.update({
-            'win_probability_df': generate_win_probability_df(hitter, pitcher),
-            'last_update': current_time,
-            'next_update': current_time + datetime.timedelta(hours=24)
-        })
 
-    return cached_data['win_probability_df']
+def get_win_probability_df(cached_data):
+    """현재 승률 매트릭스. 캐시가 없거나 강제 갱신 시간대면 갱신 후 반환
+
+    동시 요청은 하나의 갱신으로 합쳐짐: 기존 스냅샷이 있으면 다른 요청은 바로 기존 스냅샷을,
+    없으면 진행 중인 갱신을 최대 REFRESH_WAIT_TIMEOUT초 기다림
+    """
+    current_time = datetime.datetime.now()
+    missing, force_update = _refresh_state(cached_data, current_time)
+    win_prob_df = cached_data.get('win_probability_df')
+    if not missing and not force_update:
+        return win_prob_df
+
+    flight = get_single_flight(REFRESH_BREAKER)
+    breaker = get_breaker(REFRESH_BREAKER)
+    try:
+        flight.do('refresh', lambda: _refresh_for_request(cached_data, current_time),
+                  timeout=0 if not missing else REFRESH_WAIT_TIMEOUT)
+    except SingleFlightTimeout as e:
+        if not missing:
+            flight.record('stale_served')
+            return win_prob_df
+        raise CircuitOpenError(str(e))
+
+    win_prob_df = cached_data.get('win_probability_df')
+    if win_prob_df is None or (isinstance(win_prob_df, pd.DataFrame) and win_prob_df.empty):
+        raise CircuitOpenError(f"데이터 갱신 실패로 승률 데이터가 없습니다. 재시도 대기 중입니다. ({breaker.last_error})")
+
+    return win_prob_df
@@ -0,0 +1,127 @@
+import datetime
+import fcntl
+import os
+import socket
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import RefreshRun
+
+# 갱신 잠금 이름 (MySQL GET_LOCK)과 로컬 잠금 파일 위치
+LOCK_NAME = os.getenv('KBO_REFRESH_LOCK_NAME', 'kbo_refresh')
+LOCK_DIR = os.getenv('KBO_REFRESH_LOCK_DIR', os.path.join('data', 'locks'))
+# 갱신 창은 자정 갱신(00:00 Asia/Seoul) 기준 날짜. 서버 시간대(Render는 UTC)와 무관하게 계산 (KST는 서머타임 없음)
+KST = datetime.timezone(datetime.timedelta(hours=9), 'Asia/Seoul')
+
+
+class _MySQLLock:
+    """MySQL 세션 잠금 (GET_LOCK). 잠금을 잡은 커넥션을 갱신이 끝날 때까지 유지"""
+
+    def __init__(self, name):
+        self.name = name
+        self.conn = None
+
+    def acquire(self):
+        conn = db.engine.connect()
+        if conn.execute(text("SELECT GET_LOCK(:name, 0)"), {'name': self.name}).scalar() == 1:
+            self.conn = conn
+            return True
+        conn.close()
+        return False
+
+    def release(self):
+        try:
+            self.conn.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': self.name})
+        finally:
+            self.conn.close()
+            self.conn = None
+
+
+class _FileLock:
+    """로컬 잠금 파일 (flock). 같은 호스트의 워커/스레드 간에만 유효"""
+
+    def __init__(self, name):
+        self.path = os.path.join(LOCK_DIR, f"{name}.lock")
+        self.file = None
+
+    def acquire(self):
+        os.makedirs(LOCK_DIR, exist_ok=True)
+        f = open(self.path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self.file = f
+        return True
+
+    def release(self):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
+
+
+def refresh_window(now=None):
+    """현재 갱신 창 (KST 날짜, 예: '2025-05-01')"""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.astimezone(KST).date().isoformat()
+
+
+def _make_lock(name):
+    return _MySQLLock(name) if db.engine.dialect.name == 'mysql' else _FileLock(name)
+
+
+def _ensure_table():
+    RefreshRun.__table__.create(db.engine, checkfirst=True)
+
+
+def is_window_done(window):
+    """이 갱신 창에서 이미 갱신을 마쳤는지 여부"""
+    _ensure_table()
+    return db.session.query(RefreshRun.id).filter_by(refresh_window=window).first() is not None
+
+
+def mark_window_done(window):
+    """갱신 완료 기록 (같은 창의 다음 갱신 요청은 실행하지 않음)"""
+    _ensure_table()
+    try:
+        db.session.add(RefreshRun(refresh_window=window, host=f"{socket.gethostname()}:{os.getpid()}",
+                                  finished_date=datetime.datetime.utcnow()))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
+@contextmanager
+def refresh_guard(window, dedupe=True):
+    """갱신 실행 권한 (앱 컨텍스트 필요). True면 이 호출이 실행하고, False면 바로 돌아감
+
+    다른 프로세스/호스트가 갱신 중이거나 (dedupe=True일 때) 이 창의 갱신이 이미 끝났으면 False
+    """
+    lock = _make_lock(LOCK_NAME)
+    if not lock.acquire():
+        print(f"⏭️ 다른 곳에서 갱신 중이라 건너뜀 ({window})")
+        yield False
+        return
+
+    try:
+        # 잠금을 잡은 뒤 확인해야 먼저 끝난 갱신을 놓치지 않음
+        if dedupe and is_window_done(window):
+            print(f"⏭️ 이미 완료된 갱신 창이라 건너뜀 ({window})")
+            yield False
+        else:
+            yield True
+    finally:
+        lock.release()
+
+
+def is_refresh_running():
+    """다른 곳에서 갱신 중인지 여부 (잠금을 잡았다가 바로 놓아 확인)"""
+    lock = _make_lock(LOCK_NAME)
+    if lock.acquire():
+        lock.release()
+        return False
+    return True
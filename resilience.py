@@ -0,0 +1,245 @@
+import datetime
+import os
+import pickle
+import threading
+import time
+
+# 소스별 마지막 정상 데이터 저장 위치
+LKG_DIR = os.getenv('KBO_LKG_DIR', os.path.join('data', 'lkg'))
+BREAKER_BASE_DELAY = float(os.getenv('KBO_BREAKER_BASE_DELAY', 60))
+BREAKER_MAX_DELAY = float(os.getenv('KBO_BREAKER_MAX_DELAY', 3600))
+FETCH_RETRY_BACKOFF = float(os.getenv('KBO_FETCH_RETRY_BACKOFF', 2))
+
+
+class CircuitBreaker:
+    """연속 실패 시 지수 백오프로 호출을 차단하는 서킷 브레이커"""
+
+    def __init__(self, name, base_delay=None, max_delay=None):
+        self.name = name
+        self.base_delay = base_delay or BREAKER_BASE_DELAY
+        self.max_delay = max_delay or BREAKER_MAX_DELAY
+        self.failures = 0
+        self.open_until = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """차단 시간이 지났으면 호출 허용 (half-open)"""
+        with self._lock:
+            return self.open_until is None or datetime.datetime.now() >= self.open_until
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.open_until = None
+            self.last_error = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            delay = min(self.base_delay * 2 ** (self.failures - 1), self.max_delay)
+            self.open_until = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+            self.last_error = str(error)
+
+    def status(self):
+        return {
+            'state': 'open' if not self.allow() else 'closed',
+            'failures': self.failures,
+            'retry_at': self.open_until.isoformat() if self.open_until else None,
+            'last_error': self.last_error
+        }
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷 브레이커가 열려 있어 호출하지 않음"""
+
+
+class SingleFlightTimeout(RuntimeError):
+    """진행 중인 호출이 대기 시간 안에 끝나지 않음"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나로 합침 (첫 호출자만 실행하고 나머지는 그 결과를 기다림)"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        # leaders: 직접 실행, coalesced: 진행 중인 호출에 합류, timeouts: 대기 시간 초과, stale_served: 기존 스냅샷 반환
+        self.metrics = {'leaders': 0, 'coalesced': 0, 'timeouts': 0, 'stale_served': 0, 'errors': 0,
+                        'max_waiters': 0}
+
+    def record(self, metric):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def do(self, key, func, timeout=None):
+        """반환: (결과, 다른 호출 결과 공유 여부). timeout 초 안에 끝나지 않으면 SingleFlightTimeout (0이면 기다리지 않음)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.metrics['leaders'] += 1
+            else:
+                call.waiters += 1
+                self.metrics['coalesced'] += 1
+                self.metrics['max_waiters'] = max(self.metrics['max_waiters'], call.waiters)
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+                self.record('errors')
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        if not call.done.wait(timeout):
+            if timeout != 0:
+                self.record('timeouts')
+            raise SingleFlightTimeout(f"{self.name} 작업이 진행 중입니다. 잠시 후 다시 시도하세요.")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def status(self):
+        with self._lock:
+            return dict(self.metrics, in_flight=len(self._calls),
+                        waiting=sum(call.waiters for call in self._calls.values()))
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# 소스별 상태: 마지막 성공 시각, 대체 데이터 사용 여부
+_source_status = {}
+
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+_flights = {}
+
+
+def get_single_flight(name):
+    with _breakers_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def _lkg_path(source):
+    return os.path.join(LKG_DIR, f"{source}.pkl")
+
+
+def save_last_known_good(source, data):
+    """소스의 마지막 정상 데이터 저장 (임시 파일 후 교체)"""
+    os.makedirs(LKG_DIR, exist_ok=True)
+    path = _lkg_path(source)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'data': data, 'saved_at': datetime.datetime.now()}, f)
+    os.replace(tmp_path, path)
+
+
+def load_last_known_good(source):
+    """마지막 정상 데이터 로드. 반환: (데이터, 저장 시각) 또는 (None, None)"""
+    path = _lkg_path(source)
+    if not os.path.exists(path):
+        return None, None
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+    return snapshot['data'], snapshot['saved_at']
+
+
+def _fetch_with_retries(fetch, retries):
+    for attempt in range(retries + 1):
+        try:
+            return fetch()
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            print(f"⚠️ 재시도 ({attempt + 1}/{retries}): {str(e)}")
+            time.sleep(FETCH_RETRY_BACKOFF * (attempt + 1))
+
+
+def fetch_with_fallback(source, fetch, retries=0):
+    """fetch 성공 시 마지막 정상 데이터로 저장, 실패하거나 차단 중이면 마지막 정상 데이터 반환
+
+    재시도를 모두 소진한 실패만 서킷 브레이커에 기록
+    """
+    breaker = get_breaker(source)
+    error = None
+
+    if breaker.allow():
+        try:
+            data = _fetch_with_retries(fetch, retries)
+            breaker.record_success()
+            save_last_known_good(source, data)
+            _source_status[source] = {
+                'last_success': datetime.datetime.now(),
+                'using_fallback': False,
+                'error': None
+            }
+            return data
+        except Exception as e:
+            breaker.record_failure(e)
+            error = e
+    else:
+        error = CircuitOpenError(f"'{source}' 호출 차단 중 (재시도: {breaker.open_until:%Y-%m-%d %H:%M:%S})")
+
+    data, saved_at = load_last_known_good(source)
+    if data is None:
+        previous = _source_status.get(source, {})
+        _source_status[source] = {
+            'last_success': previous.get('last_success'),
+            'using_fallback': True,
+            'error': str(error)
+        }
+        raise error
+
+    print(f"⚠️ {source} 실패, 마지막 정상 데이터 사용 ({saved_at:%Y-%m-%d %H:%M:%S}): {str(error)}")
+    _source_status[source] = {
+        'last_success': saved_at,
+        'using_fallback': True,
+        'error': str(error)
+    }
+    return data
+
+
+def is_using_fallback():
+    """마지막 갱신에서 대체 데이터를 쓴 소스가 있는지 여부"""
+    return any(status['using_fallback'] for status in _source_status.values())
+
+
+def staleness_report():
+    """API 응답용 소스별 신선도 정보"""
+    now = datetime.datetime.now()
+    report = {}
+    for source, status in _source_status.items():
+        last_success = status['last_success']
+        report[source] = {
+            'last_success': last_success.isoformat() if last_success else None,
+            'age_seconds': int((now - last_success).total_seconds()) if last_success else None,
+            'stale': status['using_fallback'],
+            'error': status['error']
+        }
+    return report
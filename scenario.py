@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from scoring import ROLE_METRICS, build_win_probability_matrix
+
+# 시나리오 결과 LRU 캐시 크기
+SCENARIO_CACHE_SIZE = int(os.getenv('KBO_SCENARIO_CACHE_SIZE', 256))
+
+SCENARIO_ACTIONS = ('exclude', 'move')
+
+
+def canonical_edits(edits):
+    """편집 목록을 정규화 (순서 무관, 선수당 1건). 반환: 정렬된 편집 목록"""
+    if not isinstance(edits, list) or not edits:
+        raise ValueError("편집 목록을 제공해야 합니다. 예: [{\"action\": \"exclude\", \"player\": \"...\"}]")
+
+    canonical, seen = [], set()
+    for edit in edits:
+        if not isinstance(edit, dict) or edit.get('action') not in SCENARIO_ACTIONS:
+            raise ValueError(f"지원하지 않는 편집입니다. 지원 action: {', '.join(SCENARIO_ACTIONS)}")
+        if not edit.get('player'):
+            raise ValueError("편집마다 선수명(player)을 지정해야 합니다.")
+        if edit['action'] == 'move' and not edit.get('to'):
+            raise ValueError("move 편집에는 이동할 팀(to)을 지정해야 합니다.")
+
+        item = {'action': edit['action'], 'player': str(edit['player']).strip()}
+        for key in ('team', 'role', 'to'):
+            if edit.get(key):
+                item[key] = str(edit[key]).strip()
+
+        player_key = (item['player'], item.get('team'), item.get('role'))
+        if player_key in seen:
+            raise ValueError(f"'{item['player']}' 선수에 대한 편집이 중복되었습니다.")
+        seen.add(player_key)
+        canonical.append(item)
+
+    return sorted(canonical, key=lambda e: json.dumps(e, ensure_ascii=False, sort_keys=True))
+
+
+def edits_hash(edits):
+    raw = json.dumps(edits, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ScenarioEngine:
+    """기준 스냅샷의 팀 집계에서 선수 제외/이적을 증분 반영하여 승률 매트릭스를 재계산"""
+
+    def __init__(self, hitter_data, pitcher_data, aggregate_store, season):
+        self.season = int(season)
+        self.base_store = aggregate_store
+
+        # (역할, 선수명, 팀명) -> 해당 시즌 예측값 목록 (집계에 들어간 행 그대로)
+        self.player_values = {}
+        for role, df in (('hitter', hitter_data), ('pitcher', pitcher_data)):
+            season_df = df[df['연도'] == self.season]
+            for name, team, value in zip(season_df['선수명'], season_df['팀명'], season_df[ROLE_METRICS[role]]):
+                self.player_values.setdefault((role, name, team), []).append(float(value))
+        # 선수명 -> (역할, 선수명, 팀명) 키 목록
+        self.by_name = {}
+        for key in self.player_values:
+            self.by_name.setdefault(key[1], []).append(key)
+
+        self.base_victory_df, _ = aggregate_store.victory_df(self.season)
+        # 이동 대상으로 허용하는 팀 (기준 스냅샷 승률 매트릭스의 팀)
+        self.teams = sorted(self.base_victory_df['팀명'])
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _resolve(self, edit):
+        """편집 대상 선수의 (역할, 선수명, 팀명) 키 목록"""
+        keys = [key for key in self.by_name.get(edit['player'], [])
+                if ('team' not in edit or key[2] == edit['team'])
+                and ('role' not in edit or key[0] == edit['role'])]
+        if not keys:
+            raise ValueError(f"'{edit['player']}' 선수의 예측 데이터를 찾을 수 없습니다.")
+        if len({key[2] for key in keys}) > 1:
+            raise ValueError(f"'{edit['player']}' 선수가 여러 팀에 있습니다. 팀명(team)을 함께 지정하세요.")
+        return keys
+
+    def _resolve_all(self, edits):
+        """편집별 대상 키 확인. 반환: [(편집, 키 목록)]
+
+        이동할 팀이 없는 팀이거나 현재 소속 팀이면, 또는 여러 편집이 같은 선수 행을 가리키면 거부
+        """
+        resolved, claimed = [], set()
+        for edit in edits:
+            keys = self._resolve(edit)
+            if edit['action'] == 'move':
+                if edit['to'] not in self.teams:
+                    raise ValueError(f"'{edit['to']}'은(는) 유효한 팀 이름이 아닙니다. 유효한 팀 목록: {', '.join(self.teams)}")
+                if keys[0][2] == edit['to']:
+                    raise ValueError(f"'{edit['player']}' 선수는 이미 {edit['to']} 소속입니다.")
+
+            overlap = claimed.intersection(keys)
+            if overlap:
+                raise ValueError(f"'{edit['player']}' 선수에 대한 편집이 겹칩니다. 선수당 하나의 편집만 지정하세요.")
+            claimed.update(keys)
+            resolved.append((edit, keys))
+        return resolved
+
+    def _compute(self, edits):
+        store = self.base_store.copy(seasons={self.season})
+        for edit, keys in self._resolve_all(edits):
+            for role, name, team in keys:
+                for value in self.player_values[(role, name, team)]:
+                    store.remove(role, self.season, team, value)
+                    if edit['action'] == 'move':
+                        store.add(role, self.season, edit['to'], value)
+
+        victory_df, _ = store.victory_df(self.season)
+        if victory_df.empty:
+            raise ValueError("시나리오 적용 후 승률을 계산할 팀이 없습니다.")
+        win_probability_df = build_win_probability_matrix(victory_df['팀명'], victory_df['Adjusted_Score'])
+        return {'victory_df': victory_df, 'win_probability_df': win_probability_df}
+
+    def run(self, edits):
+        """편집 목록을 적용한 시나리오 결과 (정규화된 편집 해시로 캐시). 반환: (정규화된 편집, 결과)"""
+        edits = canonical_edits(edits)
+        key = edits_hash(edits)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return edits, self._cache[key]
+
+        result = self._compute(edits)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > SCENARIO_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return edits, result
+
+
+def get_scenario_engine(cached_data):
+    """현재 스냅샷의 시나리오 엔진 (스냅샷이 바뀌면 다시 생성, 선수 데이터가 없으면 None)"""
+    aggregate_store = cached_data.get('team_aggregates')
+    if aggregate_store is None or cached_data.get('hitter_data') is None:
+        return None
+
+    engine = cached_data.get('scenario_engine')
+    if engine is None or engine.base_store is not aggregate_store:
+        engine = ScenarioEngine(cached_data['hitter_data'], cached_data['pitcher_data'], aggregate_store,
+                                cached_data.get('season'))
+        cached_data['scenario_engine'] = engine
+    return engine
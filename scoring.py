@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# 최저 점수 팀도 양수가 되도록 더하는 여유값
+SCORE_MARGIN = 0.1
+
+# 역할별 팀 평균을 내는 예측 컬럼
+ROLE_METRICS = {'hitter': 'OPS_predict', 'pitcher': 'WHIP_predict'}
+
+
+class TeamAggregateStore:
+    """시즌/팀별 예측값 합계와 선수 수를 유지하는 저장소 (평균을 매번 groupby로 다시 계산하지 않음)"""
+
+    def __init__(self):
+        # {시즌: {역할: {팀명: [합계, 선수 수]}}}
+        self.seasons = {}
+
+    @classmethod
+    def from_frames(cls, all_hitter_data, all_pitcher_data):
+        """처리된 타자/투수 데이터로 시즌별 파티션 생성 (갱신 시 1회)"""
+        store = cls()
+        for role, df in (('hitter', all_hitter_data), ('pitcher', all_pitcher_data)):
+            metric = ROLE_METRICS[role]
+            grouped = df.groupby(['연도', '팀명'])[metric].agg(['sum', 'count'])
+            for (season, team), (total, count) in zip(grouped.index, grouped.to_numpy()):
+                role_sums = store.seasons.setdefault(int(season), {'hitter': {}, 'pitcher': {}})[role]
+                role_sums[team] = [float(total), int(count)]
+        return store
+
+    def copy(self, seasons=None):
+        """시나리오 계산용 복사본 (팀 수에 비례). seasons를 지정하면 해당 시즌만 복사"""
+        store = TeamAggregateStore()
+        store.seasons = {
+            season: {role: {team: list(agg) for team, agg in teams.items()} for role, teams in roles.items()}
+            for season, roles in self.seasons.items()
+            if seasons is None or season in seasons
+        }
+        return store
+
+    def add(self, role, season, team, value):
+        """선수 1명의 예측값 추가 (NaN은 pandas 평균과 같이 제외)"""
+        if value is None or np.isnan(value):
+            return
+        role_sums = self.seasons.setdefault(int(season), {'hitter': {}, 'pitcher': {}})[role]
+        agg = role_sums.setdefault(team, [0.0, 0])
+        agg[0] += value
+        agg[1] += 1
+
+    def remove(self, role, season, team, value):
+        """선수 1명의 예측값 제거"""
+        if value is None or np.isnan(value):
+            return
+        role_sums = self.seasons[int(season)][role]
+        agg = role_sums[team]
+        agg[0] -= value
+        agg[1] -= 1
+        if agg[1] <= 0:
+            del role_sums[team]
+
+    def apply_delta(self, role, removed=None, added=None):
+        """변경된 선수 행만 반영 (O(변경 행 수)). removed/added는 연도, 팀명, 예측 컬럼을 가진 DataFrame"""
+        metric = ROLE_METRICS[role]
+        if removed is not None:
+            for season, team, value in zip(removed['연도'], removed['팀명'], removed[metric]):
+                self.remove(role, season, team, value)
+        if added is not None:
+            for season, team, value in zip(added['연도'], added['팀명'], added[metric]):
+                self.add(role, season, team, value)
+
+    def victory_df(self, season):
+        """시즌별 팀 OPS/WHIP 평균과 보정 점수 계산 (O(팀 수)). 반환: victory_df, adjustment"""
+        roles = self.seasons.get(int(season), {'hitter': {}, 'pitcher': {}})
+        # 두 역할 모두 기록이 있는 팀만 (기존 merge와 동일하게 팀명 순 정렬)
+        teams = sorted(set(roles['hitter']) & set(roles['pitcher']))
+
+        whip = np.array([roles['pitcher'][t][0] / roles['pitcher'][t][1] for t in teams], dtype=float)
+        ops = np.array([roles['hitter'][t][0] / roles['hitter'][t][1] for t in teams], dtype=float)
+
+        victory_df = pd.DataFrame({'팀명': teams, 'WHIP_predict': whip, 'OPS_predict': ops})
+        victory_df['OPS_minus_WHIP'] = victory_df['OPS_predict'] - victory_df['WHIP_predict']
+        adjustment = abs(victory_df['OPS_minus_WHIP'].min()) + SCORE_MARGIN
+        victory_df['Adjusted_Score'] = victory_df['OPS_minus_WHIP'] + adjustment
+
+        return victory_df, adjustment
+
+
+def compute_victory_df(all_hitter_data, all_pitcher_data, season, aggregate_store=None):
+    """시즌별 팀 OPS/WHIP 예측 평균과 보정 점수 계산 (반환: victory_df, adjustment)"""
+    if aggregate_store is None:
+        aggregate_store = TeamAggregateStore.from_frames(all_hitter_data, all_pitcher_data)
+    return aggregate_store.victory_df(season)
+
+
+def build_win_probability_matrix(teams, scores):
+    """보정 점수로 팀 간 승률(%) 매트릭스 계산 (브로드캐스트, 대각선은 '-')"""
+    scores = np.asarray(scores, dtype=float)
+    probabilities = np.round(scores[:, None] / (scores[:, None] + scores[None, :]) * 100, 2)
+
+    values = probabilities.astype(object)
+    np.fill_diagonal(values, '-')
+
+    return pd.DataFrame(values, index=list(teams), columns=list(teams))
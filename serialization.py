@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import io
+import json
+
+import numpy as np
+import pyarrow as pa
+
+# 선택 의존성: 설치되어 있을 때만 해당 형식/압축 제공
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MATRIX_FORMATS = {
+    'json': 'application/json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'msgpack': 'application/msgpack'
+}
+
+
+def available_formats():
+    """설치된 라이브러리 기준으로 제공 가능한 형식"""
+    return [fmt for fmt in MATRIX_FORMATS if fmt != 'msgpack' or msgpack is not None]
+
+
+def available_encodings():
+    """선호 순서대로 제공 가능한 압축 방식"""
+    return (['br'] if brotli is not None else []) + ['gzip', 'identity']
+
+
+def matrix_arrays(win_probability_df):
+    """승률 매트릭스를 팀 목록과 float 매트릭스로 변환 (대각선은 NaN)"""
+    teams = [str(team) for team in win_probability_df.index]
+    values = win_probability_df.to_numpy(dtype=object)
+    values = np.where(values == '-', np.nan, values).astype(float)
+    return teams, values
+
+
+def _encode_json(teams, values, meta):
+    flat = [None if np.isnan(v) else float(v) for v in values.ravel()]
+    payload = dict(meta, teams=teams, probabilities=flat)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _encode_arrow(teams, values, meta):
+    # 행: team, 열: 상대 팀별 승률 (대각선은 null)
+    columns = {'team': pa.array(teams, type=pa.string())}
+    for j, team in enumerate(teams):
+        columns[team] = pa.array(values[:, j], type=pa.float64(), from_pandas=True)
+    table = pa.table(columns).replace_schema_metadata({k: str(v) for k, v in meta.items() if v is not None})
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _encode_msgpack(teams, values, meta):
+    flat = [None if np.isnan(v) else float(v) for v in values.ravel()]
+    return msgpack.packb(dict(meta, teams=teams, probabilities=flat), use_bin_type=True)
+
+
+_ENCODERS = {'json': _encode_json, 'arrow': _encode_arrow, 'msgpack': _encode_msgpack}
+
+
+def _compress(body, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body)
+    return body
+
+
+def build_matrix_payloads(win_probability_df, season=None, updated_at=None):
+    """스냅샷 1개에 대해 형식별/압축별 응답 바이트를 미리 생성 (요청마다 인코딩하지 않음)"""
+    teams, values = matrix_arrays(win_probability_df)
+    meta = {
+        'season': season,
+        'updated_at': updated_at.isoformat() if updated_at is not None else None
+    }
+
+    bodies = {fmt: _ENCODERS[fmt](teams, values, meta) for fmt in available_formats()}
+    etag = hashlib.sha1(bodies['json']).hexdigest()[:16]
+
+    return {
+        'source': win_probability_df,
+        'etag': etag,
+        'bodies': {
+            fmt: {encoding: _compress(body, encoding) for encoding in available_encodings()}
+            for fmt, body in bodies.items()
+        }
+    }
+
+
+def get_matrix_payloads(cached_data, win_probability_df, season, current=True):
+    """캐시된 스냅샷의 직렬화 결과 반환 (스냅샷이 바뀌었을 때만 다시 생성)
+
+    current=True는 서빙 중인 현재 스냅샷, False는 시즌별 조회 스냅샷
+    """
+    key = 'current' if current else season
+    payloads = cached_data.setdefault('matrix_payloads', {})
+    existing = payloads.get(key)
+    if existing is None or existing['source'] is not win_probability_df:
+        updated_at = cached_data.get('last_update') if current else None
+        existing = build_matrix_payloads(win_probability_df, season, updated_at)
+        payloads[key] = existing
+    return existing
@@ -0,0 +1,193 @@
+import hashlib
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 스테이지 출력 캐시: {캐시 키: 출력}. 같은 실행 키(run_key)에서 성공한 스테이지는 재실행하지 않음
+_stage_cache = {}
+_cache_run_key = {'value': None}
+
+RETRY_BACKOFF_SECONDS = float(os.getenv('KBO_STAGE_RETRY_BACKOFF', 2))
+
+
+class Stage:
+    """DAG 스테이지 정의
+
+    kind: 'io'(스레드), 'cpu'(전용 자식 프로세스, func는 pickle 가능해야 함), 'main'(호출 스레드에서 실행)
+    func는 deps 순서대로 선행 스테이지 출력을 인자로 받음
+    cpu 스테이지는 자식 프로세스에서 바뀐 전역 상태(학습 산출물 등)가 부모에 남지 않으므로 필요한 값은 반환해야 하며,
+    시간 초과 시 자식 프로세스를 종료함. io 스테이지는 시간 초과 시 결과만 버림 (스레드는 중단할 수 없음)
+    cache=False인 스테이지는 매번 실행하고, 후속 스테이지 캐시 키에는 출력 내용의 해시가 반영됨
+    """
+
+    def __init__(self, name, func, deps=(), kind='io', retries=0, timeout=None, cache=True):
+        if kind not in ('io', 'cpu', 'main'):
+            raise ValueError(f"지원하지 않는 스테이지 종류입니다: {kind}")
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.kind = kind
+        self.retries = retries
+        self.timeout = timeout
+        self.cache = cache
+
+
+class StageError(RuntimeError):
+    """스테이지 실패 (재시도 소진, 시간 초과, 선행 스테이지 실패)"""
+
+
+def _cache_key(stage, run_key, dep_keys):
+    raw = '|'.join([stage.name, str(run_key)] + [dep_keys[d] for d in stage.deps])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _content_key(name, value):
+    """캐시하지 않는 스테이지 출력의 내용 해시 (같은 내용이면 후속 스테이지 캐시 재사용)"""
+    digest = hashlib.sha1(name.encode('utf-8'))
+    try:
+        import pandas as pd
+        if isinstance(value, pd.DataFrame):
+            digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+            digest.update(','.join(map(str, value.columns)).encode('utf-8'))
+        else:
+            digest.update(pickle.dumps(value))
+    except Exception:
+        digest.update(str(id(value)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _submit_process(func, args):
+    """전용 자식 프로세스에서 실행 (spawn: 스레드가 있는 웹 워커/스케줄러를 fork하지 않음). 반환: (future, 프로세스 풀)"""
+    pool = multiprocessing.get_context('spawn').Pool(processes=1)
+    future = Future()
+    pool.apply_async(func, args, callback=future.set_result, error_callback=future.set_exception)
+    pool.close()
+    return future, pool
+
+
+def run_stages(stages, run_key=None, max_threads=None):
+    """의존 관계가 허용하는 만큼 스테이지를 병렬 실행. 반환: (출력 dict, 오류 dict)
+
+    run_key가 같은 실행에서 이미 성공한 스테이지는 캐시된 출력을 재사용하므로,
+    한쪽 분기가 실패해도 다시 실행할 때 다른 분기는 재계산하지 않음
+    """
+    stages = {stage.name: stage for stage in stages}
+    for stage in stages.values():
+        missing = [d for d in stage.deps if d not in stages]
+        if missing:
+            raise ValueError(f"'{stage.name}' 스테이지의 선행 스테이지가 없습니다: {', '.join(missing)}")
+
+    # 실행 키가 바뀌면 이전 실행의 캐시는 버림
+    if run_key is None or _cache_run_key['value'] != run_key:
+        _stage_cache.clear()
+        _cache_run_key['value'] = run_key
+
+    results, errors, keys = {}, {}, {}
+    attempts = {name: 0 for name in stages}
+    running = {}  # future -> (stage name, deadline)
+    pending = set(stages)
+
+    thread_pool = ThreadPoolExecutor(max_workers=max_threads or len(stages))
+    process_pools = {}  # cpu 스테이지 future -> 자식 프로세스 풀
+    try:
+        while pending or running:
+            # 선행 스테이지가 실패한 스테이지는 건너뜀
+            for name in sorted(pending):
+                failed = [d for d in stages[name].deps if d in errors]
+                if failed:
+                    errors[name] = StageError(f"선행 스테이지 실패: {', '.join(failed)}")
+                    pending.discard(name)
+
+            ready = [name for name in sorted(pending) if all(d in results for d in stages[name].deps)]
+            for name in ready:
+                stage = stages[name]
+                pending.discard(name)
+                if stage.cache:
+                    keys[name] = _cache_key(stage, run_key, keys)
+                    if run_key is not None and keys[name] in _stage_cache:
+                        results[name] = _stage_cache[keys[name]]
+                        print(f"♻️ 스테이지 캐시 사용: {name}")
+                        continue
+
+                args = [results[d] for d in stage.deps]
+                if stage.kind == 'main':
+                    _run_inline(stage, args, results, errors, attempts)
+                    if name in results:
+                        _store_result(stage, results[name], keys, run_key)
+                else:
+                    if stage.kind == 'cpu':
+                        future, process_pools[future] = _submit_process(stage.func, args)
+                    else:
+                        future = thread_pool.submit(stage.func, *args)
+                    deadline = time.monotonic() + stage.timeout if stage.timeout else None
+                    running[future] = (name, deadline)
+                    attempts[name] += 1
+
+            if ready and not running:
+                continue
+            if not running:
+                break
+
+            deadlines = [d for _, d in running.values() if d is not None]
+            wait_timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            done, _ = wait(list(running), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, _ = running.pop(future)
+                stage = stages[name]
+                try:
+                    results[name] = future.result()
+                    _store_result(stage, results[name], keys, run_key)
+                except Exception as e:
+                    if attempts[name] <= stage.retries:
+                        print(f"⚠️ 스테이지 재시도 ({name}, {attempts[name]}/{stage.retries}): {str(e)}")
+                        time.sleep(RETRY_BACKOFF_SECONDS * attempts[name])
+                        pending.add(name)
+                    else:
+                        errors[name] = e
+
+            # 시간 초과 스테이지는 실패로 처리 (cpu 스테이지는 자식 프로세스 종료, 스레드는 결과를 버림)
+            now = time.monotonic()
+            for future, (name, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    running.pop(future)
+                    future.cancel()
+                    if future in process_pools:
+                        process_pools.pop(future).terminate()
+                    errors[name] = StageError(f"'{name}' 스테이지 시간 초과 ({stages[name].timeout}초)")
+    finally:
+        thread_pool.shutdown(wait=False, cancel_futures=True)
+        # 끝난 자식 프로세스는 회수하고, 오류로 중단된 경우 실행 중인 자식 프로세스도 종료
+        for pool in process_pools.values():
+            pool.terminate()
+
+    # 실행되지 못한 스테이지 (선행 실패 전파)
+    for name in pending:
+        errors[name] = StageError("선행 스테이지 실패")
+
+    return results, errors
+
+
+def _store_result(stage, value, keys, run_key):
+    """완료된 스테이지의 캐시 키 확정 및 출력 캐시"""
+    if not stage.cache:
+        keys[stage.name] = _content_key(stage.name, value)
+    elif run_key is not None:
+        _stage_cache[keys[stage.name]] = value
+
+
+def _run_inline(stage, args, results, errors, attempts):
+    """호출 스레드에서 실행해야 하는 스테이지 (예: 앱 컨텍스트가 필요한 DB 저장)"""
+    while True:
+        attempts[stage.name] += 1
+        try:
+            results[stage.name] = stage.func(*args)
+            return
+        except Exception as e:
+            if attempts[stage.name] > stage.retries:
+                errors[stage.name] = e
+                return
+            print(f"⚠️ 스테이지 재시도 ({stage.name}, {attempts[stage.name]}/{stage.retries}): {str(e)}")
+            time.sleep(RETRY_BACKOFF_SECONDS * attempts[stage.name])
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# 테스트는 로컬 SQLite와 임시 디렉터리만 사용 (운영 DB나 data/ 아래에 쓰지 않음)
+_tmp_dir = tempfile.mkdtemp(prefix='kbo_test_')
+os.environ.setdefault('DB_URI', f"sqlite:///{os.path.join(_tmp_dir, 'kbo_test.db')}")
+os.environ.setdefault('KBO_RESULT_CACHE', 'false')
+for name, sub_dir in [('KBO_CACHE_DIR', 'cache'), ('KBO_DELTA_DIR', 'delta'), ('KBO_HISTORY_DIR', 'history'),
+                      ('KBO_REFRESH_LOCK_DIR', 'locks'), ('KBO_MODEL_REGISTRY_DIR', 'registry'),
+                      ('KBO_MODEL_SELECTION_DIR', 'model_selection'), ('KBO_LKG_DIR', 'lkg')]:
+    os.environ.setdefault(name, os.path.join(_tmp_dir, sub_dir))
+os.environ.setdefault('KBO_ELO_CHECKPOINT', os.path.join(_tmp_dir, 'elo', 'checkpoint.json'))
+
+# 모듈이 저장소 최상위에 있으므로 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
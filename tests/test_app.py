@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+import app as app_module
+import predictor
+
+TEAMS = ['LG', 'KT']
+
+
+@pytest.fixture
+def client(monkeypatch):
+    matrix = pd.DataFrame([['-', 55.0], [45.0, '-']], index=TEAMS, columns=TEAMS)
+    monkeypatch.setattr(predictor, 'get_season_win_probability_df', lambda cached_data, season: matrix)
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('season', ['abc', '2024.5', 2024.5, True, [2024], {'year': 2024}])
+def test_predict_win_rate_rejects_non_integer_season(client, season):
+    response = client.post('/predict_win_rate', json={'team1': 'LG', 'team2': 'KT', 'season': season})
+    assert response.status_code == 400
+    assert '시즌' in response.get_json()['error']
+
+
+def test_predict_win_rate_rejects_non_integer_season_query(client):
+    response = client.post('/predict_win_rate?season=abc', json={'team1': 'LG', 'team2': 'KT'})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('season', [2024, '2024', 2024.0])
+def test_predict_win_rate_accepts_integer_season(client, season):
+    response = client.post('/predict_win_rate', json={'team1': 'LG', 'team2': 'KT', 'season': season})
+    assert response.status_code == 200
+    assert response.get_json()['season'] == 2024
+    assert response.get_json()['win_probability'] == 55.0
+
+
+def test_predict_win_rate_rejects_non_string_model(client):
+    response = client.post('/predict_win_rate', json={'team1': 'LG', 'team2': 'KT', 'model': 5})
+    assert response.status_code == 400
+
+
+def test_matrix_rejects_non_integer_season(client):
+    assert client.get('/matrix?season=abc').status_code == 400
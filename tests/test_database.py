@@ -0,0 +1,71 @@
+import pytest
+from flask import Flask
+from sqlalchemy import event, text
+
+from database import db, build_engine_options, warm_up_pool, get_pool_stats
+
+
+@pytest.fixture
+def sqlite_app(tmp_path):
+    """로컬 SQLite 파일 DB를 사용하는 최소 앱"""
+    app = Flask(__name__)
+    uri = f"sqlite:///{tmp_path / 'pool.db'}"
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(uri)
+    db.init_app(app)
+    with app.app_context():
+        yield app
+        db.engine.dispose()
+
+
+def test_engine_options_enable_pre_ping():
+    assert build_engine_options('sqlite:///x.db') == {'pool_pre_ping': True}
+
+    options = build_engine_options('mysql+pymysql://user:pw@host/db')
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] < 28800
+    assert options['connect_args']['connect_timeout'] == 10
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    monkeypatch.setenv('DB_POOL_SIZE', '8')
+    options = build_engine_options('postgresql://user:pw@host/db')
+    assert options['pool_pre_ping'] is False
+    assert options['pool_size'] == 8
+    assert 'connect_args' not in options
+
+
+def test_warm_up_pool_returns_connections_to_pool(sqlite_app):
+    assert warm_up_pool(3) == 3
+
+    stats = get_pool_stats()
+    assert stats['checkedout'] == 0
+    assert stats['checkedin'] == 3
+
+
+def test_warm_up_pool_default_size(sqlite_app, monkeypatch):
+    monkeypatch.setenv('DB_POOL_WARMUP', '2')
+    assert warm_up_pool() == 2
+    assert warm_up_pool(0) == 0
+
+
+def test_warmed_connections_are_reused(sqlite_app):
+    """예열 후 요청은 새 커넥션을 만들지 않고 풀의 커넥션을 재사용"""
+    warm_up_pool(1)
+    connects = []
+    event.listen(db.engine, 'connect', lambda *args: connects.append(1))
+
+    for _ in range(3):
+        with db.engine.connect() as conn:
+            assert conn.execute(text('SELECT 1')).scalar() == 1
+
+    assert connects == []
+    assert get_pool_stats()['checkedout'] == 0
+
+
+def test_pool_stats_reports_queue_pool(sqlite_app):
+    stats = get_pool_stats()
+    assert stats['pool_class'] == 'QueuePool'
+    assert 'status' in stats
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import delta
+import model_registry
+from crawler import load_historical_data
+from data_processor import process_hitter_data
+
+SEASON = 2024
+
+
+@pytest.fixture(scope='module')
+def trained_artifacts():
+    hitter_his, _ = load_historical_data(include_store=False)
+    artifacts = {}
+    process_hitter_data(hitter_his[hitter_his['연도'] == SEASON], hitter_his[hitter_his['연도'] != SEASON],
+                        final_backend='rf', use_cache=False, artifacts=artifacts)
+    return artifacts
+
+
+@pytest.fixture
+def serving(tmp_path, monkeypatch, trained_artifacts):
+    """임시 레지스트리에 활성 버전을 둔 serve 모드"""
+    monkeypatch.setattr(model_registry, 'REGISTRY_DIR', str(tmp_path / 'registry'))
+    monkeypatch.setattr(model_registry, 'REGISTRY_MODE', 'serve')
+    monkeypatch.setattr(model_registry, '_serving', {})
+    monkeypatch.setattr(delta, 'DELTA_DIR', str(tmp_path / 'delta'))
+    model_registry.register_version('hitter', trained_artifacts, activate=True)
+    return model_registry.get_serving_model('hitter')
+
+
+@pytest.fixture
+def frames():
+    hitter_his, _ = load_historical_data(include_store=False)
+    history = hitter_his[hitter_his['연도'] != SEASON].reset_index(drop=True)
+    crawl = hitter_his[hitter_his['연도'] == SEASON].reset_index(drop=True)
+
+    # 다음 크롤링: 선수 3명 빠짐, 2명 기록 변경, 1명 추가, 1명은 비율 지표가 정의되지 않음
+    changed = crawl.drop(index=[0, 5, 9]).reset_index(drop=True)
+    changed.loc[[1, 2], 'HR'] += 3
+    changed.loc[[1, 2], 'OPS'] += 0.05
+    changed.loc[3, 'OPS'] = np.nan
+    added = history[history['연도'] == SEASON - 1].iloc[[0]].assign(선수명='신인선수', 연도=SEASON)
+    changed = pd.concat([changed, added], ignore_index=True)
+    return history, crawl, changed
+
+
+def _assert_same(result, full):
+    assert result['선수명'].tolist() == full['선수명'].tolist()
+    np.testing.assert_allclose(result['OPS_predict'], full['OPS_predict'], rtol=0, atol=1e-12)
+
+
+def test_delta_matches_full_recompute(serving, frames):
+    history, crawl, changed = frames
+    previous = delta.process_incremental('hitter', crawl, history)
+    assert 'delta' not in previous.attrs
+
+    result = delta.process_incremental('hitter', changed, history, previous=previous)
+    assert result.attrs['delta']['inserted'] == 1
+    assert result.attrs['delta']['deleted'] == 3
+    assert result.attrs['delta']['updated'] >= 2
+    _assert_same(result, serving.process(changed, history))
+
+
+def test_rows_dropped_by_processing_fall_back_to_full_recompute(serving, frames, monkeypatch):
+    """처리 과정에서 행이 빠지면 행 위치가 어긋나므로 변경분 처리 대신 전체 재처리"""
+    history, crawl, changed = frames
+    crawl = crawl.copy()
+    crawl.loc[4, 'OPS'] = np.nan
+    process = model_registry.ServingModel.process
+
+    def dropping_process(self, current, history):
+        result = process(self, current, history)
+        kept = result[result['OPS'].notna()].reset_index(drop=True)
+        kept.attrs = result.attrs
+        return kept
+
+    monkeypatch.setattr(model_registry.ServingModel, 'process', dropping_process)
+    previous = delta.process_incremental('hitter', crawl, history)
+    assert len(previous) == len(history) + len(crawl) - 1
+
+    result = delta.process_incremental('hitter', changed, history, previous=previous)
+    assert 'delta' not in result.attrs
+    _assert_same(result, serving.process(changed, history))
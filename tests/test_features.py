@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from features import (add_hitter_features, add_pitcher_features, drop_undefined_rates, HITTER_DERIVED_COLUMNS,
+                      PITCHER_DERIVED_COLUMNS)
+from history_store import validate_history_batch
+
+
+def hitters():
+    return pd.DataFrame({'선수명': ['김타자', '대주자'], 'H': [30, 0], 'RBI': [10, 0], 'SAC': [1, 0],
+                         'AB': [100, 0], 'SF': [2, 0], 'TB': [45, 0]})
+
+
+def pitchers():
+    return pd.DataFrame({'선수명': ['정투수', '원포인트'], 'IP': ['20 1/3', '0'], 'H': [20, 2], 'BB': [5, 1],
+                         'WHIP': ['-', '-']})
+
+
+def test_hitter_zero_denominator_is_nan():
+    df = add_hitter_features(hitters())
+    assert np.isclose(df['OBP'][0], 41 / 113) and np.isclose(df['SLG'][0], 0.45)
+    assert df.loc[1, HITTER_DERIVED_COLUMNS].isna().all()
+
+
+def test_pitcher_whip_computed_and_zero_ip_is_nan():
+    df = add_pitcher_features(pitchers())
+    assert df['IP'][0] == 20 + 1 / 3
+    assert df['WHIP'][0] == round(25 / (20 + 1 / 3), 2)
+    assert np.isnan(df['WHIP'][1])
+    assert not {'K9', 'BB9', 'HR9'} & set(df.columns)
+
+
+def test_features_are_computed_once():
+    hitter_df = add_hitter_features(hitters())
+    pitcher_df = add_pitcher_features(pitchers())
+    assert add_hitter_features(hitter_df) is hitter_df
+    assert add_pitcher_features(pitcher_df) is pitcher_df
+
+
+def test_drop_undefined_rates():
+    df = drop_undefined_rates(add_pitcher_features(pitchers()), PITCHER_DERIVED_COLUMNS)
+    assert df['선수명'].tolist() == ['정투수']
+    assert df.index.tolist() == [0]
+
+
+def test_history_batch_recomputes_whip():
+    batch = pd.DataFrame([['정투수', 'LG', '3.00', '10', '1', '1', '0', '0', '0.5', '20 1/3', '20', '2', '5', '1',
+                           '15', '8', '7', '9.99', '2020']],
+                         columns=['선수명', '팀명', 'ERA', 'G', 'W', 'L', 'SV', 'HLD', 'WPCT', 'IP', 'H', 'HR', 'BB',
+                                  'HBP', 'SO', 'R', 'ER', 'WHIP', '연도'])
+    cleaned, dropped = validate_history_batch(batch, 'pitcher')
+    assert dropped == 0
+    assert cleaned['WHIP'][0] == round(25 / (20 + 1 / 3), 2)
+    assert cleaned.columns.tolist() == batch.columns.tolist()
@@ -0,0 +1,62 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_inference import FlatForest, PARALLEL_RTOL, benchmark_forest_inference
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.standard_normal((400, 6)), columns=[f"f{i}" for i in range(6)])
+    y = X['f0'] * 2 - X['f1'] ** 2 + 0.1 * rng.standard_normal(400)
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def parallel_forest(data):
+    X, y = data
+    return RandomForestRegressor(n_estimators=60, max_depth=8, random_state=0, n_jobs=-1).fit(X, y)
+
+
+def test_bitwise_identical_to_sequential_sklearn(data, parallel_forest):
+    X, _ = data
+    sequential = copy.copy(parallel_forest)
+    sequential.n_jobs = 1
+    assert np.array_equal(FlatForest.from_sklearn(parallel_forest).predict(X), sequential.predict(X))
+
+
+def test_parallel_sklearn_within_tolerance(data, parallel_forest):
+    X, _ = data
+    np.testing.assert_allclose(FlatForest.from_sklearn(parallel_forest).predict(X), parallel_forest.predict(X),
+                               rtol=PARALLEL_RTOL, atol=0)
+
+
+def test_missing_values_follow_sklearn(data):
+    X, y = data
+    X = X.copy()
+    X.iloc[::7, 0] = np.nan
+    forest = RandomForestRegressor(n_estimators=20, random_state=0, n_jobs=1).fit(X, y)
+    assert np.array_equal(FlatForest.from_sklearn(forest).predict(X), forest.predict(X))
+
+
+def test_benchmark_reports_sequential_identity(data, parallel_forest):
+    X, _ = data
+    results = benchmark_forest_inference(parallel_forest, X, repeat=2)
+    assert results['identical']
+    assert results['within_tolerance']
+    # 벤치마크는 원래 모델의 n_jobs를 바꾸지 않음
+    assert parallel_forest.n_jobs == -1
+
+
+def test_save_and_load_roundtrip(tmp_path, data, parallel_forest):
+    X, _ = data
+    flat = FlatForest.from_sklearn(parallel_forest)
+    flat.save(tmp_path / 'forest')
+    loaded = FlatForest.load(tmp_path / 'forest')
+    # 노드 배열은 복사 없이 메모리 매핑된 파일을 그대로 사용
+    assert all(isinstance(getattr(loaded, name), np.memmap) for name in FlatForest.ARRAY_NAMES)
+    assert np.array_equal(loaded.predict(X), flat.predict(X))
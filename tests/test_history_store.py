@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import crawler
+import history_store
+from crawler import hitter_columns, load_historical_data
+from history_store import ingest_history_file, load_history_store
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    """임시 저장소 + 테스트 후 복원되는 역대 데이터 캐시"""
+    store = tmp_path / 'history'
+    monkeypatch.setattr(history_store, 'HISTORY_DIR', str(store))
+    monkeypatch.setattr(crawler, '_historical_cache', dict(crawler._historical_cache))
+    crawler.invalidate_history_store_cache()
+    return store
+
+
+def _write_source(path, seasons):
+    hitter_his, _ = load_historical_data(include_store=False)
+    source = hitter_his[hitter_his['연도'].isin(seasons)][hitter_columns]
+    source.to_csv(path, index=False)
+    return source.reset_index(drop=True)
+
+
+def _parts(store_dir):
+    return sorted(name for name in os.listdir(store_dir / 'hitter') if name.startswith('part-'))
+
+
+def test_reingest_is_idempotent(tmp_path, store_dir):
+    source = _write_source(tmp_path / 'hitter.csv', [2023, 2024])
+    entry = ingest_history_file(str(tmp_path / 'hitter.csv'), 'hitter', batch_size=40)
+    parts = _parts(store_dir)
+    assert entry['rows'] == len(source) and entry['batches'] == len(parts)
+
+    again = ingest_history_file(str(tmp_path / 'hitter.csv'), 'hitter', batch_size=40)
+    assert again == entry
+    assert _parts(store_dir) == parts
+    stored = load_history_store('hitter')
+    assert len(stored) == len(source)
+    assert stored[hitter_columns].reset_index(drop=True).equals(source.astype(stored[hitter_columns].dtypes))
+
+
+def test_interrupted_ingest_resumes_without_duplicates(tmp_path, store_dir, monkeypatch):
+    source = _write_source(tmp_path / 'hitter.csv', [2022, 2023, 2024])
+    validate = history_store.validate_history_batch
+    calls = []
+    crash_at = [3]
+
+    def counting_validate(batch, kind):
+        calls.append(len(batch))
+        if len(calls) == crash_at[0]:
+            raise KeyboardInterrupt
+        return validate(batch, kind)
+
+    monkeypatch.setattr(history_store, 'validate_history_batch', counting_validate)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_history_file(str(tmp_path / 'hitter.csv'), 'hitter', batch_size=40)
+    assert len(_parts(store_dir)) == 2
+
+    # 저장 완료된 배치는 다시 검증/저장하지 않고 나머지만 이어서 적재
+    calls.clear()
+    crash_at[0] = None
+    entry = ingest_history_file(str(tmp_path / 'hitter.csv'), 'hitter', batch_size=40)
+    n_batches = -(-len(source) // 40)
+    assert len(calls) == n_batches - 2
+    assert entry['complete'] and entry['batches'] == n_batches and entry['rows'] == len(source)
+    assert len(load_history_store('hitter')) == len(source)
+
+
+def test_changed_source_replaces_its_previous_parts(tmp_path, store_dir):
+    path = tmp_path / 'hitter.csv'
+    _write_source(path, [2022, 2023, 2024])
+    ingest_history_file(str(path), 'hitter', batch_size=40)
+    old_parts = _parts(store_dir)
+
+    # 같은 경로의 파일을 고쳐 쓰면 새 원본으로 보고 이전 적재분을 교체
+    source = _write_source(path, [2024])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    ingest_history_file(str(path), 'hitter', batch_size=40)
+
+    assert not set(old_parts) & set(_parts(store_dir))
+    assert len(load_history_store('hitter')) == len(source)
+    assert len(history_store._read_manifest(str(store_dir / 'hitter'))) == 1
+
+
+def test_ingest_refreshes_loaded_history(tmp_path, store_dir):
+    embedded, _ = load_historical_data(include_store=False)
+    assert len(load_historical_data()[0]) == len(embedded)
+
+    source = _write_source(tmp_path / 'hitter.csv', [2024])
+    ingest_history_file(str(tmp_path / 'hitter.csv'), 'hitter')
+    assert len(load_historical_data()[0]) == len(embedded) + len(source)
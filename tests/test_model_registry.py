@@ -0,0 +1,114 @@
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+import model_registry
+import predictor
+
+FEATURES = ['AVG', 'HR']
+
+
+def _artifacts(fingerprint, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(60, 2)), columns=FEATURES)
+    scaler = StandardScaler().fit(X)
+    scaled = pd.DataFrame(scaler.transform(X), columns=FEATURES)
+    kmeans = KMeans(3, random_state=seed, n_init=10).fit(scaled)
+    design = scaled.assign(cluster=kmeans.predict(scaled))
+    model = RandomForestRegressor(n_estimators=5, random_state=seed).fit(design, rng.normal(size=60))
+    return {'top_n_features': FEATURES, 'scaler': scaler, 'kmeans': kmeans, 'model': model,
+            'fingerprint': fingerprint}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'REGISTRY_DIR', str(tmp_path))
+    monkeypatch.setattr(model_registry, '_serving', {})
+    first = model_registry.register_version('hitter', _artifacts('aaaaaaaa', 0), activate=True)
+    second = model_registry.register_version('hitter', _artifacts('bbbbbbbb', 1))
+    return first, second
+
+
+def test_promote_and_rollback(registry):
+    first, second = registry
+    assert [v['version'] for v in model_registry.list_versions('hitter')] == sorted([first, second])
+    assert model_registry.get_active_version('hitter') == first
+
+    model_registry.promote('hitter', second)
+    assert model_registry.get_active_version('hitter') == second
+    assert model_registry.rollback('hitter') == first
+    assert model_registry.get_active_version('hitter') == first
+
+    with pytest.raises(ValueError):
+        model_registry.rollback('hitter')
+    with pytest.raises(ValueError):
+        model_registry.promote('hitter', 'missing')
+    assert model_registry.get_active_version('hitter') == first
+
+
+def test_serving_model_follows_active_pointer_and_maps_forest(registry):
+    first, second = registry
+    serving = model_registry.get_serving_model('hitter')
+    assert serving.version == first
+    assert model_registry.get_serving_model('hitter') is serving
+    assert all(isinstance(getattr(serving.compiled, name), np.memmap) for name in serving.compiled.ARRAY_NAMES)
+
+    data = pd.DataFrame(np.random.default_rng(2).normal(size=(8, 2)), columns=FEATURES)
+    scaled = pd.DataFrame(serving.scaler.transform(data), columns=FEATURES)
+    expected = serving.model.predict(scaled.assign(cluster=serving.kmeans.predict(scaled)))
+    np.testing.assert_allclose(serving.predict(data), expected, rtol=1e-12)
+
+    model_registry.promote('hitter', second)
+    assert model_registry.get_serving_model('hitter').version == second
+
+
+@pytest.fixture
+def serve_mode(registry, monkeypatch):
+    """serve 모드 + 갱신 잠금/캐시 갱신 호출 기록"""
+    monkeypatch.setattr(model_registry, 'REGISTRY_MODE', 'serve')
+    calls = {'guard': 0, 'update': 0}
+
+    @contextlib.contextmanager
+    def fake_guard(window, dedupe=True):
+        calls['guard'] += 1
+        yield True
+
+    def fake_update(cached_data, hitter, pitcher):
+        calls['update'] += 1
+        cached_data.update({'hitter_data': hitter, 'pitcher_data': pitcher})
+
+    monkeypatch.setattr(predictor, 'refresh_guard', fake_guard)
+    monkeypatch.setattr(predictor, 'update_cached_predictions', fake_update)
+    return calls
+
+
+def _cached(version):
+    hitter = pd.DataFrame(np.random.default_rng(3).normal(size=(5, 2)), columns=FEATURES)
+    hitter.attrs['model_version'] = version
+    return {'hitter_data': hitter, 'pitcher_data': pd.DataFrame()}
+
+
+def test_apply_active_models_skips_lock_when_version_unchanged(registry, serve_mode):
+    first, _ = registry
+    assert predictor.apply_active_models(_cached(first)) is False
+    assert serve_mode == {'guard': 0, 'update': 0}
+
+
+def test_apply_active_models_repredicts_after_promote(registry, serve_mode):
+    first, second = registry
+    cached_data = _cached(first)
+    model_registry.promote('hitter', second)
+
+    assert predictor.apply_active_models(cached_data) is True
+    assert serve_mode == {'guard': 1, 'update': 1}
+    assert cached_data['hitter_data'].attrs['model_version'] == second
+    assert cached_data['hitter_data']['OPS_predict'].notna().all()
+
+    # 반영 후에는 다시 잠그지 않음
+    assert predictor.apply_active_models(cached_data) is False
+    assert serve_mode['guard'] == 1
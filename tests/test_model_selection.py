@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor
+import model_selection
+
+CANDIDATES = [('ridge', {'alpha': 0.1}), ('ridge', {'alpha': 1.0}), ('ridge', {'alpha': 10.0}),
+              ('lasso', {'alpha': 1e-3})]
+
+
+@pytest.fixture
+def design():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(120, 3)), columns=['a', 'b', 'c'])
+    y = pd.Series(X.to_numpy() @ np.array([0.5, -0.2, 0.1]) + rng.normal(scale=0.1, size=120))
+    return X, y
+
+
+@pytest.fixture
+def search_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_selection, 'MODEL_SELECTION_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _ranking(history):
+    return [[(s['backend'], s['params'], s['rmse']) for s in h['scores']] for h in history]
+
+
+@pytest.fixture
+def evaluated(monkeypatch):
+    """새로 학습한 fold 키 기록 (n_jobs=1이면 같은 프로세스에서 호출)"""
+    calls = []
+    evaluate = model_selection._evaluate_fold
+
+    def record(key, *args):
+        calls.append(key)
+        return evaluate(key, *args)
+
+    monkeypatch.setattr(model_selection, '_evaluate_fold', record)
+    return calls
+
+
+def test_rerun_resumes_every_fold_from_log(search_dir, design, evaluated):
+    best, history = model_selection.successive_halving('hitter', *design, candidates=CANDIDATES, n_jobs=1)
+    assert len(history) == 2 and len(evaluated) > 0
+
+    evaluated.clear()
+    again, again_history = model_selection.successive_halving('hitter', *design, candidates=CANDIDATES, n_jobs=1)
+    assert evaluated == []
+    assert again == best and _ranking(again_history) == _ranking(history)
+
+
+def test_interrupted_search_finishes_with_same_ranking(search_dir, tmp_path_factory, design, evaluated,
+                                                       monkeypatch):
+    evaluate = model_selection._evaluate_fold  # 호출 기록 포함
+
+    def crash_after_five(key, *args):
+        if len(evaluated) == 5:
+            raise KeyboardInterrupt
+        return evaluate(key, *args)
+
+    monkeypatch.setattr(model_selection, '_evaluate_fold', crash_after_five)
+    with pytest.raises(KeyboardInterrupt):
+        model_selection.successive_halving('hitter', *design, candidates=CANDIDATES, n_jobs=1)
+    monkeypatch.setattr(model_selection, '_evaluate_fold', evaluate)
+
+    # 중단 시점에 쓰다 만 줄은 무시
+    with open(search_dir / 'search_hitter.jsonl', 'a', encoding='utf-8') as log:
+        log.write('{"key": "trunc')
+    done_before = set(model_selection._load_results('hitter'))
+    assert len(done_before) == 5
+
+    evaluated.clear()
+    _, history = model_selection.successive_halving('hitter', *design, candidates=CANDIDATES, n_jobs=1)
+    assert evaluated and not done_before & set(evaluated)
+
+    monkeypatch.setattr(model_selection, 'MODEL_SELECTION_DIR', str(tmp_path_factory.mktemp('fresh')))
+    _, fresh_history = model_selection.successive_halving('hitter', *design, candidates=CANDIDATES, n_jobs=1)
+    assert _ranking(history) == _ranking(fresh_history)
+
+
+def test_changed_data_does_not_reuse_folds(search_dir, design, evaluated):
+    X, y = design
+    model_selection.successive_halving('hitter', X, y, candidates=CANDIDATES, n_jobs=1)
+    first = len(evaluated)
+    model_selection.successive_halving('hitter', X, y * 2, candidates=CANDIDATES, n_jobs=1)
+    assert len(evaluated) == 2 * first
+
+
+@pytest.fixture
+def shared_state(tmp_path, monkeypatch):
+    """갱신이 쓰는 공유 산출물과 결과 캐시 설정 (모델 선택/벤치마크가 건드리면 안 됨)"""
+    monkeypatch.setenv('KBO_SEASON', '2024')
+    monkeypatch.setattr(data_processor, 'RESULT_CACHE_ENABLED', True)
+    monkeypatch.setattr(data_processor, 'RESULT_CACHE_DIR', str(tmp_path / 'cache'))
+    shared = {'hitter': {'model': 'serving'}, 'pitcher': {}}
+    monkeypatch.setattr(data_processor, 'model_artifacts', shared)
+    return shared
+
+
+def test_load_design_leaves_shared_state_untouched(shared_state):
+    X, y = model_selection.load_design('hitter')
+    assert len(X) == len(y) > 0 and 'cluster' in X.columns
+    assert shared_state == {'hitter': {'model': 'serving'}, 'pitcher': {}}
+    assert data_processor.RESULT_CACHE_ENABLED is True
+    assert not os.path.exists(data_processor.RESULT_CACHE_DIR)
+
+
+def test_benchmark_backends_leaves_shared_state_untouched(shared_state):
+    results = data_processor.benchmark_backends('pitcher', configs=[('rf', 'rf')])
+    assert results[['rank_backend', 'final_backend']].values.tolist() == [['rf', 'rf']]
+    assert shared_state == {'hitter': {'model': 'serving'}, 'pitcher': {}}
+    assert data_processor.RESULT_CACHE_ENABLED is True
+    assert not os.path.exists(data_processor.RESULT_CACHE_DIR)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from crawler import load_historical_data
+from data_processor import process_hitter_data, process_pitcher_data, process_out_of_core
+from history_store import history_batch_factory
+
+SEASON = 2024
+# RandomForest 병렬 예측의 합산 순서 차이만 허용
+ATOL = 1e-9
+
+
+@pytest.mark.parametrize('kind, process, output', [
+    ('hitter', process_hitter_data, 'OPS_predict'),
+    ('pitcher', process_pitcher_data, 'WHIP_predict'),
+])
+def test_out_of_core_matches_in_memory_when_data_fits_in_sample(tmp_path, kind, process, output):
+    history = load_historical_data(include_store=False)[0 if kind == 'hitter' else 1]
+    current, rest = history[history['연도'] == SEASON], history[history['연도'] != SEASON]
+    expected = process(current, rest, final_backend='rf')
+    expected = expected[expected['연도'] == SEASON].reset_index(drop=True)
+
+    factory = history_batch_factory(kind, store_dir=str(tmp_path), batch_size=97, season_last=SEASON)
+    actual = process_out_of_core(kind, factory, keep_seasons=[SEASON], final_backend='rf')
+
+    assert actual['선수명'].tolist() == expected['선수명'].tolist()
+    np.testing.assert_allclose(actual[output], expected[output], rtol=0, atol=ATOL)
@@ -0,0 +1,94 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+import crawler
+import pipeline
+from crawler import current_season, load_historical_data
+
+
+@pytest.mark.parametrize('today, season', [
+    (datetime.date(2026, 1, 15), 2025),
+    (datetime.date(2026, 3, 19), 2025),
+    (datetime.date(2026, 3, 20), 2026),
+    (datetime.date(2026, 10, 1), 2026),
+])
+def test_current_season_rolls_over_at_season_start(monkeypatch, today, season):
+    monkeypatch.delenv('KBO_SEASON', raising=False)
+    assert current_season(today) == season
+
+
+def test_current_season_env_override(monkeypatch):
+    monkeypatch.setenv('KBO_SEASON', '2024')
+    assert current_season(datetime.date(2026, 6, 1)) == 2024
+
+
+def _record_page(selected):
+    options = ''.join(f'<option value="{year}"{" selected" if year == selected else ""}>{year}</option>'
+                      for year in (2024, 2025, 2026))
+    return (f'<form><input type="hidden" name="__VIEWSTATE" value="vs">'
+            f'<select name="ctl00$cphContents$ddlSeason$ddlSeason">{options}</select></form>')
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def record_site(monkeypatch):
+    """기본 페이지는 default 시즌, postback은 요청한 시즌(없는 시즌이면 기본 시즌)을 보여주는 기록 페이지"""
+    site = {'default': 2025, 'available': {2024, 2025}, 'posts': []}
+
+    def fake_get(url, headers=None):
+        return _Response(_record_page(site['default']))
+
+    def fake_post(url, headers=None, data=None):
+        requested = int(data['ctl00$cphContents$ddlSeason$ddlSeason'])
+        site['posts'].append(requested)
+        return _Response(_record_page(requested if requested in site['available'] else site['default']))
+
+    monkeypatch.setattr(crawler.requests, 'get', fake_get)
+    monkeypatch.setattr(crawler.requests, 'post', fake_post)
+    return site
+
+
+def test_fetch_uses_default_page_when_it_shows_requested_season(record_site):
+    assert 'selected>2025' in crawler._fetch_record_html('url', {}, 2025)
+    assert record_site['posts'] == []
+
+
+def test_fetch_posts_back_for_other_season(record_site):
+    assert 'selected>2024' in crawler._fetch_record_html('url', {}, 2024)
+    assert record_site['posts'] == [2024]
+
+
+def test_fetch_rejects_season_without_records(record_site):
+    """비시즌에 기본 페이지(지난 시즌)를 새 시즌으로 잘못 표시하지 않음"""
+    with pytest.raises(ValueError):
+        crawler._fetch_record_html('url', {}, 2026)
+
+
+def test_run_pipeline_matches_in_process_with_spawned_workers(tmp_path):
+    seasons = [2023, 2024]
+    results = pipeline.run_pipeline(seasons, max_workers=2, out_of_core=False)
+    assert sorted(results) == seasons
+
+    hitter_his, pitcher_his = load_historical_data()
+    expected = pipeline.process_season(2024, hitter_his, pitcher_his, out_of_core=False)
+    np.testing.assert_allclose(results[2024]['hitter_data']['OPS_predict'], expected['hitter_data']['OPS_predict'],
+                               rtol=0, atol=1e-9)
+    assert results[2024]['ranking_df']['team'].tolist() == expected['ranking_df']['team'].tolist()
+
+    written = pipeline.write_pipeline_results(results, str(tmp_path))
+    for season in seasons:
+        with open(f"{written[season]}/teams.json", encoding='utf-8') as f:
+            teams = json.load(f)
+        matrix = np.load(f"{written[season]}/win_probability.npy")
+        assert matrix.shape == (len(teams), len(teams))
+        assert np.isnan(np.diag(matrix)).all()
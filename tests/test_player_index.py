@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import app as app_module
+from player_index import PlayerIndex
+
+SEASON = 2025
+
+
+@pytest.fixture
+def player_index():
+    records = [
+        {'name': '김타자', 'team': 'LG', 'role': 'hitter', 'season': SEASON, 'OPS_predict': 0.9},
+        {'name': '이타자', 'team': 'KT', 'role': 'hitter', 'season': SEASON, 'OPS_predict': 0.7},
+        {'name': '정투수', 'team': 'LG', 'role': 'pitcher', 'season': SEASON, 'WHIP_predict': 1.2},
+        {'name': '한투수', 'team': 'KT', 'role': 'pitcher', 'season': SEASON, 'WHIP_predict': 1.4},
+        # 특징이 빠져 예측값이 없는 선수
+        {'name': '박타자', 'team': 'LG', 'role': 'hitter', 'season': SEASON, 'OPS_predict': None},
+        {'name': '최투수', 'team': 'KT', 'role': 'pitcher', 'season': SEASON, 'WHIP_predict': None},
+    ]
+    return PlayerIndex(records, SEASON, adjustment=1.0)
+
+
+@pytest.fixture
+def client(player_index, monkeypatch):
+    monkeypatch.setitem(app_module.app.cached_data, 'player_index', player_index)
+    return app_module.app.test_client()
+
+
+def lineup(hitters, pitcher='정투수', team='LG'):
+    return {'team': team, 'hitters': hitters, 'pitcher': pitcher}
+
+
+def test_predict_lineup(client):
+    response = client.post('/predict_lineup', json={'team1': lineup(['김타자']),
+                                                    'team2': lineup(['이타자'], '한투수', 'KT')})
+    assert response.status_code == 200
+    assert response.get_json()['win_probability'] > 50
+
+
+@pytest.mark.parametrize('team1', [
+    lineup([1]),
+    lineup([['김타자']]),
+    lineup([None]),
+    lineup([{'name': 123}]),
+    lineup([{'name': '김타자', 'team': ['LG']}]),
+    lineup(['김타자'], pitcher=5),
+    lineup('김타자'),
+    lineup({'name': '김타자'}),
+    lineup(['김타자'], team=7),
+])
+def test_predict_lineup_rejects_malformed_players(client, team1):
+    response = client.post('/predict_lineup', json={'team1': team1, 'team2': lineup(['이타자'], '한투수', 'KT')})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_resolve_rejects_non_string_names(player_index):
+    with pytest.raises(ValueError):
+        player_index.resolve(['김타자'], 'hitter')
+    assert player_index.resolve({'name': '김타자', 'team': 'LG'}, 'hitter') == 0
+
+
+def _strict_json(response):
+    """NaN/Infinity를 허용하지 않는 JSON 파싱 (브라우저 JSON.parse와 같은 기준)"""
+    def reject(constant):
+        raise ValueError(f"유효하지 않은 JSON 값: {constant}")
+    return json.loads(response.data, parse_constant=reject)
+
+
+def test_players_without_prediction_are_left_out_of_score(player_index):
+    assert player_index.score_lineup(['김타자', '박타자'], ['정투수']) == player_index.score_lineup(['김타자'], ['정투수'])
+    assert player_index.score_lineup(['이타자'], ['한투수', '최투수']) == player_index.score_lineup(['이타자'], ['한투수'])
+
+
+def test_predict_lineup_with_missing_prediction_returns_valid_json(client):
+    response = client.post('/predict_lineup', json={'team1': lineup(['김타자', '박타자']),
+                                                    'team2': lineup(['이타자'], '최투수', 'KT')})
+    assert response.status_code == 400
+    assert 'error' in _strict_json(response)
+
+    response = client.post('/predict_lineup', json={'team1': lineup(['김타자', '박타자']),
+                                                    'team2': lineup(['이타자'], '한투수', 'KT')})
+    assert response.status_code == 200
+    assert _strict_json(response)['win_probability'] > 50
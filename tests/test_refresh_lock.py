@@ -0,0 +1,141 @@
+import threading
+import types
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+
+import app as app_module
+import predictor
+import refresh_lock
+from database import db
+from models import RefreshRun
+
+
+@pytest.fixture
+def flask_app():
+    flask_app = app_module.app
+    with flask_app.app_context():
+        refresh_lock._ensure_table()
+        db.session.query(RefreshRun).delete()
+        db.session.commit()
+        yield flask_app
+        db.session.query(RefreshRun).delete()
+        db.session.commit()
+
+
+@pytest.fixture
+def refresh_calls(monkeypatch):
+    calls = []
+
+    def fake_refresh_predictions(cached_data, run_key=None):
+        calls.append(run_key)
+        cached_data['win_probability_df'] = pd.DataFrame()
+
+    monkeypatch.setattr(predictor, 'refresh_predictions', fake_refresh_predictions)
+    monkeypatch.setattr(predictor, 'is_using_fallback', lambda: False)
+    monkeypatch.setattr(predictor, 'refresh_elo', lambda cached_data: None)
+    return calls
+
+
+def test_action_after_cron_in_same_window_does_not_rerun(flask_app, refresh_calls):
+    """자정 갱신이 끝난 창에 GitHub Action의 /force-update가 들어오면 파이프라인을 다시 돌리지 않음"""
+    window = refresh_lock.refresh_window()
+    assert predictor.run_refresh({}, force=True)
+    assert refresh_lock.is_window_done(window)
+
+    response = flask_app.test_client().post('/force-update')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'Already updated'
+    assert predictor.run_refresh({}, force=True) is False
+    assert refresh_calls == [window]
+
+
+def test_operator_override_reruns_finished_window(flask_app, refresh_calls):
+    client = flask_app.test_client()
+    assert client.post('/force-update').get_json()['status'] == 'Update completed'
+    assert client.post('/force-update?override=true').get_json()['status'] == 'Update completed'
+    assert len(refresh_calls) == 2
+
+
+def test_file_lock_is_exclusive(tmp_path, monkeypatch):
+    monkeypatch.setattr(refresh_lock, 'LOCK_DIR', str(tmp_path))
+    first, second = refresh_lock._FileLock('test'), refresh_lock._FileLock('test')
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_refresh_guard_skips_while_locked_and_after_done(flask_app):
+    window = '2025-05-01'
+    holder = refresh_lock._make_lock(refresh_lock.LOCK_NAME)
+    assert isinstance(holder, refresh_lock._FileLock)
+    assert holder.acquire()
+    try:
+        assert refresh_lock.is_refresh_running()
+        with refresh_lock.refresh_guard(window) as acquired:
+            assert not acquired
+    finally:
+        holder.release()
+
+    assert not refresh_lock.is_refresh_running()
+    with refresh_lock.refresh_guard(window) as acquired:
+        assert acquired
+    refresh_lock.mark_window_done(window)
+    with refresh_lock.refresh_guard(window) as acquired:
+        assert not acquired
+    with refresh_lock.refresh_guard(window, dedupe=False) as acquired:
+        assert acquired
+
+
+@pytest.fixture
+def get_lock_engine(tmp_path, monkeypatch):
+    """GET_LOCK/RELEASE_LOCK을 MySQL처럼 세션(커넥션) 단위로 흉내 낸 SQLite 엔진"""
+    holders = {}
+    guard = threading.Lock()
+    engine = create_engine(f"sqlite:///{tmp_path / 'locks.db'}", poolclass=NullPool)
+
+    @event.listens_for(engine, 'connect')
+    def register(dbapi_conn, _):
+        def get_lock(name, timeout):
+            with guard:
+                if holders.get(name, dbapi_conn) is not dbapi_conn:
+                    return 0
+                holders[name] = dbapi_conn
+                return 1
+
+        def release_lock(name):
+            with guard:
+                if holders.get(name) is dbapi_conn:
+                    del holders[name]
+                    return 1
+                return 0
+
+        dbapi_conn.create_function('GET_LOCK', 2, get_lock)
+        dbapi_conn.create_function('RELEASE_LOCK', 1, release_lock)
+
+    monkeypatch.setattr(engine.dialect, 'name', 'mysql')
+    monkeypatch.setattr(refresh_lock, 'db', types.SimpleNamespace(engine=engine))
+    return holders
+
+
+def test_mysql_get_lock_is_exclusive_per_connection(get_lock_engine):
+    first = refresh_lock._make_lock('kbo_refresh')
+    second = refresh_lock._make_lock('kbo_refresh')
+    assert isinstance(first, refresh_lock._MySQLLock)
+
+    assert first.acquire()
+    assert first.conn is not None
+    assert not second.acquire()
+    assert second.conn is None
+    assert refresh_lock.is_refresh_running()
+
+    first.release()
+    assert first.conn is None
+    assert 'kbo_refresh' not in get_lock_engine
+    assert not refresh_lock.is_refresh_running()
+    assert second.acquire()
+    second.release()
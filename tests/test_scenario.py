@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from scenario import ScenarioEngine
+from scoring import TeamAggregateStore
+
+SEASON = 2025
+
+
+@pytest.fixture
+def engine():
+    hitter = pd.DataFrame({
+        '선수명': ['김타자', '이타자', '박타자', '최타자', '김타자'],
+        '팀명': ['LG', 'LG', '롯데', '롯데', 'KT'],
+        '연도': [SEASON] * 5,
+        'OPS_predict': [0.9, 0.7, 0.8, 0.6, 0.75],
+    })
+    pitcher = pd.DataFrame({
+        '선수명': ['정투수', '한투수', '오투수'],
+        '팀명': ['LG', '롯데', 'KT'],
+        '연도': [SEASON] * 3,
+        'WHIP_predict': [1.2, 1.4, 1.3],
+    })
+    return ScenarioEngine(hitter, pitcher, TeamAggregateStore.from_frames(hitter, pitcher), SEASON)
+
+
+def test_move_changes_team_scores(engine):
+    _, result = engine.run([{'action': 'move', 'player': '이타자', 'to': '롯데'}])
+    scores = dict(zip(result['victory_df']['팀명'], result['victory_df']['Adjusted_Score']))
+    base = dict(zip(engine.base_victory_df['팀명'], engine.base_victory_df['Adjusted_Score']))
+    assert scores['LG'] > base['LG']
+    assert set(scores) == set(base)
+
+
+def test_move_to_unknown_team_is_rejected(engine):
+    with pytest.raises(ValueError, match='유효한 팀 이름이 아닙니다'):
+        engine.run([{'action': 'move', 'player': '이타자', 'to': '롯대'}])
+
+
+def test_move_to_current_team_is_rejected(engine):
+    with pytest.raises(ValueError, match='이미 LG 소속'):
+        engine.run([{'action': 'move', 'player': '이타자', 'to': 'LG'}])
+
+
+@pytest.mark.parametrize('edits', [
+    # 팀 지정 여부만 다른 같은 선수
+    [{'action': 'exclude', 'player': '이타자'}, {'action': 'exclude', 'player': '이타자', 'team': 'LG'}],
+    # 같은 선수를 제외하면서 이동
+    [{'action': 'exclude', 'player': '박타자'}, {'action': 'move', 'player': '박타자', 'team': '롯데', 'to': 'KT'}],
+    # 역할 지정 여부만 다른 같은 선수
+    [{'action': 'move', 'player': '정투수', 'to': 'KT'}, {'action': 'exclude', 'player': '정투수', 'role': 'pitcher'}],
+])
+def test_overlapping_edits_are_rejected(engine, edits):
+    with pytest.raises(ValueError, match='편집이 겹칩니다'):
+        engine.run(edits)
+
+
+def test_same_name_on_different_teams_needs_team(engine):
+    with pytest.raises(ValueError, match='여러 팀'):
+        engine.run([{'action': 'exclude', 'player': '김타자'}])
+
+    edits, _ = engine.run([{'action': 'exclude', 'player': '김타자', 'team': 'LG'},
+                           {'action': 'exclude', 'player': '김타자', 'team': 'KT'}])
+    assert len(edits) == 2
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from crawler import load_historical_data
+from data_processor import (select_n_components, drop_undefined_rates, HITTER_DERIVED_COLUMNS,
+                            PITCHER_DERIVED_COLUMNS)
+from features import add_hitter_features, add_pitcher_features
+
+
+def pca_n_components(X, threshold=0.90):
+    """기존 방식: 전체 PCA의 누적 분산 비율이 threshold 이상이 되는 주성분 개수"""
+    cumulative_variance = PCA().fit(X).explained_variance_ratio_.cumsum()
+    return next(i for i, total in enumerate(cumulative_variance) if total >= threshold) + 1
+
+
+def data_with_n_components(n, n_features, n_samples=200, seed=0):
+    """90% 누적 분산 지점이 정확히 n번째 주성분이 되도록 분산을 정한 평균 0 데이터
+
+    앞의 n개 성분은 분산 a, 나머지는 a 이하로 같게 나눔 (n <= ceil(0.9 * n_features)만 가능)
+    """
+    rng = np.random.default_rng(seed)
+    a = min(0.9 / (n - 0.5), 1 / n)
+    variances = np.full(n_features, a)
+    if n < n_features:
+        variances[n:] = (1 - n * a) / (n_features - n)
+
+    # 평균 0인 열로 만든 직교 기저 (중심화해도 분산이 그대로 유지됨)
+    A = rng.standard_normal((n_samples, n_features))
+    U, _ = np.linalg.qr(A - A.mean(axis=0))
+    V, _ = np.linalg.qr(rng.standard_normal((n_features, n_features)))
+    return (U * np.sqrt(variances * n_samples)) @ V.T
+
+
+def max_n_components(n_features, threshold=0.90):
+    return int(np.ceil(threshold * n_features))
+
+
+@pytest.mark.parametrize('n', range(1, max_n_components(12) + 1))
+def test_matches_pca_for_every_n_gram_path(n):
+    X = data_with_n_components(n, n_features=12)
+    assert pca_n_components(X) == n
+    assert select_n_components(X) == n
+
+
+@pytest.mark.parametrize('n', range(1, max_n_components(80) + 1))
+def test_matches_pca_for_every_n_randomized_path(n):
+    # 컬럼 수가 64를 넘으면 randomized SVD 경로 사용
+    X = data_with_n_components(n, n_features=80, seed=n)
+    assert pca_n_components(X) == n
+    assert select_n_components(X) == n
+
+
+@pytest.mark.parametrize('n_features', [8, 30, 100])
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_pca_on_standardized_correlated_data(n_features, seed):
+    """특이값을 정하지 않은 일반 데이터(상관된 컬럼, 표준화)에서도 PCA와 같은 개수"""
+    rng = np.random.default_rng(seed)
+    latent = rng.standard_normal((300, max(n_features // 3, 1)))
+    X = latent @ rng.standard_normal((latent.shape[1], n_features)) + 0.5 * rng.standard_normal((300, n_features))
+    X = (X - X.mean(axis=0)) / X.std(axis=0)
+    assert select_n_components(X) == pca_n_components(X)
+
+
+def test_constant_data_returns_one():
+    assert select_n_components(np.zeros((10, 4))) == 1
+
+
+@pytest.mark.parametrize('kind, expected', [('hitter', 5), ('pitcher', 8)])
+def test_matches_pca_on_historical_data(kind, expected):
+    """process_*_data와 같은 전처리를 거친 내장 역대 기록에서 PCA와 같은 개수 (타자 5, 투수 8)"""
+    hitter_his, pitcher_his = load_historical_data(include_store=False)
+    if kind == 'hitter':
+        data = drop_undefined_rates(add_hitter_features(hitter_his), HITTER_DERIVED_COLUMNS)
+    else:
+        data = drop_undefined_rates(add_pitcher_features(pitcher_his), PITCHER_DERIVED_COLUMNS)
+    X = StandardScaler().fit_transform(data.drop(columns=['선수명', '팀명', '연도']).astype(float))
+
+    assert pca_n_components(X) == expected
+    assert select_n_components(X) == expected
@@ -0,0 +1,82 @@
+import datetime
+import threading
+import time
+
+import pandas as pd
+
+import app as app_module
+import predictor
+
+TEAMS = ['LG', 'KT']
+
+
+def _matrix():
+    return pd.DataFrame([['-', 60.0], [40.0, '-']], index=TEAMS, columns=TEAMS)
+
+
+def _fire(client_factory, n):
+    """n개 요청을 동시에 보내고 상태 코드 목록 반환"""
+    barrier = threading.Barrier(n)
+    statuses = [None] * n
+
+    def request(i):
+        client = client_factory()
+        barrier.wait()
+        statuses[i] = client.post('/predict_win_rate', json={'team1': 'LG', 'team2': 'KT'}).status_code
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def test_concurrent_requests_run_single_refresh(monkeypatch):
+    """캐시가 빈 상태에서 동시 요청 300개가 들어와도 갱신은 한 번만 실행되고 모두 같은 결과를 받음"""
+    flask_app = app_module.app
+    monkeypatch.setitem(flask_app.cached_data, 'win_probability_df', None)
+    monkeypatch.setitem(flask_app.cached_data, 'last_update', None)
+
+    calls = []
+    calls_lock = threading.Lock()
+
+    def fake_refresh(cached_data, **kwargs):
+        with calls_lock:
+            calls.append(kwargs)
+        time.sleep(0.5)
+        cached_data.update({'win_probability_df': _matrix(), 'last_update': datetime.datetime.now()})
+        return True
+
+    monkeypatch.setattr(predictor, 'warm_start_cache', lambda cached_data: False)
+    monkeypatch.setattr(predictor, 'run_refresh', fake_refresh)
+
+    statuses = _fire(flask_app.test_client, 300)
+
+    assert len(calls) == 1
+    assert statuses == [200] * 300
+
+
+def test_concurrent_requests_time_out_without_extra_refresh(monkeypatch):
+    """갱신이 대기 시간보다 오래 걸리면 대기 중인 요청은 503을 받지만 갱신은 여전히 한 번만 실행"""
+    flask_app = app_module.app
+    monkeypatch.setitem(flask_app.cached_data, 'win_probability_df', None)
+    monkeypatch.setitem(flask_app.cached_data, 'last_update', None)
+    monkeypatch.setattr(predictor, 'REFRESH_WAIT_TIMEOUT', 0.2)
+
+    calls = []
+
+    def slow_refresh(cached_data, **kwargs):
+        calls.append(kwargs)
+        time.sleep(1.0)
+        cached_data.update({'win_probability_df': _matrix(), 'last_update': datetime.datetime.now()})
+        return True
+
+    monkeypatch.setattr(predictor, 'warm_start_cache', lambda cached_data: False)
+    monkeypatch.setattr(predictor, 'run_refresh', slow_refresh)
+
+    statuses = _fire(flask_app.test_client, 100)
+
+    assert len(calls) == 1
+    assert statuses.count(200) >= 1
+    assert set(statuses) <= {200, 503}
@@ -0,0 +1,141 @@
+import operator
+import threading
+import time
+from functools import partial
+
+import pytest
+
+import app as app_module
+import data_processor
+import predictor
+import stages
+from crawler import load_historical_data
+from database import db
+from stages import Stage, StageError, run_stages
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(stages, 'RETRY_BACKOFF_SECONDS', 0)
+
+
+def test_dependency_order_and_outputs():
+    order = []
+    lock = threading.Lock()
+
+    def step(name, value):
+        def run(*args):
+            with lock:
+                order.append(name)
+            return value + sum(args)
+        return run
+
+    results, errors = run_stages([
+        Stage('d', step('d', 1000), deps=['b', 'c'], kind='main'),
+        Stage('b', step('b', 10), deps=['a']),
+        Stage('c', step('c', 100), deps=['a']),
+        Stage('a', step('a', 1)),
+    ])
+
+    assert errors == {}
+    assert order[0] == 'a' and order[-1] == 'd' and set(order[1:3]) == {'b', 'c'}
+    assert results == {'a': 1, 'b': 11, 'c': 101, 'd': 1112}
+
+
+def test_cpu_stage_runs_in_child_process():
+    results, errors = run_stages([
+        Stage('a', lambda: 2),
+        Stage('b', lambda: 3),
+        Stage('sum', operator.add, deps=['a', 'b'], kind='cpu'),
+    ])
+    assert errors == {}
+    assert results['sum'] == 5
+
+
+def test_cpu_stage_timeout_terminates_child():
+    start = time.monotonic()
+    results, errors = run_stages([
+        Stage('slow', partial(time.sleep, 60), kind='cpu', timeout=1),
+        Stage('after', lambda value: value, deps=['slow']),
+    ])
+    assert time.monotonic() - start < 30
+    assert isinstance(errors['slow'], StageError) and '시간 초과' in str(errors['slow'])
+    assert isinstance(errors['after'], StageError)
+    assert 'slow' not in results and 'after' not in results
+
+
+def test_failure_propagates_to_dependents_only():
+    def fail():
+        raise ValueError('수집 실패')
+
+    results, errors = run_stages([
+        Stage('bad', fail),
+        Stage('good', lambda: 1),
+        Stage('bad_child', lambda value: value, deps=['bad']),
+        Stage('bad_grandchild', lambda value: value, deps=['bad_child'], kind='main'),
+        Stage('good_child', lambda value: value + 1, deps=['good']),
+    ])
+    assert isinstance(errors['bad'], ValueError)
+    assert isinstance(errors['bad_child'], StageError)
+    assert isinstance(errors['bad_grandchild'], StageError)
+    assert results == {'good': 1, 'good_child': 2}
+
+
+def test_cpu_stage_exception_and_retries():
+    _, errors = run_stages([Stage('parse', partial(int, 'abc'), kind='cpu', retries=1)])
+    assert isinstance(errors['parse'], ValueError)
+
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise RuntimeError('일시 오류')
+        return 'ok'
+
+    results, errors = run_stages([Stage('flaky', flaky, retries=1)])
+    assert errors == {} and results['flaky'] == 'ok' and len(calls) == 2
+
+
+def test_successful_stages_are_reused_for_same_run_key():
+    calls = []
+
+    def count(name):
+        def run(*args):
+            calls.append(name)
+            return name
+        return run
+
+    def fail_once(*args):
+        calls.append('flaky')
+        if calls.count('flaky') == 1:
+            raise RuntimeError('실패')
+        return 'flaky'
+
+    stage_list = [Stage('a', count('a')), Stage('flaky', fail_once, deps=['a'])]
+    _, errors = run_stages(stage_list, run_key='2025-05-01')
+    assert 'flaky' in errors
+    results, errors = run_stages(stage_list, run_key='2025-05-01')
+    assert errors == {} and results['flaky'] == 'flaky'
+    assert calls.count('a') == 1
+
+
+def test_refresh_trains_in_child_and_returns_artifacts(monkeypatch):
+    """처리 스테이지는 자식 프로세스에서 학습하고, 웹 프로세스의 학습 산출물은 반환값으로만 교체됨"""
+    monkeypatch.setenv('KBO_SEASON', '2024')
+    hitter_his, pitcher_his = load_historical_data(include_store=False)
+    monkeypatch.setattr(predictor, '_crawl_hitter', lambda: hitter_his[hitter_his['연도'] == 2024])
+    monkeypatch.setattr(predictor, '_crawl_pitcher', lambda: pitcher_his[pitcher_his['연도'] == 2024])
+    monkeypatch.setattr(predictor, '_load_hitter_history', lambda: hitter_his[hitter_his['연도'] != 2024])
+    monkeypatch.setattr(predictor, '_load_pitcher_history', lambda: pitcher_his[pitcher_his['연도'] != 2024])
+    monkeypatch.setattr(data_processor, 'model_artifacts', {'hitter': {}, 'pitcher': {}})
+
+    cached_data = {}
+    with app_module.app.app_context():
+        db.create_all()
+        predictor.refresh_predictions(cached_data)
+
+    assert cached_data['hitter_data']['OPS_predict'].notna().all()
+    assert cached_data['pitcher_data']['WHIP_predict'].notna().all()
+    for kind in ('hitter', 'pitcher'):
+        assert {'model', 'scaler', 'kmeans', 'top_n_features'} <= set(data_processor.model_artifacts[kind])
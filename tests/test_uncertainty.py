@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import app as app_module
+import predictor
+import uncertainty
+from crawler import load_historical_data
+from database import db
+from models import WinProbability, WinProbabilityInterval
+
+SEASON = 2024
+
+
+@pytest.fixture
+def season_frames():
+    """역대 기록의 실제 OPS/WHIP를 예측값으로 쓴 한 시즌 데이터"""
+    hitter_his, pitcher_his = load_historical_data(include_store=False)
+    hitter = hitter_his[hitter_his['연도'] == SEASON].assign(OPS_predict=lambda df: df['OPS'])
+    pitcher = pitcher_his[pitcher_his['연도'] == SEASON].assign(WHIP_predict=lambda df: df['WHIP'])
+    return hitter.reset_index(drop=True), pitcher.reset_index(drop=True)
+
+
+@pytest.fixture
+def flask_app(monkeypatch):
+    monkeypatch.setenv('KBO_SEASON', str(SEASON))
+    monkeypatch.setattr(uncertainty, 'BOOTSTRAP_ENABLED', True)
+    monkeypatch.setattr(uncertainty, 'BOOTSTRAP_SAMPLES', 200)
+    with app_module.app.app_context():
+        db.create_all()
+        yield app_module.app
+        db.session.query(WinProbabilityInterval).delete()
+        db.session.query(WinProbability).delete()
+        db.session.commit()
+
+
+def test_ci_is_deterministic_and_brackets_point_estimate(season_frames):
+    hitter, pitcher = season_frames
+    ci = uncertainty.compute_win_probability_ci(hitter, pitcher, SEASON, n_samples=500)
+    again = uncertainty.compute_win_probability_ci(hitter, pitcher, SEASON, n_samples=500)
+    assert ci['low'].equals(again['low']) and ci['high'].equals(again['high'])
+
+    point, _ = predictor.compute_win_probability(hitter, pitcher, SEASON)
+    assert ci['low'].index.tolist() == sorted(point.index)
+    point = point.loc[ci['low'].index, ci['low'].index]
+    mask = ~np.eye(len(point), dtype=bool)
+    low, high, value = (df.to_numpy()[mask].astype(float) for df in (ci['low'], ci['high'], point))
+    assert (low <= high).all()
+    assert (low <= value + 0.01).all() and (value - 0.01 <= high).all()
+
+
+def test_ci_runs_in_process(season_frames, monkeypatch):
+    """웹 워커 안에서 호출되므로 프로세스 풀을 만들지 않음"""
+    import concurrent.futures
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError('프로세스 풀을 만들면 안 됩니다')
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', no_pool)
+    assert uncertainty.compute_win_probability_ci(*season_frames, SEASON, n_samples=100) is not None
+
+
+def test_warm_start_restores_intervals_of_stored_snapshot(flask_app, season_frames):
+    cached_data = {}
+    predictor.update_cached_predictions(cached_data, *season_frames)
+    team1, team2 = cached_data['win_probability_df'].index[:2]
+    expected = predictor.get_win_probability_ci(cached_data, team1, team2)
+    assert expected is not None
+
+    restarted = {}
+    assert predictor.warm_start_cache(restarted)
+    assert predictor.get_win_probability_ci(restarted, team1, team2) == pytest.approx(expected, abs=1e-9)
+    assert restarted['win_probability_ci']['samples'] == 200
+
+
+def test_warm_start_skips_intervals_of_older_snapshot(flask_app, season_frames, monkeypatch):
+    predictor.update_cached_predictions({}, *season_frames)
+
+    # 신뢰구간 없이 새 스냅샷만 저장된 경우 (예: 구간 계산 실패) 이전 구간은 복원하지 않음
+    monkeypatch.setattr(uncertainty, 'BOOTSTRAP_ENABLED', False)
+    predictor.update_cached_predictions({}, *season_frames)
+    monkeypatch.setattr(uncertainty, 'BOOTSTRAP_ENABLED', True)
+
+    restarted = {}
+    assert predictor.warm_start_cache(restarted)
+    assert restarted['win_probability_ci'] is None
@@ -0,0 +1,69 @@
+import datetime
+import time
+
+import pandas as pd
+import pytest
+
+import app as app_module
+import predictor
+from database import db
+from models import WinProbability
+
+TEAMS = ['LG', 'KT']
+
+
+@pytest.fixture
+def seoul_time(monkeypatch):
+    """UTC와 9시간 차이 나는 로컬 시간대"""
+    monkeypatch.setenv('TZ', 'Asia/Seoul')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def stored_snapshot():
+    """DB에 저장된 승률 스냅샷 (created_date는 UTC)"""
+    def store(created_utc):
+        db.session.query(WinProbability).delete()
+        db.session.add_all([WinProbability(team1='LG', team2='KT', probability=60.0, created_date=created_utc),
+                            WinProbability(team1='KT', team2='LG', probability=40.0, created_date=created_utc)])
+        db.session.commit()
+
+    with app_module.app.app_context():
+        db.create_all()
+        yield store
+        db.session.query(WinProbability).delete()
+        db.session.commit()
+
+
+def test_warm_start_restores_last_update_in_local_time(seoul_time, stored_snapshot):
+    created_utc = datetime.datetime.utcnow() - datetime.timedelta(minutes=2)
+    stored_snapshot(created_utc)
+
+    cached_data = {}
+    assert predictor.warm_start_cache(cached_data)
+    expected = datetime.datetime.now() - datetime.timedelta(minutes=2)
+    assert abs(cached_data['last_update'] - expected) < datetime.timedelta(seconds=30)
+    assert cached_data['next_update'] - cached_data['last_update'] == datetime.timedelta(hours=24)
+
+
+def test_snapshot_after_local_midnight_skips_forced_refresh(seoul_time, monkeypatch):
+    """로컬 자정(UTC 15시) 이후 저장된 스냅샷이면 00:00~00:04 강제 갱신 대상이 아님"""
+    local_midnight = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    created_utc = local_midnight + datetime.timedelta(minutes=1) - datetime.timedelta(hours=9)
+    matrix = pd.DataFrame([['-', 60.0], [40.0, '-']], index=TEAMS, columns=TEAMS)
+    monkeypatch.setattr(predictor, 'load_win_probability_df_from_db', lambda: (matrix, created_utc))
+
+    cached_data = {}
+    assert predictor.warm_start_cache(cached_data)
+
+    assert cached_data['last_update'] == local_midnight + datetime.timedelta(minutes=1)
+    missing, force_update = predictor._refresh_state(cached_data, local_midnight + datetime.timedelta(minutes=3))
+    assert not missing and not force_update
+
+    missing, force_update = predictor._refresh_state(
+        dict(cached_data, last_update=local_midnight - datetime.timedelta(minutes=1)),
+        local_midnight + datetime.timedelta(minutes=3))
+    assert force_update
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from scoring import ROLE_METRICS, SCORE_MARGIN
+
+# 부트스트랩 신뢰구간 설정 (기본 비활성화: 기본 갱신 경로에는 비용 없음)
+BOOTSTRAP_ENABLED = os.getenv('KBO_BOOTSTRAP_CI', 'false').lower() in ('1', 'true', 'yes')
+BOOTSTRAP_SAMPLES = int(os.getenv('KBO_BOOTSTRAP_SAMPLES', 1000))
+BOOTSTRAP_LEVEL = float(os.getenv('KBO_BOOTSTRAP_LEVEL', 0.95))
+BOOTSTRAP_SEED = 42
+
+
+def team_player_values(all_hitter_data, all_pitcher_data, season):
+    """팀별 선수 예측값 배열 (팀 집계와 같은 행 기준, NaN 제외). 반환: 팀 목록, {역할: [팀별 배열]}"""
+    values = {}
+    for role, df in (('hitter', all_hitter_data), ('pitcher', all_pitcher_data)):
+        season_df = df[df['연도'] == season]
+        metric = ROLE_METRICS[role]
+        values[role] = {team: group[metric].dropna().to_numpy(dtype=float)
+                        for team, group in season_df.groupby('팀명')}
+
+    # 두 역할 모두 기록이 있는 팀만 (victory_df와 같은 팀명 순)
+    teams = sorted(t for t in set(values['hitter']) & set(values['pitcher'])
+                   if len(values['hitter'][t]) and len(values['pitcher'][t]))
+    return teams, {role: [values[role][t] for t in teams] for role in values}
+
+
+def _resample_means(team_values, n_samples, rng):
+    """팀 내 선수 복원 추출 평균 (B x 팀 수), 팀마다 한 번의 벡터 연산"""
+    means = np.empty((n_samples, len(team_values)))
+    for j, values in enumerate(team_values):
+        means[:, j] = values[rng.integers(0, len(values), size=(n_samples, len(values)))].mean(axis=1)
+    return means
+
+
+def bootstrap_matrices(hitter_values, pitcher_values, n_samples, seed):
+    """부트스트랩 반복별 승률 매트릭스 (B x 팀 수 x 팀 수)"""
+    rng = np.random.default_rng(seed)
+    ops = _resample_means(hitter_values, n_samples, rng)
+    whip = _resample_means(pitcher_values, n_samples, rng)
+
+    # 반복마다 victory_df와 같은 보정 (최저 팀이 SCORE_MARGIN이 되도록)
+    scores = ops - whip
+    scores = scores + np.abs(scores.min(axis=1, keepdims=True)) + SCORE_MARGIN
+    return scores[:, :, None] / (scores[:, :, None] + scores[:, None, :]) * 100
+
+
+def compute_win_probability_ci(all_hitter_data, all_pitcher_data, season, n_samples=None, level=None,
+                               seed=BOOTSTRAP_SEED):
+    """선수 복원 추출로 팀 간 승률의 백분위 신뢰구간 계산. 반환: {'low', 'high'} 매트릭스 등
+
+    B x 팀 수 x 팀 수 배열 한 번의 브로드캐스트로 충분히 빠르므로 웹 워커 안에서 프로세스 풀 없이 계산
+    """
+    n_samples = n_samples or BOOTSTRAP_SAMPLES
+    level = level or BOOTSTRAP_LEVEL
+
+    teams, values = team_player_values(all_hitter_data, all_pitcher_data, season)
+    if not teams:
+        return None
+
+    matrices = bootstrap_matrices(values['hitter'], values['pitcher'], n_samples, seed)
+    alpha = (1 - level) / 2
+    low, high = np.percentile(matrices, [alpha * 100, (1 - alpha) * 100], axis=0)
+
+    def to_df(values):
+        values = np.round(values, 2).astype(object)
+        np.fill_diagonal(values, '-')
+        return pd.DataFrame(values, index=teams, columns=teams)
+
+    return {'low': to_df(low), 'high': to_df(high), 'samples': n_samples, 'level': level}